@@ -0,0 +1,43 @@
+"""set_plug_value() and modified content generation time for large edit
+batches.
+
+Run from repository root::
+
+    python benchmarks/bench_edit.py
+"""
+from __future__ import print_function
+
+from common import best_time, report, wide_project
+
+import guerilla_parser
+
+
+def main():
+
+    p = guerilla_parser.GuerillaParser(wide_project(300))
+
+    plugs = [plug for plug in p.plugs if plug.name == 'Visible']
+
+    for count in (100, 1000, 10000, len(plugs)):
+
+        def edit():
+            p.set_plug_value([(plug, False) for plug in plugs[:count]])
+            return p.modified_content
+
+        duration = best_time(edit)
+
+        report("set_plug_value(), {} plugs".format(count),
+               duration * 1000.0, "ms")
+
+    def edit_one_by_one():
+        for plug in plugs[:1000]:
+            p.set_plug_value([(plug, True)])
+        return p.modified_content
+
+    duration = best_time(edit_one_by_one)
+
+    report("set_plug_value(), 1000 calls", duration * 1000.0, "ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Connection and dependency graph queries versus Python walks over plug
+inputs, on a scaled up copy of the largest corpus project.
+
+Run from repository root::
+
+    python benchmarks/bench_graph.py
+"""
+from __future__ import print_function
+
+import io
+
+from common import best_time, corpus_paths, report, scale_up
+
+import guerilla_parser
+
+
+def walk_downstream(node):
+    """Return nodes transitively depending on given `node`, walking plug
+    outputs.
+
+    :type node: guerilla_parser.GuerillaNode
+    :rtype: set[guerilla_parser.GuerillaNode]
+    """
+    reached = set()
+    todo = [node]
+
+    while todo:
+        for plug in todo.pop().plugs:
+            for output in plug.outputs:
+                if output.parent not in reached:
+                    reached.add(output.parent)
+                    todo.append(output.parent)
+
+    return reached
+
+
+def main():
+
+    project = max((path for path in corpus_paths()
+                   if path.endswith('.gproject')),
+                  key=lambda path: io.open(path, 'rb').seek(0, 2))
+
+    with io.open(project, 'rt', encoding='iso-8859-1') as f:
+        content = scale_up(f.read(), 100)
+
+    p = guerilla_parser.GuerillaParser(content)
+
+    duration = best_time(lambda: p.graph, repeat=1)
+
+    report("graph build", duration * 1000.0, "ms")
+
+    graph = p.graph
+
+    report("graph nodes", len(graph.nodes), "nodes")
+    report("graph plugs", len(graph.plugs), "plugs")
+
+    nodes = graph.nodes
+
+    duration = best_time(lambda: [walk_downstream(node) for node in nodes],
+                         repeat=1)
+
+    report("downstream nodes, walking plug outputs", duration * 1000.0, "ms")
+
+    duration = best_time(lambda: [graph.downstream(node) for node in nodes],
+                         repeat=1)
+
+    report("downstream(), first call", duration * 1000.0, "ms")
+
+    duration = best_time(lambda: [graph.downstream(node) for node in nodes])
+
+    report("downstream(), memoized", duration * 1000.0, "ms")
+
+    duration = best_time(lambda: guerilla_parser.GuerillaParser(
+        content).graph.topological_order(plugs=True), repeat=1)
+
+    report("parsing and plug topological order", duration * 1000.0, "ms")
+
+
+if __name__ == '__main__':
+    main()
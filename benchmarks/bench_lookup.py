@@ -0,0 +1,48 @@
+"""Path to node lookup throughput on wide hierarchies.
+
+Run from repository root::
+
+    python benchmarks/bench_lookup.py
+"""
+from __future__ import print_function
+
+from common import best_time, report, wide_project
+
+import guerilla_parser
+
+
+def main():
+
+    for width, depth in ((10, 3), (100, 2), (10000, 1)):
+
+        p = guerilla_parser.GuerillaParser(wide_project(width, depth))
+
+        paths = [node.path for node in p.nodes]
+
+        def lookup():
+            for path in paths:
+                p.path_to_node(path)
+
+        duration = best_time(lookup)
+
+        report("path_to_node, {} children per node".format(width),
+               len(paths) / duration, "lookups/s")
+
+        p = guerilla_parser.GuerillaParser(wide_project(width, depth),
+                                           index_paths=False)
+
+        duration = best_time(lookup)
+
+        report("  without path index",
+               len(paths) / duration, "lookups/s")
+
+        p = guerilla_parser.GuerillaParser(wide_project(width, depth))
+
+        duration = best_time(lambda: p.paths_to_nodes(paths))
+
+        report("  paths_to_nodes()",
+               len(paths) / duration, "lookups/s")
+
+
+if __name__ == '__main__':
+    main()
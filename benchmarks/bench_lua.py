@@ -0,0 +1,65 @@
+"""Lua literal conversion time, dedicated parser versus former ``eval()``
+based conversion, on test corpus tuple values and type parameters.
+
+Run from repository root::
+
+    python benchmarks/bench_lua.py
+"""
+from __future__ import print_function
+
+import re
+
+from common import best_time, corpus_paths, report
+
+import guerilla_parser
+
+from guerilla_parser.lua import parse_value
+
+
+def eval_tuple(value):
+    return eval(value.replace('{', '(').replace('}', ')'))
+
+
+def eval_dict(value):
+    value = re.sub(r'([a-zA-Z0-9_-]+)=([a-zA-Z0-9_-]+)', r"'\g<1>':\g<2>",
+                   value)
+    return eval(value.replace('=', ':'))
+
+
+def main():
+
+    tuples = []
+    params = []
+
+    for path in corpus_paths():
+
+        for plug in guerilla_parser.parse(path).plugs:
+
+            value, decoder = plug._get_raw_value()
+
+            if decoder is not None and decoder.__name__ == '_decode_tuple':
+                tuples.append(value)
+
+            if plug._param is not None and '=' in plug._param:
+                params.append(plug._param)
+
+    # repeat values so timings are meaningful
+    tuples *= 1000
+    params *= 100
+
+    for label, values, eval_func in (("tuple values", tuples, eval_tuple),
+                                     ("type parameters", params, eval_dict)):
+
+        duration = best_time(lambda: [eval_func(v) for v in values])
+
+        report("{}, eval, {} values".format(label, len(values)),
+               duration * 1000.0, "ms")
+
+        duration = best_time(lambda: [parse_value(v) for v in values])
+
+        report("{}, lua parser, {} values".format(label, len(values)),
+               duration * 1000.0, "ms")
+
+
+if __name__ == '__main__':
+    main()
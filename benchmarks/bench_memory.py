@@ -0,0 +1,117 @@
+"""Memory used per parsed node and plug.
+
+Run from repository root::
+
+    python benchmarks/bench_memory.py
+"""
+from __future__ import print_function
+
+import gc
+import sys
+import tracemalloc
+
+from common import corpus_paths
+
+import guerilla_parser
+from guerilla_parser import GuerillaNode, GuerillaPlug
+
+
+def measure(count, func):
+    """Return memory allocated per call of given `func`, in bytes.
+
+    :param count: Number of objects to create.
+    :type count: int
+    :param func: Function creating an object from given index.
+    :type func: function
+    :rtype: float
+    """
+    tracemalloc.start()
+
+    before = tracemalloc.take_snapshot()
+
+    objs = [func(i) for i in range(count)]
+
+    after = tracemalloc.take_snapshot()
+
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff
+               for stat in after.compare_to(before, 'filename'))
+
+    # list holding objects is not part of the measure
+    size -= sys.getsizeof(objs)
+
+    return float(size) / count
+
+
+def measure_kept(func):
+    """Return memory kept allocated by object returned by given `func`, in
+    bytes.
+
+    :param func: Function returning object to measure.
+    :type func: function
+    :rtype: int
+    """
+    tracemalloc.start()
+
+    before = tracemalloc.take_snapshot()
+
+    obj = func()  # noqa: F841
+
+    # parsed graphs have reference cycles
+    gc.collect()
+
+    after = tracemalloc.take_snapshot()
+
+    tracemalloc.stop()
+
+    return sum(stat.size_diff
+               for stat in after.compare_to(before, 'filename'))
+
+
+def main_corpus():
+
+    paths = corpus_paths()
+
+    graph = measure_kept(
+        lambda: [guerilla_parser.parse(p, keep_content=False) for p in paths])
+
+    store = measure_kept(
+        lambda: [guerilla_parser.GuerillaColumnarStore.from_file(p)
+                 for p in paths])
+
+    print("{:<40}{:>10} bytes".format("corpus object graph", graph))
+    print("{:<40}{:>10} bytes".format("corpus columnar store", store))
+
+
+def main(count=100000):
+
+    # names are pre-created so their memory is not part of the measure
+    names = ['node{}'.format(i) for i in range(count)]
+
+    root = GuerillaNode(1, 'Root', 'Root')
+
+    leaf_node = measure(count,
+                        lambda i: GuerillaNode(i, names[i], 'Leaf', root))
+
+    root = GuerillaNode(1, 'Root', 'Root')
+
+    plug_node = measure(
+        count, lambda i: GuerillaPlug('Plug', 'Plug',
+                                      GuerillaNode(i, names[i], 'Leaf', root),
+                                      '1'))
+
+    node = GuerillaNode(1, 'Root', 'Root')
+
+    plug = measure(count,
+                   lambda i: GuerillaPlug(names[i], 'Plug', node, '1'))
+
+    print("{:<40}{:>10.1f} bytes".format("leaf node (no child, no plug)",
+                                         leaf_node))
+    print("{:<40}{:>10.1f} bytes".format("node with one plug", plug_node))
+    print("{:<40}{:>10.1f} bytes".format("plug (no connection)", plug))
+
+
+if __name__ == '__main__':
+    main()
+    main_corpus()
@@ -0,0 +1,75 @@
+"""Parsing time and peak memory of a large generated Guerilla file, read
+versus memory mapped.
+
+Run from repository root::
+
+    python benchmarks/bench_mmap.py
+"""
+from __future__ import print_function
+
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from common import best_time, report, wide_project
+
+import guerilla_parser
+
+
+def peak_memory(func):
+    """Return peak memory allocated while running given `func`, in bytes.
+
+    :param func: Function to run.
+    :type func: function
+    :rtype: int
+    """
+    gc.collect()
+
+    tracemalloc.start()
+
+    func()
+
+    _, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    return peak
+
+
+def main():
+
+    content = wide_project(400)
+
+    fd, path = tempfile.mkstemp(suffix='.gproject')
+
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+
+        report("content size", len(content) / float(1 << 20), "MB")
+
+        del content
+
+        for label, kwargs in (
+                ("read", {}),
+                ("read, keep_content=False", {'keep_content': False}),
+                ("mmap", {'mmap': True}),
+                ("mmap, keep_content=False", {'mmap': True,
+                                              'keep_content': False})):
+
+            duration = best_time(
+                lambda: guerilla_parser.parse(path, **kwargs))
+
+            report(label + " time", duration, "s")
+
+            peak = peak_memory(lambda: guerilla_parser.parse(path, **kwargs))
+
+            report(label + " peak memory", peak / float(1 << 20), "MB")
+
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
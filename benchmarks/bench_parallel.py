@@ -0,0 +1,41 @@
+"""Single pass versus parallel chunked parsing time of a large generated
+Guerilla file.
+
+Run from repository root::
+
+    python benchmarks/bench_parallel.py
+"""
+from __future__ import print_function
+
+import multiprocessing
+
+from common import best_time, report, wide_project
+
+import guerilla_parser
+
+
+def main():
+
+    content = wide_project(400)
+
+    report("content size", len(content) / float(1 << 20), "MB")
+
+    duration = best_time(lambda: guerilla_parser.GuerillaParser(content))
+
+    report("single pass", duration, "s")
+
+    cpu_count = multiprocessing.cpu_count()
+
+    for workers in sorted({2, 4, cpu_count}):
+
+        if not 1 < workers <= cpu_count:
+            continue
+
+        duration = best_time(lambda: guerilla_parser.GuerillaParser(
+            content, workers=workers))
+
+        report("parallel, {} workers".format(workers), duration, "s")
+
+
+if __name__ == '__main__':
+    main()
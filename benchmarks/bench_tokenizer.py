@@ -0,0 +1,80 @@
+"""Per command kind tokenizing time, combined regex versus line regex
+followed by per command argument regexes.
+
+Run from repository root::
+
+    python benchmarks/bench_tokenizer.py
+"""
+from __future__ import print_function
+
+from collections import defaultdict
+
+from common import best_time, corpus_paths, report
+
+from guerilla_parser.parser import GuerillaParser
+from guerilla_parser.parser import _tokenize_chunk, _tokenize_chunk_lines
+from guerilla_parser.util import open_
+
+
+def tokenize_two_stages(chunk):
+    """Tokenize given `chunk` matching lines first, then command arguments.
+    """
+    return _tokenize_chunk_lines((chunk, 0))
+
+
+def main():
+
+    # corpus lines per command kind
+    lines = defaultdict(list)
+
+    for path in corpus_paths():
+
+        with open_(path) as f:
+            content = f.read()
+
+        for match in GuerillaParser._LINE_PARSE.finditer(content):
+
+            cmd = match.group('cmd')
+
+            if cmd == 'create':
+                if match.group('args').split(',', 1)[0][1:-1] in \
+                        ('Plug', 'AttributePlug', 'SceneGraphNodePropsPlug',
+                         'SceneGraphNodeRenderPropsPlug', 'UserPlug',
+                         'DynAttrPlug', 'AttributeShaderPlug', 'MeshPlug',
+                         'HostPlug', 'BakePlug', 'ExpressionInput',
+                         'ExpressionOutput'):
+                    cmd = 'create (plug)'
+                else:
+                    cmd = 'create (node)'
+
+            lines[cmd].append(match.group(0).lstrip())
+
+    total_two_stages = total_combined = 0.0
+
+    for cmd in sorted(lines):
+
+        # repeat lines so timings are meaningful
+        chunk = ''.join(lines[cmd] * max(1, 100000 // len(lines[cmd])))
+
+        assert tokenize_two_stages(chunk) == _tokenize_chunk((chunk, 0))
+
+        count = chunk.count('\n')
+
+        duration = best_time(lambda: tokenize_two_stages(chunk))
+        total_two_stages += duration * len(lines[cmd]) / count
+
+        report("{}, two stages (us/command)".format(cmd),
+               duration * 1e6 / count, "us")
+
+        duration = best_time(lambda: _tokenize_chunk((chunk, 0)))
+        total_combined += duration * len(lines[cmd]) / count
+
+        report("{}, combined (us/command)".format(cmd),
+               duration * 1e6 / count, "us")
+
+    report("corpus, two stages", total_two_stages * 1000.0, "ms")
+    report("corpus, combined", total_combined * 1000.0, "ms")
+
+
+if __name__ == '__main__':
+    main()
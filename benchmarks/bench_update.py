@@ -0,0 +1,89 @@
+"""GuerillaParser.update() latency versus a full parsing, on a scaled up copy
+of the largest corpus project with a few changed lines.
+
+Run from repository root::
+
+    python benchmarks/bench_update.py
+"""
+from __future__ import print_function
+
+import io
+
+from common import best_time, corpus_paths, report, scale_up
+
+import guerilla_parser
+
+
+def change_values(content, count):
+    """Return given `content` with values of `count` ``set`` commands
+    changed, spread over the whole content.
+
+    :param content: Guerilla file content.
+    :type content: str
+    :param count: Number of changed commands.
+    :type count: int
+    :rtype: str
+    """
+    lines = content.split('\n')
+
+    set_indices = [i for i, line in enumerate(lines)
+                   if line.lstrip().startswith('set("$')]
+
+    step = max(1, len(set_indices) // count)
+
+    for i in set_indices[::step][:count]:
+        lines[i] = lines[i][:lines[i].index('",') + 2] + '"changed")'
+
+    return '\n'.join(lines)
+
+
+def main():
+
+    project = max((path for path in corpus_paths()
+                   if path.endswith('.gproject')),
+                  key=lambda path: io.open(path, 'rb').seek(0, 2))
+
+    with io.open(project, 'rt', encoding='iso-8859-1') as f:
+        content = scale_up(f.read(), 100)
+
+    report("content size", len(content) / float(1 << 20), "MB")
+
+    duration = best_time(lambda: guerilla_parser.GuerillaParser(content))
+
+    report("full parsing", duration * 1000.0, "ms")
+
+    for count in (1, 10, 100, 1000):
+
+        new_content = change_values(content, count)
+
+        p = guerilla_parser.GuerillaParser(content)
+
+        assert p.update(new_content)
+
+        # update back and forth
+        def update():
+            p.update(content)
+            p.update(new_content)
+
+        duration = best_time(update) / 2.0
+
+        report("update(), {} changed lines".format(count),
+               duration * 1000.0, "ms")
+
+    # new node, content is parsed again
+    new_content = content + \
+        'oid[999999]=create("SceneGraphNode","$1","Foo")\n'
+
+    p = guerilla_parser.GuerillaParser(content)
+
+    def update():
+        p.update(content)
+        p.update(new_content)
+
+    duration = best_time(update) / 2.0
+
+    report("update(), fallback to full parsing", duration * 1000.0, "ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""GuerillaProjectWatcher refresh time versus parsing every file again, on
+copies of the test corpus with one modified file.
+
+Run from repository root::
+
+    python benchmarks/bench_watch.py
+"""
+from __future__ import print_function
+
+import io
+import os
+import shutil
+import tempfile
+
+from common import best_time, corpus_paths, report
+
+import guerilla_parser
+
+
+def main():
+
+    tmp_dir = tempfile.mkdtemp()
+
+    try:
+        paths = []
+
+        for i, path in enumerate(corpus_paths()):
+            dst = os.path.join(tmp_dir, '{}_{}'.format(i,
+                                                       os.path.basename(path)))
+            shutil.copy(path, dst)
+            paths.append(dst)
+
+        report("watched files", len(paths), "files")
+
+        duration = best_time(lambda: [guerilla_parser.parse(path)
+                                      for path in paths])
+
+        report("parse every file", duration * 1000.0, "ms")
+
+        watcher = guerilla_parser.GuerillaProjectWatcher(paths)
+
+        duration = best_time(watcher.poll)
+
+        report("poll(), no change", duration * 1000.0, "ms")
+
+        modified = max(paths, key=os.path.getsize)
+
+        with io.open(modified, 'rt', encoding='iso-8859-1') as f:
+            content = f.read()
+
+        mtime = os.stat(modified).st_mtime
+
+        def modify_and_poll():
+
+            modify_and_poll.count += 1
+
+            with io.open(modified, 'wt', encoding='iso-8859-1',
+                         newline='') as f:
+                f.write('\n' * (modify_and_poll.count % 2) + content)
+
+            os.utime(modified, (mtime + modify_and_poll.count,
+                                mtime + modify_and_poll.count))
+
+            assert watcher.poll() == [modified]
+
+        modify_and_poll.count = 0
+
+        duration = best_time(modify_and_poll)
+
+        report("poll(), largest file modified", duration * 1000.0, "ms")
+
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
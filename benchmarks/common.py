@@ -0,0 +1,144 @@
+"""Shared benchmark helpers."""
+from __future__ import print_function
+
+import os.path
+import re
+import sys
+import timeit
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+gproj_dir = os.path.join(root_dir, 'test', 'gproject')
+
+sys.path.insert(0, os.path.join(root_dir, 'src'))
+
+
+def corpus_paths():
+    """Return test corpus Guerilla file paths.
+
+    :rtype: list[str]
+    """
+    paths = []
+
+    for dir_path, _, file_names in os.walk(gproj_dir):
+        for file_name in file_names:
+            if os.path.splitext(file_name)[1] in ('.gproject', '.glayer',
+                                                  '.grendergraph'):
+                paths.append(os.path.join(dir_path, file_name))
+
+    return sorted(paths)
+
+
+def wide_project(width, depth=2):
+    """Return content of a Guerilla file with `depth` levels of `width`
+    children per node.
+
+    :param width: Children count per node.
+    :type width: int
+    :param depth: Levels count.
+    :type depth: int
+    :rtype: str
+    """
+    lines = ['docformatrevision(19)\n',
+             'oid[1]=create("GADocument","\\"\\"","LUIDocument")\n']
+
+    parents = [1]
+    oid = 1
+
+    for _ in range(depth):
+
+        children = []
+
+        for parent in parents:
+            for i in range(width):
+
+                oid += 1
+
+                lines.append('oid[{}]=create("SceneGraphNode","${}",'
+                             '"node{}")\n'.format(oid, parent, i))
+                lines.append('set("${}.Visible",true)\n'.format(oid))
+
+                children.append(oid)
+
+        parents = children
+
+    return ''.join(lines)
+
+
+# object ids of created objects and command arguments: oid[12], "$12
+_OID_PARSE = re.compile(r'(oid\[|"\$)(\d+)')
+
+# created children of root node, name being captured
+_ROOT_CHILD_PARSE = re.compile(
+    r'^(\s*oid\[\d+\]=create(?:notref)?\("\w+","\$1",")'
+    r'((?:[^"\\\n]|\\.)*)"', re.MULTILINE)
+
+# values and inputs of root node plugs, set once
+_ROOT_INPUT_PARSE = re.compile(r'^\s*(?:set|connect|depend)\("\$1[.|"].*\n',
+                               re.MULTILINE)
+
+
+def scale_up(content, factor):
+    """Return content of a Guerilla file `factor` times larger than given
+    one.
+
+    Everything under root node is duplicated, copies having their object
+    ids shifted and root children names suffixed (``Preferences_1``, etc.)
+    so paths stay unique, except paths relative to root (``"$1|foo"``).
+    Root node plug values and inputs are only set by the original.
+
+    :param content: Guerilla file content, root node being created on
+        second line.
+    :type content: str
+    :param factor: Number of copies.
+    :type factor: int
+    :rtype: str
+    """
+    # docformatrevision and root node creation
+    header_end = content.index('\n', content.index('\n') + 1) + 1
+
+    header = content[:header_end]
+    body = content[header_end:]
+    body_copy = _ROOT_INPUT_PARSE.sub('', body)
+
+    oid_count = max(int(oid) for _, oid in _OID_PARSE.findall(content))
+
+    copies = [header, body]
+
+    for i in range(1, factor):
+
+        shift = oid_count * i
+
+        def shift_oid(match):
+            oid = int(match.group(2))
+            # root node is shared by every copy
+            return match.group(1) + str(oid if oid == 1 else oid + shift)
+
+        copies.append(_ROOT_CHILD_PARSE.sub(
+            r'\g<1>\g<2>_{}"'.format(i),
+            _OID_PARSE.sub(shift_oid, body_copy)))
+
+    return ''.join(copies)
+
+
+def best_time(func, repeat=3, number=1):
+    """Return best run time of given `func`, in seconds.
+
+    :param func: Function to time.
+    :type func: function
+    :rtype: float
+    """
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def report(label, value, unit):
+    """Print a benchmark result line.
+
+    :param label: Result label.
+    :type label: str
+    :param value: Result value.
+    :type value: float
+    :param unit: Result unit.
+    :type unit: str
+    """
+    print("{:<48}{:>14.1f} {}".format(label, value, unit))
@@ -0,0 +1,288 @@
+"""Benchmark suite over the test corpus and scaled up copies of its largest
+project.
+
+Measures parsing time and peak memory, ``path_to_node()`` and
+``path_to_plug()`` throughput, ``nodes`` and ``plugs`` iteration,
+``set_plug_value()`` and ``write()``. Results can be saved and compared to a
+previous run, the script exiting with an error if a benchmark is slower than
+the threshold.
+
+Run from repository root::
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --scales 10,100,1000 --save before.json
+    python benchmarks/suite.py --compare before.json
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from common import best_time, corpus_paths, report, scale_up
+
+import guerilla_parser
+
+
+def read(path):
+    """Return content of given Guerilla file `path`.
+
+    :type path: str
+    :rtype: str
+    """
+    with io.open(path, 'rt', encoding='iso-8859-1') as f:
+        return f.read()
+
+
+def datasets(scales):
+    """Return contents to benchmark: the whole corpus, then the largest
+    corpus project scaled up by each of given `scales`.
+
+    :param scales: Scale up factors.
+    :type scales: list[int]
+    :return: Dataset label and Guerilla file contents.
+    :rtype: collections.iterator[(str, list[str])]
+    """
+    contents = [read(path) for path in corpus_paths()]
+
+    yield "corpus", contents
+
+    project = max((c for c, p in zip(contents, corpus_paths())
+                   if p.endswith('.gproject')), key=len)
+
+    for scale in scales:
+        yield "project x{}".format(scale), [scale_up(project, scale)]
+
+
+def bench_parse(contents, parsers):
+    return best_time(lambda: [guerilla_parser.GuerillaParser(c)
+                              for c in contents]) * 1000.0
+
+
+def bench_peak_memory(contents, parsers):
+
+    gc.collect()
+
+    tracemalloc.start()
+
+    [guerilla_parser.GuerillaParser(c) for c in contents]
+
+    _, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    return peak / float(1 << 20)
+
+
+def bench_path_to_node(contents, parsers):
+
+    lookups = [(p, [node.path for node in p.nodes]) for p in parsers]
+
+    def lookup():
+        for p, paths in lookups:
+            for path in paths:
+                p.path_to_node(path)
+
+    return sum(len(paths) for _, paths in lookups) / best_time(lookup)
+
+
+def bench_path_to_plug(contents, parsers):
+
+    lookups = [(p, [plug.path for plug in p.plugs]) for p in parsers]
+
+    def lookup():
+        for p, paths in lookups:
+            for path in paths:
+                p.path_to_plug(path)
+
+    return sum(len(paths) for _, paths in lookups) / best_time(lookup)
+
+
+def bench_nodes(contents, parsers):
+
+    def iterate():
+        for p in parsers:
+            for _ in p.nodes:
+                pass
+
+    return best_time(iterate) * 1000.0
+
+
+def bench_plugs(contents, parsers):
+
+    def iterate():
+        for p in parsers:
+            for _ in p.plugs:
+                pass
+
+    return best_time(iterate) * 1000.0
+
+
+def _float_plugs(p):
+    """Return plugs of given parser having a float value set.
+
+    :type p: guerilla_parser.GuerillaParser
+    :rtype: list[guerilla_parser.GuerillaPlug]
+    """
+    return [plug for plug in p.plugs
+            if plug.org_value is not None and isinstance(plug.value, float)]
+
+
+def bench_set_plug_value(contents, parsers):
+
+    edits = [(p, _float_plugs(p)) for p in parsers]
+
+    def edit():
+        for p, plugs in edits:
+            p.set_plug_value([(plug, 42.0) for plug in plugs])
+
+    return best_time(edit) * 1000.0
+
+
+def bench_write(contents, parsers):
+
+    for p in parsers:
+        p.set_plug_value([(plug, 42.0) for plug in _float_plugs(p)])
+
+    fd, path = tempfile.mkstemp(suffix='.gproject')
+    os.close(fd)
+
+    try:
+        return best_time(lambda: [p.write(path) for p in parsers]) * 1000.0
+    finally:
+        os.remove(path)
+
+
+# name, unit, if higher values are better and benchmark function, called
+# with dataset contents and their parsers
+BENCHMARKS = [
+    ("parse", "ms", False, bench_parse),
+    ("parse peak memory", "MB", False, bench_peak_memory),
+    ("path_to_node()", "lookups/s", True, bench_path_to_node),
+    ("path_to_plug()", "lookups/s", True, bench_path_to_plug),
+    ("nodes iteration", "ms", False, bench_nodes),
+    ("plugs iteration", "ms", False, bench_plugs),
+    ("set_plug_value()", "ms", False, bench_set_plug_value),
+    ("write()", "ms", False, bench_write),
+]
+
+
+def run(scales):
+    """Run every benchmark on every dataset, printing results.
+
+    :param scales: Scale up factors of the largest corpus project.
+    :type scales: list[int]
+    :return: Value, unit and if higher values are better, per result label.
+    :rtype: dict[str, (float, str, bool)]
+    """
+    results = {}
+
+    for dataset, contents in datasets(scales):
+
+        size = sum(len(c) for c in contents) / float(1 << 20)
+
+        report("{} size".format(dataset), size, "MB")
+
+        parsers = [guerilla_parser.GuerillaParser(c) for c in contents]
+
+        for name, unit, higher_is_better, func in BENCHMARKS:
+
+            label = "{}, {}".format(dataset, name)
+
+            value = func(contents, parsers)
+
+            report("  " + name, value, unit)
+
+            results[label] = (value, unit, higher_is_better)
+
+        del parsers
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print ratio of each result to its baseline value.
+
+    :param results: Current results (see :func:`run()`).
+    :type results: dict[str, (float, str, bool)]
+    :param baseline: Previous results.
+    :type baseline: dict[str, (float, str, bool)]
+    :param threshold: Slowdown ratio above which a result is a regression.
+    :type threshold: float
+    :return: Labels of regressed results.
+    :rtype: list[str]
+    """
+    regressions = []
+
+    print()
+
+    for label in sorted(results):
+
+        if label not in baseline:
+            continue
+
+        value, _, higher_is_better = results[label]
+        base_value = baseline[label][0]
+
+        if not base_value or not value:
+            continue
+
+        # > 1 means slower (or bigger)
+        if higher_is_better:
+            ratio = base_value / value
+        else:
+            ratio = value / base_value
+
+        if ratio > 1.0 + threshold:
+            regressions.append(label)
+            status = "REGRESSION"
+        else:
+            status = ""
+
+        print("{:<48}{:>14.2f}x {}".format(label, ratio, status))
+
+    return regressions
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scales', default='10,100',
+                        help="comma separated scale up factors of the "
+                             "largest corpus project (default: %(default)s)")
+    parser.add_argument('--save', metavar='PATH',
+                        help="save results to given json file")
+    parser.add_argument('--compare', metavar='PATH',
+                        help="compare results to given json file")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="slowdown ratio reported as regression "
+                             "(default: %(default)s)")
+
+    args = parser.parse_args(argv)
+
+    scales = [int(s) for s in args.scales.split(',') if s]
+
+    results = run(scales)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        if compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
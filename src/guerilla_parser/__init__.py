@@ -1,7 +1,20 @@
-from .exception import ChildError, PathError
+import sys
+
+from .exception import ChildError, CycleError, PathError
 from .parser import GuerillaParser
 from .node import GuerillaNode
 from .plug import GuerillaPlug
+from .columnar import GuerillaColumnarStore, ColumnarNode, ColumnarPlug
+from .command import Command, iter_commands, iter_stream_commands
+from .batch import ParseResult, parse_many
+from .cache import SnapshotCache
+from .stats import ParseStats
+from .hooks import DiagnoseHooks, ParseHooks
+from .watch import GuerillaProjectWatcher
+from .graph import GuerillaGraph
+
+if sys.version_info >= (3, 4):  # asyncio
+    from .aio import parse_async
 
 __version__ = "0.8.5"
 
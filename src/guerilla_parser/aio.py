@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import multiprocessing
+import weakref
+
+from .parser import GuerillaParser
+
+
+#: Maximum number of files parsed at once by :func:`parse_async()` calls not
+#: given a semaphore, per event loop. No limit if `None`.
+max_concurrency = multiprocessing.cpu_count()
+
+# default semaphore per event loop, and the limit it was created with
+_default_semaphores = weakref.WeakKeyDictionary()
+
+
+def _parse(path, callback, kwargs):
+    """Parse given file and run callback on it.
+
+    Run in executor, so must be module level to be pickled by process
+    pools.
+
+    :param path: Path of the Guerilla file to parse.
+    :type path: str
+    :param callback: Function called with the parser.
+    :type callback: function
+    :param kwargs: Parser keyword arguments.
+    :type kwargs: dict
+    :rtype: GuerillaParser|object
+    """
+    parser = GuerillaParser.from_file(path, **kwargs)
+
+    if callback is not None:
+        return callback(parser)
+
+    return parser
+
+
+def _get_running_loop():
+    """Return running event loop.
+
+    :rtype: asyncio.AbstractEventLoop
+    """
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:  # python < 3.7
+        return asyncio.get_event_loop()
+
+
+def _default_semaphore(loop):
+    """Return semaphore shared by :func:`parse_async()` calls of given
+    `loop` not given a semaphore, see :data:`max_concurrency`.
+
+    :type loop: asyncio.AbstractEventLoop
+    :return: Semaphore, `None` if there is no limit.
+    :rtype: asyncio.Semaphore|None
+    """
+    if max_concurrency is None:
+        return None
+
+    limit, semaphore = _default_semaphores.get(loop, (None, None))
+
+    if limit != max_concurrency:
+        # created while loop runs, so it's bound to it on every python
+        semaphore = asyncio.Semaphore(max_concurrency)
+        _default_semaphores[loop] = max_concurrency, semaphore
+
+    return semaphore
+
+
+def _copy_result(src, dst):
+    """Macro to set result, exception or cancellation of `src` future to
+    `dst` future, unless `dst` is cancelled.
+
+    :type src: asyncio.Future
+    :type dst: asyncio.Future
+    """
+    if dst.cancelled():
+        return
+
+    if src.cancelled():
+        dst.cancel()
+    elif src.exception() is not None:
+        dst.set_exception(src.exception())
+    else:
+        dst.set_result(src.result())
+
+
+def parse_async(path, executor=None, semaphore=None, callback=None,
+                **kwargs):
+    """Parse given Guerilla file `path` without blocking the event loop.
+
+    File reading and parsing are both run in `executor`, event loop default
+    one (threads) if `None`. As parsing is CPU bound, a
+    :class:`concurrent.futures.ProcessPoolExecutor` parses files in parallel
+    but parsers are pickled back to the event loop process: prefer giving a
+    `callback` returning a compact summary of the parsed file. It's run in
+    the executor and has to be picklable (module level function).
+
+    Number of files parsed at once is limited by given `semaphore`, or by a
+    semaphore shared by calls without one (see :data:`max_concurrency`).
+
+    Must be called while event loop runs, from a coroutine or a callback.
+    Returned future is awaited like a coroutine.
+
+    :Example:
+
+    >>> semaphore = asyncio.Semaphore(4)
+    >>> async def handle(path):
+    ...     p = await parse_async(path, semaphore=semaphore)
+    ...     return p.doc_format_rev
+
+    :param path: Path of the Guerilla file to parse.
+    :type path: str
+    :param executor: Executor to parse in, event loop default one if
+        `None`.
+    :type executor: concurrent.futures.Executor
+    :param semaphore: Semaphore acquired while parsing, default shared one
+        if `None`.
+    :type semaphore: asyncio.Semaphore
+    :param callback: Function called with the parser, its return value is
+        returned in place of the parser.
+    :type callback: function
+    :param kwargs: Arguments passed to :meth:`GuerillaParser.from_file()`.
+    :return: Future of the parser filled with content of given `path`, or
+        of what the callback returned.
+    :rtype: asyncio.Future
+    """
+    # written with futures and callbacks, no coroutine syntax, so the module
+    # can be byte-compiled by every python version the package supports
+    loop = _get_running_loop()
+
+    func = functools.partial(_parse, path, callback, kwargs)
+
+    if semaphore is None:
+        semaphore = _default_semaphore(loop)
+
+        if semaphore is None:
+            return loop.run_in_executor(executor, func)
+
+    result = asyncio.Future(loop=loop)
+
+    def on_acquired(acquire):
+
+        if acquire.cancelled() or acquire.exception() is not None:
+            _copy_result(acquire, result)
+            return
+
+        if result.cancelled():
+            semaphore.release()
+            return
+
+        def on_parsed(future):
+            semaphore.release()
+            _copy_result(future, result)
+
+        loop.run_in_executor(executor, func).add_done_callback(on_parsed)
+
+    loop.create_task(semaphore.acquire()).add_done_callback(on_acquired)
+
+    return result
@@ -0,0 +1,129 @@
+import multiprocessing
+import pickle
+import traceback
+
+from collections import namedtuple
+
+from .parser import GuerillaParser
+
+
+class ParseResult(namedtuple('ParseResult', ('path', 'value', 'error'))):
+    """Result of a file parsed by :func:`parse_many()`.
+
+    ``path`` is the parsed file path, ``value`` is the
+    :class:`GuerillaParser` (or what the callback returned) and ``error`` is
+    the formatted traceback of the exception raised while parsing, `None` if
+    parsing succeed.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """Return if file has been parsed without error.
+
+        :rtype: bool
+        """
+        return self.error is None
+
+
+def _parse_one(args):
+    """Parse given file and run callback on it.
+
+    Run in worker processes, so must be module level to be pickled.
+
+    :param args: Path, callback, parser keyword arguments and if result
+        value has to be pickled, so a value that can't be sent back to main
+        process is reported as an error of its file.
+    :type args: (str, function, dict, bool)
+    :rtype: ParseResult
+    """
+    path, callback, kwargs, pickled = args
+
+    try:
+        value = GuerillaParser.from_file(path, **kwargs)
+
+        if callback is not None:
+            value = callback(value)
+
+        if pickled:
+            value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    except Exception:
+        return ParseResult(path, None, traceback.format_exc())
+
+    return ParseResult(path, value, None)
+
+
+def parse_many(paths, workers=None, callback=None, ordered=True,
+               chunksize=1, **kwargs):
+    """Parse given Guerilla file `paths` using a pool of processes.
+
+    Parsing errors are captured and returned in results so a bad file
+    doesn't stop the batch.
+
+    As returning parsers to main process means pickling whole node graphs,
+    prefer giving a `callback` returning a compact summary of the parsed
+    file. It's run in the worker process and has to be picklable (module
+    level function).
+
+    :Example:
+
+    >>> def count_nodes(p):
+    ...     return sum(1 for _ in p.nodes)
+    >>> for res in parse_many(paths, workers=8, callback=count_nodes):
+    ...     if res.ok:
+    ...         print(res.path, res.value)
+    ...     else:
+    ...         print(res.error)
+
+    :param paths: Paths of the Guerilla files to parse.
+    :type paths: collections.iterable[str]
+    :param workers: Number of worker processes, number of CPUs if `None`.
+        Files are parsed in current process if 1 or less.
+    :type workers: int
+    :param callback: Function called with the parser of each file, its
+        return value is returned in place of the parser.
+    :type callback: function
+    :param ordered: If `True` results are yielded in `paths` order, else in
+        parsing completion order.
+    :type ordered: bool
+    :param chunksize: Number of paths sent to a worker at once.
+    :type chunksize: int
+    :param kwargs: Arguments passed to :meth:`GuerillaParser.from_file()`.
+    :return: Generator of parse results.
+    :rtype: collections.iterator[ParseResult]
+    """
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    if workers <= 1:
+
+        for path in paths:
+            yield _parse_one((path, callback, kwargs, False))
+
+        return
+
+    tasks = ((path, callback, kwargs, True) for path in paths)
+
+    pool = multiprocessing.Pool(workers)
+
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+
+        for result in imap(_parse_one, tasks, chunksize):
+
+            if result.ok:
+                try:
+                    result = result._replace(value=pickle.loads(result.value))
+                except Exception:
+                    result = ParseResult(result.path, None,
+                                         traceback.format_exc())
+
+            yield result
+
+        pool.close()
+
+    finally:
+        # stop workers if generator is closed before the end
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,236 @@
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+
+
+class SnapshotCache(object):
+    """Directory of binary snapshots of parsed Guerilla files.
+
+    A snapshot holds the tokenized commands of a file (see
+    :func:`guerilla_parser.parser._tokenize_chunk()`) so loading it skips
+    the regex parsing step, only objects linking is done. Snapshots are
+    keyed by file path, and are valid as long as file size and modification
+    time don't change. As a file modified twice within modification time
+    resolution can keep its size and time, `hash_content` adds a hash of file
+    content to the key, at the cost of reading the file once more.
+
+    Snapshots are stored with :mod:`marshal`, which never runs code when
+    loading, but cache directory must still be private (created with user
+    only permissions): anyone able to write in it controls parsed graphs.
+    Don't use a shared directory like ``/tmp``.
+
+    Cache directory is kept under `max_size` bytes by removing least
+    recently used snapshots.
+
+    Only tokenizing is skipped: a parser keeping its content (default
+    ``keep_content=True``) still reads and decodes the whole file on a
+    snapshot hit. Pass ``keep_content=False`` to skip reading it too.
+
+    :Example:
+
+    >>> p = GuerillaParser.from_file('/path/to/project.gproject',
+    ...                              cache_dir='/path/to/private/cache')
+
+    :ivar cache_dir: Directory snapshots are stored in.
+    :vartype cache_dir: str
+    :ivar max_size: Maximum size, in bytes, of cache directory snapshots.
+    :vartype max_size: int
+    :ivar hash_content: Add file content hash to snapshot keys.
+    :vartype hash_content: bool
+    """
+    #: Default maximum size, in bytes, of cache directory snapshots.
+    DEFAULT_MAX_SIZE = 1 << 30
+
+    # snapshot file extension
+    _EXT = '.gpsnap'
+
+    # change this each time command records format change, marshal format
+    # and strings depend on python major version
+    _VERSION = 3, sys.version_info[0]
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE,
+                 hash_content=False):
+        """Init the cache.
+
+        :param cache_dir: Directory to store snapshots in, created if needed
+            with user only permissions.
+        :type cache_dir: str
+        :param max_size: Maximum size, in bytes, of cache directory
+            snapshots.
+        :type max_size: int
+        :param hash_content: Add file content hash to snapshot keys.
+        :type hash_content: bool
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hash_content = hash_content
+
+    @staticmethod
+    def key(path, hash_content=False):
+        """Return snapshot key of given file `path`.
+
+        Get it before reading file content, so a file modified while read is
+        parsed again next time.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :param hash_content: Add file content hash to the key.
+        :type hash_content: bool
+        :return: Absolute path, size and modification time of the file, and
+            SHA-1 of its content if `hash_content` is `True`.
+        :rtype: (str, int, float)|(str, int, float, str)
+        """
+        path = os.path.abspath(path)
+
+        stat = os.stat(path)
+
+        if not hash_content:
+            return path, stat.st_size, stat.st_mtime
+
+        content_hash = hashlib.sha1()
+
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                content_hash.update(block)
+
+        return path, stat.st_size, stat.st_mtime, content_hash.hexdigest()
+
+    def snapshot_path(self, path):
+        """Return snapshot file path of given Guerilla file `path`.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :rtype: str
+        """
+        path = os.path.abspath(path)
+
+        # Python 2 paths are often already bytes
+        if not isinstance(path, bytes):
+            path = path.encode('utf-8')
+
+        name = hashlib.sha1(path).hexdigest()
+
+        return os.path.join(self.cache_dir, name + self._EXT)
+
+    def load(self, path, key):
+        """Return command records of given file `path` snapshot.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :param key: Current file key (see :meth:`key()`).
+        :type key: tuple
+        :return: Command records, `None` if there is no valid snapshot.
+        :rtype: list[tuple]
+        """
+        snapshot_path = self.snapshot_path(path)
+
+        try:
+            with open(snapshot_path, 'rb') as f:
+                version, snapshot_key, records = marshal.load(f)
+        except Exception:  # no snapshot or corrupted one
+            return None
+
+        if version != self._VERSION or snapshot_key != key:
+            return None
+
+        # update modification time so eviction remove least recently used
+        # snapshots
+        try:
+            os.utime(snapshot_path, None)
+        except OSError:
+            pass
+
+        return records
+
+    def save(self, path, key, records):
+        """Store command records of given file `path` snapshot, then evict
+        least recently used snapshots.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :param key: File key, got before reading it (see :meth:`key()`).
+        :type key: tuple
+        :param records: Command records.
+        :type records: list[tuple]
+        """
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, 0o700)
+
+        snapshot_path = self.snapshot_path(path)
+
+        # write in a temporary file first so concurrent processes never read
+        # partial snapshots
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump((self._VERSION, key, records), f)
+
+            if os.path.exists(snapshot_path) and not hasattr(os, 'replace'):
+                os.remove(snapshot_path)
+
+            getattr(os, 'replace', os.rename)(tmp_path, snapshot_path)
+
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        self.evict()
+
+    def __snapshots(self):
+        """Return snapshots of cache directory.
+
+        :return: Modification time, size and path of each snapshot.
+        :rtype: list[(float, int, str)]
+        """
+        snapshots = []
+
+        for name in os.listdir(self.cache_dir):
+
+            if not name.endswith(self._EXT):
+                continue
+
+            snapshot_path = os.path.join(self.cache_dir, name)
+
+            try:
+                stat = os.stat(snapshot_path)
+            except OSError:  # removed meanwhile
+                continue
+
+            snapshots.append((stat.st_mtime, stat.st_size, snapshot_path))
+
+        return snapshots
+
+    def evict(self):
+        """Remove least recently used snapshots until cache directory
+        snapshots size is under :attr:`max_size`.
+        """
+        snapshots = sorted(self.__snapshots())
+
+        size = sum(snapshot[1] for snapshot in snapshots)
+
+        for _, snapshot_size, snapshot_path in snapshots:
+
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(snapshot_path)
+            except OSError:  # removed meanwhile
+                pass
+
+            size -= snapshot_size
+
+    def clear(self):
+        """Remove every snapshot of cache directory.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        for _, _, snapshot_path in self.__snapshots():
+            try:
+                os.remove(snapshot_path)
+            except OSError:
+                pass
@@ -0,0 +1,858 @@
+from array import array
+from bisect import bisect_left
+
+from .exception import ChildError, PathError
+from .parser import GuerillaParser
+
+from .util import node_name_to_path_name
+
+
+def _intern(table, index, value):
+    """Macro to get index of given `value` in given string `table`, adding it
+    if needed.
+
+    :param table: String table.
+    :type table: list[str|int]
+    :param index: Table index per value.
+    :type index: dict[str|int, int]
+    :param value: Value to get index from.
+    :type value: str|int
+    :rtype: int
+    """
+    try:
+        return index[value]
+    except KeyError:
+        index[value] = len(table)
+        table.append(value)
+        return index[value]
+
+
+class GuerillaColumnarStore(object):
+    """Compact, array backed, storage of parsed Guerilla nodes and plugs.
+
+    Nodes and plugs are stored in parallel arrays instead of Python objects,
+    strings (names, types) being stored once in a string table.
+    :class:`ColumnarNode` and :class:`ColumnarPlug` views, providing the
+    same interface than :class:`GuerillaNode` and :class:`GuerillaPlug`, are
+    created on demand.
+
+    Nodes are stored in depth-first order, root first, so the subtree of
+    node ``i`` is the ``[i, node_ends[i])`` range, and plugs are stored in
+    node order, so plugs of node ``i`` are the
+    ``[node_plug_starts[i], node_plug_starts[i + 1])`` range.
+
+    Columns are :class:`array.array` and can be wrapped without copy by
+    NumPy (``numpy.frombuffer()``).
+
+    :ivar strings: String table (node names and types, plug names and
+        types).
+    :vartype strings: list[str|int]
+    :ivar node_ids: Node id (``oid[<id>]``, -1 for implicit nodes).
+    :vartype node_ids: array.array
+    :ivar node_parents: Node parent index (-1 for root).
+    :vartype node_parents: array.array
+    :ivar node_ends: Node subtree end index (exclusive).
+    :vartype node_ends: array.array
+    :ivar node_names: Node name index in string table.
+    :vartype node_names: array.array
+    :ivar node_types: Node type index in string table.
+    :vartype node_types: array.array
+    :ivar node_plug_starts: First plug index of each node.
+    :vartype node_plug_starts: array.array
+    :ivar plug_ids: Plug id (-1 for plugs not created by ``create``).
+    :vartype plug_ids: array.array
+    :ivar plug_nodes: Plug node index.
+    :vartype plug_nodes: array.array
+    :ivar plug_names: Plug name index in string table.
+    :vartype plug_names: array.array
+    :ivar plug_types: Plug type index in string table.
+    :vartype plug_types: array.array
+    :ivar plug_flags: Plug flag (-1 for no flag).
+    :vartype plug_flags: array.array
+    :ivar plug_inputs: Plug input plug index (-1 for no input).
+    :vartype plug_inputs: array.array
+
+    Raw (not converted yet) plug values are stored in a single string and
+    converted on first access.
+    """
+    def __init__(self):
+        """Init an empty store, use :meth:`from_parser()` or
+        :meth:`from_file()` to fill it.
+        """
+        super(GuerillaColumnarStore, self).__init__()
+
+        self.doc_format_rev = None
+
+        self.strings = []
+
+        self.node_ids = array('l')
+        self.node_parents = array('l')
+        self.node_ends = array('l')
+        self.node_names = array('l')
+        self.node_types = array('l')
+        self.node_plug_starts = array('l')
+
+        self.plug_ids = array('l')
+        self.plug_nodes = array('l')
+        self.plug_names = array('l')
+        self.plug_types = array('l')
+        self.plug_flags = array('l')
+        self.plug_inputs = array('l')
+
+        # raw plug values, plug raw value is
+        # _raw_values[_raw_starts[i]:_raw_starts[i + 1]]
+        self._raw_values = ""
+        self._raw_starts = array('l', [0])
+
+        # value decoder index per plug, 0 for already converted values
+        self._plug_decoders = array('B')
+        self._decoders = [None]
+
+        # converted values per plug index (None if missing)
+        self._values = {}
+
+        # original value per plug index, if different from raw value
+        self._org_values = {}
+
+        # 1 if original value is raw value
+        self._org_is_raw = array('b')
+
+        # string index per string
+        self._string_index = {}
+
+        # sorted oids and their node (>= 0) or plug (< 0, ~index) index
+        self._oid_keys = array('l')
+        self._oid_values = array('l')
+
+        # plug outputs, built on first access
+        self._output_starts = None
+        self._outputs = None
+
+    @classmethod
+    def from_parser(cls, parser):
+        """Construct store from given `parser` nodes and plugs.
+
+        :param parser: Parser to get nodes and plugs from.
+        :type parser: GuerillaParser
+        :rtype: GuerillaColumnarStore
+        """
+        store = cls()
+
+        try:
+            store.doc_format_rev = parser.doc_format_rev
+        except AttributeError:
+            pass
+
+        strings = store.strings
+        string_index = store._string_index
+        decoder_index = {None: 0}
+
+        # temporary object to index maps
+        node_indices = {}
+        plug_indices = {}
+        plug_inputs = []
+        raw_values = []
+        raw_size = 0
+
+        # depth-first order, root first
+        stack = [parser.root]
+
+        while stack:
+
+            node = stack.pop()
+
+            index = len(store.node_ids)
+
+            node_indices[node] = index
+
+            store.node_ids.append(node.id)
+            store.node_parents.append(-1 if node.parent is None
+                                      else node_indices[node.parent])
+            store.node_ends.append(-1)  # set once subtree is stored
+            store.node_names.append(_intern(strings, string_index,
+                                            node.name))
+            store.node_types.append(_intern(strings, string_index,
+                                            node.type))
+            store.node_plug_starts.append(len(store.plug_nodes))
+
+            for plug in node.plugs:
+
+                plug_indices[plug] = len(store.plug_nodes)
+
+                value, decoder = plug._get_raw_value()
+
+                store.plug_ids.append(-1)
+                store.plug_nodes.append(index)
+                store.plug_names.append(_intern(strings, string_index,
+                                                plug.name))
+                store.plug_types.append(_intern(strings, string_index,
+                                                plug.type))
+                store.plug_flags.append(-1 if plug.flag is None
+                                        else plug.flag)
+
+                plug_index = plug_indices[plug]
+
+                if decoder is None:
+                    if value is not None:
+                        store._values[plug_index] = value
+                else:
+                    raw_values.append(value)
+                    raw_size += len(value)
+
+                store._raw_starts.append(raw_size)
+                store._plug_decoders.append(
+                    _intern(store._decoders, decoder_index, decoder))
+
+                org_is_raw = decoder is not None and plug.org_value == value
+
+                store._org_is_raw.append(org_is_raw)
+
+                if not org_is_raw and plug.org_value is not None:
+                    store._org_values[plug_index] = plug.org_value
+
+                plug_inputs.append(plug.input)
+
+            stack.extend(reversed(node.children))
+
+        store.node_plug_starts.append(len(store.plug_nodes))
+
+        store._raw_values = ''.join(raw_values)
+
+        # subtree ends
+        node_count = len(store.node_ids)
+
+        for index in range(node_count - 1, -1, -1):
+
+            end = store.node_ends[index]
+
+            if end == -1:
+                end = index + 1
+                store.node_ends[index] = end
+
+            parent = store.node_parents[index]
+
+            if parent != -1 and store.node_ends[parent] < end:
+                store.node_ends[parent] = end
+
+        for plug in plug_inputs:
+            store.plug_inputs.append(-1 if plug is None
+                                     else plug_indices[plug])
+
+        # oids
+        oids = []
+
+        for oid, obj in parser.objs.items():
+
+            if obj in node_indices:
+                oids.append((oid, node_indices[obj]))
+            else:
+                plug_index = plug_indices[obj]
+                store.plug_ids[plug_index] = oid
+                oids.append((oid, ~plug_index))
+
+        oids.sort()
+
+        store._oid_keys.extend(oid for oid, _ in oids)
+        store._oid_values.extend(value for _, value in oids)
+
+        return store
+
+    @classmethod
+    def from_file(cls, path, *args, **kwords):
+        """Construct store from given Guerilla file `path`.
+
+        File is parsed without keeping its content, see
+        :meth:`GuerillaParser.from_file()` for arguments.
+
+        :param path: Path of the Guerilla file to parse.
+        :type path: str
+        :rtype: GuerillaColumnarStore
+        """
+        kwords.setdefault('keep_content', False)
+
+        return cls.from_parser(GuerillaParser.from_file(path, *args, **kwords))
+
+    @property
+    def root(self):
+        """Root node (top node of the parsed file).
+
+        :rtype: ColumnarNode
+        """
+        return ColumnarNode(self, 0)
+
+    @property
+    def nodes(self):
+        """Iterate over nodes (except root node) in depth-first order.
+
+        :rtype: collections.iterator[ColumnarNode]
+        """
+        for index in range(1, len(self.node_ids)):
+            yield ColumnarNode(self, index)
+
+    @property
+    def plugs(self):
+        """Iterate over plugs of every nodes (except root node).
+
+        :rtype: collections.iterator[ColumnarPlug]
+        """
+        for index in range(self.node_plug_starts[1],
+                           len(self.plug_nodes)):
+            yield ColumnarPlug(self, index)
+
+    def get_obj(self, oid):
+        """Return node or plug with given id (``oid[<id>]``).
+
+        :param oid: Object id.
+        :type oid: int
+        :rtype: ColumnarNode|ColumnarPlug
+        :raises KeyError: If no object has given id.
+        """
+        keys = self._oid_keys
+
+        i = bisect_left(keys, oid)
+
+        if i == len(keys) or keys[i] != oid:
+            raise KeyError(oid)
+
+        value = self._oid_values[i]
+
+        if value < 0:
+            return ColumnarPlug(self, ~value)
+
+        return ColumnarNode(self, value)
+
+    def string_id(self, value):
+        """Return index of given string in :attr:`strings` table.
+
+        :param value: String (node/plug name or type).
+        :type value: str|int
+        :return: String index, -1 if string is not present.
+        :rtype: int
+        """
+        return self._string_index.get(value, -1)
+
+    def node_indices(self, type_=None, under=None):
+        """Return indices of nodes matching given type, under given node.
+
+        :param type_: Node type.
+        :type type_: str
+        :param under: Node (path or view) to search nodes under, root if
+            `None`. Given node is not part of the result.
+        :type under: str|ColumnarNode
+        :rtype: list[int]
+        """
+        start, end = self.__subtree_range(under)
+
+        if type_ is None:
+            return list(range(start, end))
+
+        type_id = self.string_id(type_)
+
+        if type_id == -1:
+            return []
+
+        node_types = self.node_types
+
+        return [i for i in range(start, end) if node_types[i] == type_id]
+
+    def plug_indices(self, name=None, under=None):
+        """Return indices of plugs with given name, on nodes under given node.
+
+        :param name: Plug name.
+        :type name: str
+        :param under: Node (path or view) to search plugs under, root if
+            `None`. Plugs of given node are not part of the result.
+        :type under: str|ColumnarNode
+        :rtype: list[int]
+        """
+        start, end = self.__subtree_range(under)
+
+        start = self.node_plug_starts[start]
+        end = self.node_plug_starts[end]
+
+        if name is None:
+            return list(range(start, end))
+
+        name_id = self.string_id(name)
+
+        if name_id == -1:
+            return []
+
+        plug_names = self.plug_names
+
+        return [i for i in range(start, end) if plug_names[i] == name_id]
+
+    def find_nodes(self, type_=None, under=None):
+        """Return nodes matching given type, under given node.
+
+        See :meth:`node_indices()`.
+
+        :rtype: list[ColumnarNode]
+        """
+        return [ColumnarNode(self, i)
+                for i in self.node_indices(type_, under)]
+
+    def find_plugs(self, name=None, under=None):
+        """Return plugs with given name, on nodes under given node.
+
+        See :meth:`plug_indices()`.
+
+        :rtype: list[ColumnarPlug]
+        """
+        return [ColumnarPlug(self, i)
+                for i in self.plug_indices(name, under)]
+
+    def __subtree_range(self, under):
+        """Macro to get node index range of given node descendants.
+
+        :param under: Node (path or view), root if `None`.
+        :type under: str|ColumnarNode
+        :rtype: (int, int)
+        """
+        if under is None:
+            index = 0
+        elif isinstance(under, ColumnarNode):
+            index = under._index
+        else:
+            index = self.path_to_node(under)._index
+
+        return index + 1, self.node_ends[index]
+
+    def path_to_node(self, path):
+        """Find and return node at given `path`.
+
+        See :meth:`GuerillaParser.path_to_node()`.
+
+        :param path: Path to get node from.
+        :type path: str
+        :rtype: ColumnarNode
+        :raises PathError: If path contain unreachable nodes.
+        """
+        if path.startswith('|'):
+            cur_node = self.root
+
+        elif path.startswith('$'):
+            try:
+                cur_node = self.get_obj(int(path[1:path.find('|')]))
+            except KeyError:
+                raise PathError("Can't find root '{path}'".format(**locals()))
+
+        else:
+            raise PathError("Can't find root '{path}'".format(**locals()))
+
+        for path_node_name in GuerillaParser._split_path(path)[1:]:
+
+            for node in cur_node.children:
+                if node._name_for_path == path_node_name:
+                    cur_node = node
+                    break
+
+            else:
+                raise PathError("Can't find node '{path}'".format(**locals()))
+
+        return cur_node
+
+    def path_to_plug(self, path):
+        """Find and return plug at given `path`.
+
+        See :meth:`GuerillaParser.path_to_plug()`.
+
+        :param path: Path to get plug from.
+        :type path: str
+        :rtype: ColumnarPlug
+        :raises PathError: If path doen't point to a plugs.
+        """
+        try:
+            node_path, plug_name = path.rsplit('.', 1)
+        except ValueError:
+            raise PathError("No plug in path '{path}'".format(**locals()))
+
+        if node_path:
+            node = self.path_to_node(node_path)
+        else:
+            node = self.root
+
+        try:
+            return node.get_plug(plug_name)
+        except KeyError:
+            raise PathError("Can't find plug '{}' in node '{}'".format(
+                plug_name, node.path))
+
+    def _plug_value(self, index):
+        """Return value of plug at given `index`, converting it on first
+        access.
+
+        :param index: Plug index.
+        :type index: int
+        """
+        decoder = self._plug_decoders[index]
+
+        if decoder:
+            self._values[index] = \
+                self._decoders[decoder](self._plug_raw_value(index))
+            self._plug_decoders[index] = 0
+
+        return self._values.get(index)
+
+    def _plug_raw_value(self, index):
+        """Return raw value of plug at given `index`.
+
+        :param index: Plug index.
+        :type index: int
+        :rtype: str
+        """
+        return self._raw_values[self._raw_starts[index]:
+                                self._raw_starts[index + 1]]
+
+    def _plug_org_value(self, index):
+        """Return original parser value of plug at given `index`.
+
+        :param index: Plug index.
+        :type index: int
+        :rtype: str
+        """
+        if self._org_is_raw[index]:
+            return self._plug_raw_value(index)
+
+        return self._org_values.get(index)
+
+    def _plug_outputs(self, index):
+        """Return output plug indices of plug at given `index`.
+
+        :param index: Plug index.
+        :type index: int
+        :rtype: array.array
+        """
+        if self._outputs is None:
+
+            # counting sort of plugs per input
+            counts = array('l', [0]) * (len(self.plug_inputs) + 1)
+
+            for input_ in self.plug_inputs:
+                if input_ != -1:
+                    counts[input_ + 1] += 1
+
+            for i in range(1, len(counts)):
+                counts[i] += counts[i - 1]
+
+            outputs = array('l', [0]) * counts[-1]
+            fill = array('l', counts)
+
+            for i, input_ in enumerate(self.plug_inputs):
+                if input_ != -1:
+                    outputs[fill[input_]] = i
+                    fill[input_] += 1
+
+            self._output_starts = counts
+            self._outputs = outputs
+
+        return self._outputs[self._output_starts[index]:
+                             self._output_starts[index + 1]]
+
+
+class ColumnarNode(object):
+    """Node view on a :class:`GuerillaColumnarStore`.
+
+    Provide the same interface than :class:`GuerillaNode`.
+    """
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        """Init node view.
+
+        :param store: Store node is in.
+        :type store: GuerillaColumnarStore
+        :param index: Node index in store.
+        :type index: int
+        """
+        self._store = store
+        self._index = index
+
+    def __eq__(self, other):
+        return (isinstance(other, ColumnarNode) and
+                self._store is other._store and
+                self._index == other._index)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self._store), self._index))
+
+    def __repr__(self):
+        name = "'{}'".format(self.name) if isinstance(self.name, str)\
+            else self.name
+
+        return "{}({}, {}, '{}')".format(type(self).__name__, self.id, name,
+                                         self.type)
+
+    @property
+    def id(self):
+        """Node id (value in parsed expression ``oid[<id>]=``).
+
+        :rtype: int
+        """
+        return self._store.node_ids[self._index]
+
+    @property
+    def name(self):
+        """Node name.
+
+        :rtype: str|int
+        """
+        return self._store.strings[self._store.node_names[self._index]]
+
+    @property
+    def type(self):
+        """Node type.
+
+        :rtype: str
+        """
+        return self._store.strings[self._store.node_types[self._index]]
+
+    @property
+    def parent(self):
+        """Node parent.
+
+        :rtype: ColumnarNode
+        """
+        parent = self._store.node_parents[self._index]
+
+        if parent == -1:
+            return None
+
+        return ColumnarNode(self._store, parent)
+
+    @property
+    def children(self):
+        """Node children.
+
+        :rtype: list[ColumnarNode]
+        """
+        store = self._store
+        node_ends = store.node_ends
+
+        children = []
+
+        index = self._index + 1
+        end = node_ends[self._index]
+
+        while index < end:
+            children.append(ColumnarNode(store, index))
+            index = node_ends[index]
+
+        return children
+
+    @property
+    def _name_for_path(self):
+        return node_name_to_path_name(self.name)
+
+    @property
+    def path(self):
+        """Full node path.
+
+        :rtype: str
+        :raise PathError: When node is root.
+        """
+        if self._index == 0:
+            raise PathError("No path for root node")
+
+        path = []
+        node = self
+
+        while node is not None:
+            path.append(node._name_for_path)
+            node = node.parent
+
+        path[-1] = ""
+
+        return '|'.join(reversed(path))
+
+    @property
+    def display_name(self):
+        """Node name shown in UI.
+
+        See :attr:`GuerillaNode.display_name`.
+
+        :rtype: str
+        """
+        try:
+            return self.get_plug('PlugName').value
+        except KeyError:
+            return self.name
+
+    @property
+    def plugs(self):
+        """Iterator over node plugs.
+
+        :rtype: collection.iterator[ColumnarPlug]
+        """
+        plug_starts = self._store.node_plug_starts
+
+        for index in range(plug_starts[self._index],
+                           plug_starts[self._index + 1]):
+            yield ColumnarPlug(self._store, index)
+
+    @property
+    def plug_dict(self):
+        """Node plug by name.
+
+        :rtype: dict[str, ColumnarPlug]
+        """
+        return {plug.name: plug for plug in self.plugs}
+
+    def get_child(self, name):
+        """Return child node with given `name`.
+
+        :param name: Name of the child node to return.
+        :rtype: ColumnarNode
+        :raise ChildError: When no child node with given `name` is found.
+        """
+        name_id = self._store.string_id(name)
+
+        if name_id != -1:
+            for child in self.children:
+                if self._store.node_names[child._index] == name_id:
+                    return child
+
+        raise ChildError("Can't find child node '{name}'".format(**locals()))
+
+    def get_plug(self, name):
+        """Return plug with given `name`.
+
+        :param name: Name of the plug to return.
+        :rtype: ColumnarPlug
+        :raise KeyError: When no plug with given name is found
+        """
+        store = self._store
+
+        name_id = store.string_id(name)
+
+        if name_id != -1:
+
+            plug_names = store.plug_names
+
+            for index in range(store.node_plug_starts[self._index],
+                               store.node_plug_starts[self._index + 1]):
+                if plug_names[index] == name_id:
+                    return ColumnarPlug(store, index)
+
+        raise KeyError(name)
+
+
+class ColumnarPlug(object):
+    """Plug view on a :class:`GuerillaColumnarStore`.
+
+    Provide the same interface than :class:`GuerillaPlug`.
+    """
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store, index):
+        """Init plug view.
+
+        :param store: Store plug is in.
+        :type store: GuerillaColumnarStore
+        :param index: Plug index in store.
+        :type index: int
+        """
+        self._store = store
+        self._index = index
+
+    def __eq__(self, other):
+        return (isinstance(other, ColumnarPlug) and
+                self._store is other._store and
+                self._index == other._index)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self._store), self._index))
+
+    def __repr__(self):
+        return "{}('{}', '{}', '{}')".format(
+            type(self).__name__, self.name, self.type, self.parent.path)
+
+    @property
+    def name(self):
+        """Plug name.
+
+        :rtype: str
+        """
+        return self._store.strings[self._store.plug_names[self._index]]
+
+    @property
+    def type(self):
+        """Plug type (often 'Plug').
+
+        :rtype: str
+        """
+        return self._store.strings[self._store.plug_types[self._index]]
+
+    @property
+    def parent(self):
+        """Parent plug's node.
+
+        :rtype: ColumnarNode
+        """
+        return ColumnarNode(self._store, self._store.plug_nodes[self._index])
+
+    @property
+    def flag(self):
+        """Plug flag.
+
+        :rtype: int
+        """
+        flag = self._store.plug_flags[self._index]
+
+        return None if flag == -1 else flag
+
+    @property
+    def value(self):
+        """Plug value.
+
+        :rtype: bool|float|str
+        """
+        return self._store._plug_value(self._index)
+
+    @property
+    def org_value(self):
+        """Original parser plug value.
+
+        :rtype: str
+        """
+        return self._store._plug_org_value(self._index)
+
+    @property
+    def input(self):
+        """Plug input.
+
+        :rtype: ColumnarPlug
+        """
+        input_ = self._store.plug_inputs[self._index]
+
+        if input_ == -1:
+            return None
+
+        return ColumnarPlug(self._store, input_)
+
+    @property
+    def outputs(self):
+        """Plug outputs.
+
+        :rtype: list[ColumnarPlug]
+        """
+        return [ColumnarPlug(self._store, index)
+                for index in self._store._plug_outputs(self._index)]
+
+    @property
+    def path(self):
+        """Full plug path.
+
+        :rtype: str
+        """
+        if self._store.plug_nodes[self._index] == 0:
+            parent_path = ""
+        else:
+            parent_path = self.parent.path
+        return '{}.{}'.format(parent_path, self.name)
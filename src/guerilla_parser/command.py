@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+from .parser import GuerillaParser
+
+from .util import iter_line_chunks
+from .util import open_
+
+
+#: Raw Guerilla file command.
+#:
+#: ``cmd`` is the command name (``'create'``, ``'set'``, etc.), ``oid`` is
+#: the created object id (``oid[<id>]=``) as `int` or `None` if command don't
+#: create object, ``args`` is the raw, unparsed, command arguments string.
+Command = namedtuple('Command', ('cmd', 'oid', 'args'))
+
+
+def iter_commands(path, commands=None):
+    """Iterate over raw commands of given Guerilla file `path`.
+
+    This is a low level, event driven, alternative to
+    :class:`GuerillaParser`: no node nor plug is created, file is read
+    chunk by chunk and iteration can be stopped at any time.
+
+    :Example:
+
+    >>> for cmd in iter_commands('/path/to/project.gproject',
+    ...                          {'create', 'createnotref'}):
+    ...     if cmd.args.startswith('"ArchReference"'):
+    ...         print(cmd.args)
+
+    :param path: Path of the Guerilla file to read commands from.
+    :type path: str
+    :param commands: Command names to yield, every command if `None`.
+    :type commands: set[str]
+    :return: Generator of raw commands.
+    :rtype: collections.iterator[Command]
+    """
+    with open_(path) as f:
+        for command in iter_stream_commands(f, commands):
+            yield command
+
+
+def iter_stream_commands(stream, commands=None):
+    """Iterate over raw commands read from given file object `stream`.
+
+    See :func:`iter_commands()`.
+
+    :param stream: File object to read Guerilla file content from.
+    :type stream: io.TextIOBase
+    :param commands: Command names to yield, every command if `None`.
+    :type commands: set[str]
+    :return: Generator of raw commands.
+    :rtype: collections.iterator[Command]
+    """
+    line_finditer = GuerillaParser._LINE_PARSE.finditer
+
+    for chunk in iter_line_chunks(stream):
+
+        for match in line_finditer(chunk):
+
+            cmd, oid, args = match.group('cmd', 'oid', 'args')
+
+            if commands is not None and cmd not in commands:
+                continue
+
+            yield Command(cmd, oid if oid is None else int(oid), args)
@@ -4,3 +4,7 @@ class ChildError(Exception):
 
 class PathError(Exception):
     pass
+
+
+class CycleError(Exception):
+    pass
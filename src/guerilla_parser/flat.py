@@ -0,0 +1,334 @@
+import copy
+import weakref
+
+from .node import GuerillaNode, _graph_edits
+from .plug import GuerillaPlug
+
+
+def flatten(roots, copy_values=False):
+    """Return node graphs of given `roots` as flat tables.
+
+    Nodes are stored in depth-first order, root first, so a node parent is
+    always stored before it. Tables only contain indices, no object, so
+    they can be pickled without recursion.
+
+    Node rows are ``(id, name, type, parent index, source offset)``, plug
+    rows are ``(node index, name, type, raw value, value decoder, flag,
+    org value, param, source offset, input source offset)`` and connection
+    rows are ``(output plug index, input plug index)``.
+
+    :param roots: Root nodes of the graphs to flatten.
+    :type roots: collections.iterable[GuerillaNode]
+    :param copy_values: Deep copy already converted plug values, so the
+        graph rebuilt from tables doesn't share mutable values.
+    :type copy_values: bool
+    :return: Node, plug and connection tables, then node and plug index
+        per object.
+    :rtype: ((list[tuple], list[tuple], list[(int, int)]),
+        dict[GuerillaNode, int], dict[GuerillaPlug, int])
+    """
+    nodes = []
+    plugs = []
+    connections = []
+
+    node_indices = {}
+    plug_indices = {}
+
+    # depth-first order, root first
+    stack = list(reversed(list(roots)))
+
+    while stack:
+
+        node = stack.pop()
+
+        index = len(nodes)
+
+        node_indices[node] = index
+
+        nodes.append((node.id, node.name, node.type,
+                      -1 if node.parent is None
+                      else node_indices[node.parent],
+                      node._source_offset))
+
+        # containers are accessed directly, this is way faster than
+        # iterating over properties on huge graphs
+        if node._plug_dict is not None:
+
+            for plug in node._plug_dict.values():
+
+                plug_indices[plug] = len(plugs)
+
+                value, decoder = plug._get_raw_value()
+
+                param = plug._param
+
+                if copy_values:
+
+                    if decoder is None:
+                        value = copy.deepcopy(value)
+
+                    if not isinstance(param, str):
+                        param = copy.deepcopy(param)
+
+                plugs.append((index, plug.name, plug.type, value, decoder,
+                              plug.flag, plug.org_value, param,
+                              plug._source_offset,
+                              plug._input_source_offset))
+
+        if node._children is not None:
+            stack.extend(reversed(node._children))
+
+    for plug, index in plug_indices.items():
+
+        if plug._outputs is None:
+            continue
+
+        for output in plug._outputs:
+            try:
+                connections.append((index, plug_indices[output]))
+            except KeyError:  # output is outside flattened graphs
+                pass
+
+    # keep outputs order
+    connections.sort(key=lambda c: c[0])
+
+    return (nodes, plugs, connections), node_indices, plug_indices
+
+
+def unflatten(tables):
+    """Rebuild node graphs from given flat tables.
+
+    :param tables: Node, plug and connection tables (see :func:`flatten()`).
+    :type tables: (list[tuple], list[tuple], list[(int, int)])
+    :return: Nodes and plugs, in table order.
+    :rtype: (list[GuerillaNode], list[GuerillaPlug])
+    """
+    node_rows, plug_rows, connections = tables
+
+    nodes = []
+    plugs = []
+
+    for id_, name, type_, parent_index, source_offset in node_rows:
+
+        node = GuerillaNode(id_, name, type_,
+                            None if parent_index == -1
+                            else nodes[parent_index])
+
+        node._source_offset = source_offset
+
+        nodes.append(node)
+
+    for (node_index, name, type_, value, decoder, flag, org_value, param,
+         source_offset, input_source_offset) in plug_rows:
+
+        plug = GuerillaPlug(name, type_, nodes[node_index], value, flag,
+                            org_value=org_value, value_decoder=decoder,
+                            param=param)
+
+        plug._source_offset = source_offset
+        plug._input_source_offset = input_source_offset
+
+        plugs.append(plug)
+
+    for output_index, input_index in connections:
+
+        out_plug = plugs[output_index]
+        in_plug = plugs[input_index]
+
+        out_plug._add_output(in_plug)
+        in_plug.input = out_plug
+
+    return nodes, plugs
+
+
+class FlatGraph(object):
+    """Node graphs stored as flat tables (see :func:`flatten()`), pickled
+    once however many of their nodes and plugs are pickled along.
+
+    Unpickled graph is rebuilt once, on first :meth:`objects()` call, so
+    nodes and plugs pickled together stay in the same graph.
+
+    :ivar edits: Graph edit count when tables were built, a flat graph being
+        outdated once nodes or plugs are edited (renamed, value set, etc.).
+        Edits done by assigning object attributes or modifying their
+        containers directly are not counted.
+    :vartype edits: int
+    """
+    def __init__(self, roots, copy_values=False):
+        """Init flat graph of given `roots`.
+
+        :param roots: Root nodes of the graphs to flatten.
+        :type roots: list[GuerillaNode]
+        :param copy_values: See :func:`flatten()`.
+        :type copy_values: bool
+        """
+        self.roots = roots
+        self.edits = _graph_edits[0]
+
+        self.tables, self.node_indices, self.plug_indices = \
+            flatten(roots, copy_values)
+
+        self.__objects = None
+
+    def __getstate__(self):
+        return self.tables
+
+    def __setstate__(self, tables):
+        self.roots = None
+        self.edits = None
+        self.tables = tables
+        self.node_indices = None
+        self.plug_indices = None
+        self.__objects = None
+
+    def objects(self):
+        """Return nodes and plugs rebuilt from tables, see
+        :func:`unflatten()`.
+
+        :rtype: (list[GuerillaNode], list[GuerillaPlug])
+        """
+        if self.__objects is None:
+            self.__objects = unflatten(self.tables)
+
+        return self.__objects
+
+
+# flat graphs being pickled, per root node id. A flat graph is referenced by
+# pickler memo until pickling ends, so nodes, plugs and parsers pickled
+# together share it, and it's released once pickling is done. It's only
+# reused while graphs are not edited, in case something else keeps it alive
+_flat_graphs = weakref.WeakValueDictionary()
+
+
+def _cached_flat_graph(root):
+    """Return up to date flat graph of given `root` being pickled.
+
+    :type root: GuerillaNode
+    :rtype: FlatGraph|None
+    """
+    graph = _flat_graphs.get(id(root))
+
+    if graph is None or graph.edits != _graph_edits[0]:
+        return None
+
+    return graph
+
+
+def flat_graph(roots):
+    """Return flat graph of given `roots` to pickle, shared with objects of
+    the same graphs being pickled.
+
+    :param roots: Root nodes of the graphs.
+    :type roots: list[GuerillaNode]
+    :rtype: FlatGraph
+    """
+    graph = _cached_flat_graph(roots[0]) if roots else None
+
+    if graph is None or len(graph.roots) != len(roots) or \
+            any(a is not b for a, b in zip(graph.roots, roots)):
+
+        graph = FlatGraph(roots)
+
+        for root in roots:
+            _flat_graphs[id(root)] = graph
+
+    return graph
+
+
+def _top_node(node):
+    """Return top parent of given `node`.
+
+    :type node: GuerillaNode
+    :rtype: GuerillaNode
+    """
+    while node.parent is not None:
+        node = node.parent
+
+    return node
+
+
+def _node_flat_graph(node):
+    """Return flat graph containing given `node` to pickle, the one of its
+    parser if parser is pickled too.
+
+    :type node: GuerillaNode
+    :rtype: FlatGraph
+    """
+    top = _top_node(node)
+
+    graph = _cached_flat_graph(top)
+
+    if graph is None or not any(root is top for root in graph.roots):
+        graph = flat_graph([top])
+
+    return graph
+
+
+def reduce_node(node):
+    """Return pickle reduce value of given `node`: its flat graph, stored
+    once per pickle, and its index.
+
+    :type node: GuerillaNode
+    :rtype: (function, tuple)
+    """
+    graph = _node_flat_graph(node)
+
+    return _restore_node, (graph, graph.node_indices[node])
+
+
+def reduce_plug(plug):
+    """Return pickle reduce value of given `plug`: its flat graph, stored
+    once per pickle, and its index.
+
+    :type plug: GuerillaPlug
+    :rtype: (function, tuple)
+    """
+    graph = _node_flat_graph(plug.parent)
+
+    return _restore_plug, (graph, graph.plug_indices[plug])
+
+
+def _restore_node(graph, index):
+    """Return node at `index` of given flat `graph`.
+
+    :type graph: FlatGraph
+    :type index: int
+    :rtype: GuerillaNode
+    """
+    return graph.objects()[0][index]
+
+
+def _restore_plug(graph, index):
+    """Return plug at `index` of given flat `graph`.
+
+    :type graph: FlatGraph
+    :type index: int
+    :rtype: GuerillaPlug
+    """
+    return graph.objects()[1][index]
+
+
+def shallow_copy(obj):
+    """Return a shallow copy of given node or plug, sharing its parent,
+    containers and values like a regular object copy.
+
+    :type obj: GuerillaNode|GuerillaPlug
+    :rtype: GuerillaNode|GuerillaPlug
+    """
+    cls = type(obj)
+
+    obj_copy = cls.__new__(cls)
+
+    for klass in cls.__mro__:
+
+        for name in getattr(klass, '__slots__', ()):
+
+            if name.startswith('__'):  # mangled private slot
+                name = '_' + klass.__name__.lstrip('_') + name
+
+            try:
+                setattr(obj_copy, name, getattr(obj, name))
+            except AttributeError:  # unset slot
+                pass
+
+    return obj_copy
@@ -0,0 +1,477 @@
+from array import array
+
+from .exception import CycleError
+from .node import GuerillaNode
+
+
+def _compressed_adjacency(count, sources, targets):
+    """Return compressed adjacency arrays of given edges, targets of vertex
+    ``i`` being ``adjacency[starts[i]:starts[i + 1]]``, in edge order.
+
+    :param count: Vertex count.
+    :type count: int
+    :param sources: Source vertex index per edge.
+    :type sources: array.array
+    :param targets: Target vertex index per edge.
+    :type targets: array.array
+    :return: Start index per vertex (plus end), and targets.
+    :rtype: (array.array, array.array)
+    """
+    starts = array('l', [0]) * (count + 1)
+
+    for source in sources:
+        starts[source + 1] += 1
+
+    for i in range(count):
+        starts[i + 1] += starts[i]
+
+    adjacency = array('l', [0]) * len(sources)
+
+    # next free position per vertex
+    ends = starts[:-1]
+
+    for source, target in zip(sources, targets):
+        adjacency[ends[source]] = target
+        ends[source] += 1
+
+    return starts, adjacency
+
+
+class _Adjacency(object):
+    """Directed graph over given vertices (plugs or nodes), stored as
+    compressed adjacency arrays.
+
+    Strongly connected components (Tarjan's algorithm) are computed on first
+    query, and closures are memoized per component. Closures are walked on
+    their own, not merged from neighbor closures, so memory only grows with
+    queried closures.
+    """
+    def __init__(self, edges):
+        """Init graph from given edges, duplicated ones being ignored.
+
+        :param edges: Output and input vertex of each edge.
+        :type edges: collections.iterable[(object, object)]
+        """
+        self.vertices = []
+        self.indices = {}
+
+        sources = array('l')
+        targets = array('l')
+
+        seen = set()
+
+        for out, in_ in edges:
+
+            out_index = self.__index(out)
+            in_index = self.__index(in_)
+
+            if (out_index, in_index) in seen:
+                continue
+
+            seen.add((out_index, in_index))
+
+            sources.append(out_index)
+            targets.append(in_index)
+
+        count = len(self.vertices)
+
+        self.down_starts, self.down = _compressed_adjacency(count, sources,
+                                                            targets)
+        self.up_starts, self.up = _compressed_adjacency(count, targets,
+                                                        sources)
+
+        # component index per vertex, and per component: member vertices and
+        # if it's a cycle, components being sorted downstream first
+        self.__components = None  # :type: array.array
+        self.__members = None  # :type: list[tuple]
+        self.__cyclic = None  # :type: list[bool]
+
+        # upstream and downstream closure per component index
+        self.__closures = ({}, {})
+
+    def __index(self, vertex):
+        """Macro to get index of given `vertex`, adding it if needed.
+
+        :type vertex: object
+        :rtype: int
+        """
+        try:
+            return self.indices[vertex]
+        except KeyError:
+            self.indices[vertex] = len(self.vertices)
+            self.vertices.append(vertex)
+            return self.indices[vertex]
+
+    def neighbors(self, index, upstream):
+        """Return vertex indices directly connected to given vertex `index`.
+
+        :type index: int
+        :param upstream: Return inputs if `True`, outputs otherwise.
+        :type upstream: bool
+        :rtype: array.array
+        """
+        if upstream:
+            return self.up[self.up_starts[index]:self.up_starts[index + 1]]
+
+        return self.down[self.down_starts[index]:self.down_starts[index + 1]]
+
+    def __compute_components(self):
+        """Compute strongly connected components, iteratively so deep graphs
+        don't hit recursion limit.
+        """
+        count = len(self.vertices)
+
+        starts = self.down_starts
+        down = self.down
+
+        orders = array('l', [-1]) * count
+        lows = array('l', [0]) * count
+        on_stack = bytearray(count)
+
+        components = array('l', [-1]) * count
+        members = []
+        cyclic = []
+
+        stack = []
+        order = 0
+
+        for root in range(count):
+
+            if orders[root] != -1:
+                continue
+
+            orders[root] = lows[root] = order
+            order += 1
+
+            stack.append(root)
+            on_stack[root] = 1
+
+            # (vertex, next edge position) being visited
+            work = [(root, starts[root])]
+
+            while work:
+
+                index, pos = work[-1]
+
+                if pos < starts[index + 1]:
+
+                    work[-1] = (index, pos + 1)
+
+                    target = down[pos]
+
+                    if orders[target] == -1:
+                        orders[target] = lows[target] = order
+                        order += 1
+
+                        stack.append(target)
+                        on_stack[target] = 1
+
+                        work.append((target, starts[target]))
+
+                    elif on_stack[target] and orders[target] < lows[index]:
+                        lows[index] = orders[target]
+
+                    continue
+
+                work.pop()
+
+                if work:
+                    parent = work[-1][0]
+
+                    if lows[index] < lows[parent]:
+                        lows[parent] = lows[index]
+
+                if lows[index] != orders[index]:
+                    continue
+
+                # index is the root of a component
+                component = []
+
+                while True:
+
+                    member = stack.pop()
+                    on_stack[member] = 0
+
+                    components[member] = len(members)
+                    component.append(member)
+
+                    if member == index:
+                        break
+
+                component.reverse()
+
+                members.append(tuple(component))
+                cyclic.append(len(component) > 1 or
+                              index in self.neighbors(index, False))
+
+        self.__components = components
+        self.__members = members
+        self.__cyclic = cyclic
+
+    def components(self):
+        """Return component index per vertex, member vertex indices and
+        cycle flag per component, components being sorted downstream first.
+
+        :rtype: (array.array, list[tuple[int]], list[bool])
+        """
+        if self.__components is None:
+            self.__compute_components()
+
+        return self.__components, self.__members, self.__cyclic
+
+    def closure(self, index, upstream):
+        """Return vertices reachable from given vertex `index`.
+
+        :type index: int
+        :param upstream: Follow inputs if `True`, outputs otherwise.
+        :type upstream: bool
+        :rtype: frozenset
+        """
+        components, members, _ = self.components()
+
+        closures = self.__closures[upstream]
+
+        component = components[index]
+
+        try:
+            return closures[component]
+        except KeyError:
+            pass
+
+        if upstream:
+            starts, adjacency = self.up_starts, self.up
+        else:
+            starts, adjacency = self.down_starts, self.down
+
+        reached = bytearray(len(self.vertices))
+
+        # members of a component share their closure, cycle members reach
+        # themselves back
+        todo = []
+
+        for member in members[component]:
+            todo.extend(adjacency[starts[member]:starts[member + 1]])
+
+        closure = []
+
+        while todo:
+
+            index = todo.pop()
+
+            if reached[index]:
+                continue
+
+            reached[index] = 1
+            closure.append(self.vertices[index])
+
+            todo.extend(adjacency[starts[index]:starts[index + 1]])
+
+        closures[component] = frozenset(closure)
+
+        return closures[component]
+
+
+class GuerillaGraph(object):
+    """Connection and dependency graph of parsed plugs and nodes, see
+    :attr:`GuerillaParser.graph`.
+
+    Graph is built from plug connections, ``connect`` commands referencing
+    plugs by their id (expression nodes: ``connect("$105","$124")``) and
+    ``depend`` commands. A ``depend`` command is a node dependency if one of
+    its plugs doesn't exist.
+
+    Plug level and node level graphs are stored as compressed adjacency
+    arrays (:class:`array.array`) so queries don't walk Python objects.
+    Every plug edge is a node edge too, connections between plugs of the same
+    node excepted. Only plugs and nodes having a connection or a dependency
+    are part of the graph.
+
+    Upstream and downstream closures are memoized. Graph reflects the parsed
+    content and is not updated if nodes or plugs are modified.
+
+    Node graphs often have cycles (document plugs driving render pass plugs
+    and driven by others, etc.) while plug graphs don't, so sort plugs to get
+    an evaluation order.
+
+    :Example:
+
+    >>> p = GuerillaParser.from_file('/path/to/render.grendergraph')
+    >>> layer = p.path_to_node('|RenderGraph|Layer')
+    >>> for node in p.graph.upstream(layer):
+    ...     print(node.path)
+    >>> p.graph.topological_order()
+    [GuerillaNode(...), ...]
+    """
+    def __init__(self, edges):
+        """Init the graph.
+
+        :param edges: Output and input of each connection or dependency,
+            plugs or nodes (node dependency).
+        :type edges: collections.iterable[(GuerillaPlug|GuerillaNode,
+            GuerillaPlug|GuerillaNode)]
+        """
+        plug_edges = []
+        node_edges = []
+
+        for out, in_ in edges:
+
+            out_is_node = isinstance(out, GuerillaNode)
+            in_is_node = isinstance(in_, GuerillaNode)
+
+            if not (out_is_node or in_is_node):
+                plug_edges.append((out, in_))
+
+            out_node = out if out_is_node else out.parent
+            in_node = in_ if in_is_node else in_.parent
+
+            if out_node is not in_node:
+                node_edges.append((out_node, in_node))
+
+        self.__plug_graph = _Adjacency(plug_edges)
+        self.__node_graph = _Adjacency(node_edges)
+
+    def __level(self, obj):
+        """Return adjacency graph of given `obj` level.
+
+        :type obj: GuerillaNode|GuerillaPlug
+        :rtype: _Adjacency
+        """
+        if isinstance(obj, GuerillaNode):
+            return self.__node_graph
+
+        return self.__plug_graph
+
+    @property
+    def nodes(self):
+        """Nodes having a connection or a dependency.
+
+        :rtype: list[GuerillaNode]
+        """
+        return list(self.__node_graph.vertices)
+
+    @property
+    def plugs(self):
+        """Plugs having a connection or a dependency.
+
+        :rtype: list[GuerillaPlug]
+        """
+        return list(self.__plug_graph.vertices)
+
+    def __neighbors(self, obj, upstream):
+        """Return plugs (or nodes) directly connected to given `obj`.
+
+        :type obj: GuerillaPlug|GuerillaNode
+        :param upstream: Return inputs if `True`, outputs otherwise.
+        :type upstream: bool
+        :rtype: list[GuerillaPlug|GuerillaNode]
+        """
+        graph = self.__level(obj)
+
+        index = graph.indices.get(obj)
+
+        if index is None:
+            return []
+
+        vertices = graph.vertices
+
+        return [vertices[i] for i in graph.neighbors(index, upstream)]
+
+    def inputs(self, obj):
+        """Return plugs (or nodes) given `obj` is directly connected to or
+        depends on.
+
+        :param obj: Plug or node.
+        :type obj: GuerillaPlug|GuerillaNode
+        :rtype: list[GuerillaPlug|GuerillaNode]
+        """
+        return self.__neighbors(obj, True)
+
+    def outputs(self, obj):
+        """Return plugs (or nodes) directly connected to or depending on
+        given `obj`.
+
+        :param obj: Plug or node.
+        :type obj: GuerillaPlug|GuerillaNode
+        :rtype: list[GuerillaPlug|GuerillaNode]
+        """
+        return self.__neighbors(obj, False)
+
+    def __closure(self, obj, upstream):
+        """Return plugs (or nodes) reachable from given `obj`.
+
+        :type obj: GuerillaPlug|GuerillaNode
+        :param upstream: Follow inputs if `True`, outputs otherwise.
+        :type upstream: bool
+        :rtype: frozenset[GuerillaPlug|GuerillaNode]
+        """
+        graph = self.__level(obj)
+
+        index = graph.indices.get(obj)
+
+        if index is None:
+            return frozenset()
+
+        return graph.closure(index, upstream)
+
+    def upstream(self, obj):
+        """Return plugs (or nodes) given `obj` transitively depends on.
+
+        Given `obj` is part of the result only if it's part of a cycle.
+
+        :param obj: Plug or node.
+        :type obj: GuerillaPlug|GuerillaNode
+        :rtype: frozenset[GuerillaPlug|GuerillaNode]
+        """
+        return self.__closure(obj, True)
+
+    def downstream(self, obj):
+        """Return plugs (or nodes) transitively depending on given `obj`.
+
+        Given `obj` is part of the result only if it's part of a cycle.
+
+        :param obj: Plug or node.
+        :type obj: GuerillaPlug|GuerillaNode
+        :rtype: frozenset[GuerillaPlug|GuerillaNode]
+        """
+        return self.__closure(obj, False)
+
+    def cycles(self, plugs=False):
+        """Return cycles of the graph, as strongly connected components.
+
+        :param plugs: Return plug cycles instead of node ones.
+        :type plugs: bool
+        :return: Nodes (or plugs) of each cycle.
+        :rtype: list[list[GuerillaNode|GuerillaPlug]]
+        """
+        graph = self.__plug_graph if plugs else self.__node_graph
+
+        _, members, cyclic = graph.components()
+
+        vertices = graph.vertices
+
+        return [[vertices[i] for i in members[component]]
+                for component in range(len(members) - 1, -1, -1)
+                if cyclic[component]]
+
+    def topological_order(self, plugs=False):
+        """Return nodes (or plugs) of the graph, each one being before every
+        node (or plug) depending on it.
+
+        :param plugs: Sort plugs instead of nodes.
+        :type plugs: bool
+        :rtype: list[GuerillaNode|GuerillaPlug]
+        :raises CycleError: If graph has cycles (see :meth:`cycles()`).
+        """
+        graph = self.__plug_graph if plugs else self.__node_graph
+
+        _, members, cyclic = graph.components()
+
+        if any(cyclic):
+            raise CycleError("Can't sort graph, it has {} cycle(s)".format(
+                sum(cyclic)))
+
+        vertices = graph.vertices
+
+        # components are sorted downstream first
+        return [vertices[members[component][0]]
+                for component in range(len(members) - 1, -1, -1)]
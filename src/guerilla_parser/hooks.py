@@ -0,0 +1,150 @@
+from __future__ import print_function
+
+from .node import GuerillaNode
+
+
+class ParseHooks(object):
+    """Parsing hooks, called with already parsed objects each time a command
+    is linked.
+
+    Subclass it and override needed methods, then give an instance to the
+    parser ``hooks`` argument. Every method does nothing by default.
+    Objects are given as is, so nothing costly (like node paths) is computed
+    unless a hook asks for it. Offsets are command offsets in parsed content
+    (see :meth:`GuerillaParser.line_number()`).
+
+    Commands of skipped nodes and plugs (see parser node and plug filters)
+    don't call hooks.
+
+    :Example:
+
+    >>> class CountHooks(ParseHooks):
+    ...     def __init__(self):
+    ...         self.sets = 0
+    ...     def on_set(self, plug, offset):
+    ...         self.sets += 1
+    >>> hooks = CountHooks()
+    >>> p = GuerillaParser.from_file('/path/to/project.gproject',
+    ...                              hooks=hooks)
+    >>> hooks.sets
+    1234
+    """
+    def on_create(self, obj, offset):
+        """Called when a node or a plug is created by a ``create`` command.
+
+        :param obj: Created node or plug.
+        :type obj: GuerillaNode|GuerillaPlug
+        :param offset: Command offset.
+        :type offset: int
+        """
+        pass
+
+    def on_set(self, plug, offset):
+        """Called when a plug is created by a ``set`` command.
+
+        Plug value is converted on first access, avoid it if you don't need
+        it.
+
+        :param plug: Created plug.
+        :type plug: GuerillaPlug
+        :param offset: Command offset.
+        :type offset: int
+        """
+        pass
+
+    def on_connect(self, out_plug, in_plug, offset):
+        """Called when two plugs are connected by a ``connect`` command.
+
+        :param out_plug: Output plug.
+        :type out_plug: GuerillaPlug
+        :param in_plug: Input plug.
+        :type in_plug: GuerillaPlug
+        :param offset: Command offset.
+        :type offset: int
+        """
+        pass
+
+    def on_depend(self, out_node, out_plug_name, in_node, in_plug_name,
+                  offset):
+        """Called on a ``depend`` command.
+
+        Plug names are `None` when command reference the node only.
+
+        :param out_node: Output node.
+        :type out_node: GuerillaNode
+        :param out_plug_name: Output plug name.
+        :type out_plug_name: str
+        :param in_node: Input node.
+        :type in_node: GuerillaNode
+        :param in_plug_name: Input plug name.
+        :type in_plug_name: str
+        :param offset: Command offset.
+        :type offset: int
+        """
+        pass
+
+    def on_unknown(self, cmd, offset):
+        """Called on commands not handled by the parser (``disconnect``,
+        ``rename``, etc.).
+
+        :param cmd: Command name.
+        :type cmd: str
+        :param offset: Command offset.
+        :type offset: int
+        """
+        pass
+
+
+def _node_path(node):
+    """Return path of given node, root node path being empty.
+
+    :type node: GuerillaNode
+    :rtype: str
+    """
+    if node.id == 1:
+        return ""
+
+    return node.path
+
+
+class DiagnoseHooks(ParseHooks):
+    """Hooks printing each linked command, used by parser ``diagnose``
+    argument.
+    """
+    def on_create(self, obj, offset):
+
+        if isinstance(obj, GuerillaNode):
+            path = _node_path(obj)
+        else:
+            path = "{}.{}".format(_node_path(obj.parent), obj.name)
+
+        print(("Create '{path}' "
+               "'{obj.type}'").format(**locals()))
+
+    def on_set(self, plug, offset):
+
+        node_path = _node_path(plug.parent)
+
+        print(('Set: {node_path}.{plug.name} -> '
+               '{plug.value}').format(**locals()))
+
+    def on_connect(self, out_plug, in_plug, offset):
+
+        out_node_path = _node_path(out_plug.parent)
+        in_node_path = _node_path(in_plug.parent)
+
+        print(('Connect: {out_node_path}.{out_plug.name} -> '
+               '{in_node_path}.{in_plug.name}').format(**locals()))
+
+    def on_depend(self, out_node, out_plug_name, in_node, in_plug_name,
+                  offset):
+
+        out_node_path = _node_path(out_node)
+        in_node_path = _node_path(in_node)
+
+        print(('Depend: {out_node_path}.{out_plug_name} -> '
+               '{in_node_path}.{in_plug_name}').format(**locals()))
+
+    def on_unknown(self, cmd, offset):
+
+        print("Unknown command '{cmd}'".format(**locals()))
@@ -0,0 +1,225 @@
+import re
+
+
+# lua literal tokens
+_TOKEN_PARSE = re.compile(
+    r'\s*(?:'
+    r'(?P<string>"(?:\\.|[^"\\])*")|'
+    r'(?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|'
+    r'(?P<name>[A-Za-z_][\w.]*)|'
+    r'(?P<op>[{}=,;\[\]]))', re.DOTALL)
+
+# flat number table "{1,0.5,0.5}", by far the most common table
+_NUMBER_TABLE_PARSE = re.compile(r'^{[0-9.eE+-]+(,[0-9.eE+-]+)*}$')
+
+# string escape sequence: "\010", "\"", etc.
+_ESCAPE_PARSE = re.compile(r'\\(\d{1,3}|.)', re.DOTALL)
+
+_ESCAPES = {'n': '\n',
+            't': '\t',
+            'r': '\r'}
+
+_NAMES = {'true': True,
+          'false': False,
+          'nil': None}
+
+
+def _unescape(match):
+    """Return character of given escape sequence `match`.
+
+    :type match: re.Match
+    :rtype: str
+    """
+    seq = match.group(1)
+
+    if seq.isdigit():
+        return chr(int(seq))
+
+    return _ESCAPES.get(seq, seq)
+
+
+def _to_number(text):
+    """Convert given lua number `text` to python.
+
+    "3" -> 3, "0.5" -> 0.5
+
+    :type text: str
+    :rtype: int|float
+    """
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _tokenize(text):
+    """Split given lua literal `text` to tokens.
+
+    :type text: str
+    :return: Token kind ('string', 'number', 'name' or 'op') and text.
+    :rtype: list[(str, str)]
+    :raises ValueError: If `text` contains invalid characters.
+    """
+    tokens = []
+
+    token_match = _TOKEN_PARSE.match
+
+    pos = 0
+    end = len(text)
+
+    while pos < end:
+
+        match = token_match(text, pos)
+
+        if match is None:
+
+            if text[pos:].isspace():
+                break
+
+            raise ValueError("Invalid lua literal '{}' at {}".format(text,
+                                                                    pos))
+
+        kind = match.lastgroup
+
+        tokens.append((kind, match.group(kind)))
+
+        pos = match.end()
+
+    return tokens
+
+
+def _parse(tokens, i):
+    """Parse lua value starting at token `i`.
+
+    :param tokens: Tokens (see :func:`_tokenize()`).
+    :type tokens: list[(str, str)]
+    :param i: Index of value first token.
+    :type i: int
+    :return: Python value and index of the token following it.
+    :rtype: (object, int)
+    """
+    kind, text = tokens[i]
+
+    if kind == 'string':
+
+        text = text[1:-1]
+
+        if '\\' in text:
+            text = _ESCAPE_PARSE.sub(_unescape, text)
+
+        return text, i + 1
+
+    elif kind == 'number':
+
+        return _to_number(text), i + 1
+
+    elif kind == 'name':
+
+        # true, false, nil, others (transform.Id, etc.) are kept as string
+        return _NAMES.get(text, text), i + 1
+
+    elif text == '{':
+
+        return _parse_table(tokens, i + 1)
+
+    raise ValueError("Unexpected lua token '{}'".format(text))
+
+
+def _parse_table(tokens, i):
+    """Parse lua table content starting at token `i` (following "{").
+
+    :param tokens: Tokens (see :func:`_tokenize()`).
+    :type tokens: list[(str, str)]
+    :param i: Index of table first field token.
+    :type i: int
+    :return: Python list or dict, and index of the token following table.
+    :rtype: (list|dict, int)
+    """
+    items = []
+    fields = {}
+
+    while True:
+
+        kind, text = tokens[i]
+
+        if kind == 'op' and text == '}':
+            i += 1
+            break
+
+        if kind == 'name' and tokens[i + 1] == ('op', '='):
+
+            # {min=0}
+            fields[text], i = _parse(tokens, i + 2)
+
+        elif kind == 'op' and text == '[':
+
+            # {["min"]=0}
+            key, i = _parse(tokens, i + 1)
+
+            if tokens[i] != ('op', ']') or tokens[i + 1] != ('op', '='):
+                raise ValueError("Invalid lua table key '{}'".format(key))
+
+            fields[key], i = _parse(tokens, i + 2)
+
+        else:
+
+            value, i = _parse(tokens, i)
+
+            items.append(value)
+
+        kind, text = tokens[i]
+
+        if kind == 'op' and text in ',;':
+            i += 1
+        elif kind != 'op' or text != '}':
+            raise ValueError("Unexpected lua token '{}'".format(text))
+
+    if not fields:
+        return (items if items else {}), i
+
+    # mixed table, positional items have 1 based integer keys
+    for key, value in enumerate(items, 1):
+        fields[key] = value
+
+    return fields, i
+
+
+def parse_value(text):
+    """Convert given lua literal `text` to python value.
+
+    Tables with positional fields only are converted to lists, other tables
+    (including empty ones) to dicts, positional fields of mixed tables having
+    1 based integer keys.
+
+    :Example:
+
+    >>> parse_value('{1,0.5,0.5}')
+    [1, 0.5, 0.5]
+    >>> parse_value('{min=0,slidermax=10}')
+    {'min': 0, 'slidermax': 10}
+    >>> parse_value('{{"Distant","distant"},{"Directional","directional"}}')
+    [['Distant', 'distant'], ['Directional', 'directional']]
+
+    :param text: Lua literal (string, number, boolean, nil or table).
+    :type text: str
+    :return: Python value.
+    :rtype: str|int|float|bool|list|dict|None
+    :raises ValueError: If `text` is not a valid lua literal.
+    """
+    if _NUMBER_TABLE_PARSE.match(text):
+        return [_to_number(v) for v in text[1:-1].split(',')]
+
+    tokens = _tokenize(text)
+
+    if not tokens:
+        raise ValueError("Empty lua literal")
+
+    try:
+        value, i = _parse(tokens, 0)
+    except IndexError:
+        raise ValueError("Incomplete lua literal '{}'".format(text))
+
+    if i != len(tokens):
+        raise ValueError("Unexpected lua token '{}'".format(tokens[i][1]))
+
+    return value
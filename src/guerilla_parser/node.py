@@ -1,7 +1,16 @@
 from .exception import ChildError, PathError
 
 from .util import itervalues
-from .util import name_to_path_name
+from .util import node_name_to_path_name
+
+
+# children count from which a child index is created on lookup
+_CHILD_INDEX_MIN_SIZE = 8
+
+# graph edit count, incremented by node and plug methods editing a graph so
+# flat graphs shared by pickled objects know they are outdated (see
+# flat.flat_graph())
+_graph_edits = [0]
 
 
 class GuerillaNode(object):
@@ -13,11 +22,20 @@ class GuerillaNode(object):
     :vartype type: str
     :ivar parent: Node parent.
     :vartype parent: GuerillaNode
-    :ivar children: Node children.
-    :vartype children: list[GuerillaNode]
-    :ivar plug_dict: Node plug by name.
-    :vartype plug_dict: dict[str, GuerillaPlug]
     """
+    # huge files can have millions of nodes, slots and lazily created
+    # containers keep them small
+    __slots__ = ('id',
+                 '__name',
+                 'type',
+                 'parent',
+                 '_children',
+                 '_child_index',
+                 '_plug_dict',
+                 '__path_cache',
+                 '_name_for_path',
+                 '_source_offset')
+
     def __init__(self, id_, name, type_, parent=None):
         """Init node.
 
@@ -40,13 +58,14 @@ class GuerillaNode(object):
         self.type = type_
         self.parent = parent
 
-        self.children = []
+        # containers are only created when first child/plug is added
+        self._children = None  # :type: list[GuerillaNode]
 
-        self.plug_dict = {}
+        self._plug_dict = None  # :type: dict[str, GuerillaPlug]
 
-        # add current node to given parent
-        if self.parent is not None:
-            self.parent.children.append(self)
+        # child per path name, created on first lookup for nodes with many
+        # children, then maintained
+        self._child_index = None  # :type: dict[str, GuerillaNode]
 
         # cache path for performance purpose. __create_and_get_implicit_node()
         # do intensive GuerillaNode.path property call so we cache path once
@@ -56,10 +75,14 @@ class GuerillaNode(object):
         # for path, name with number are exposed with bracket:
         # 0 -> '[0]'
         # as we use this value a lot in path property, we cache it here.
-        if isinstance(self.name, int):
-            self._name_for_path = '[{}]'.format(self.name)
-        else:
-            self._name_for_path = name_to_path_name(self.name)
+        self._name_for_path = node_name_to_path_name(name)
+
+        # offset of the command creating the node in parsed content
+        self._source_offset = None  # :type: int
+
+        # add current node to given parent
+        if self.parent is not None:
+            self.parent._add_child(self)
 
     def __repr__(self):
         """
@@ -73,6 +96,121 @@ class GuerillaNode(object):
         return "{}({}, {}, '{}')".format(type(self).__name__, self.id, name,
                                          self.type)
 
+    def __reduce__(self):
+        """Pickle node as an index in its graph flat tables, so deep graphs
+        don't hit recursion limit.
+
+        Flat tables are stored once per pickle, so nodes, plugs and parsers
+        pickled together stay in the same unpickled graph. A node pickled
+        alone is part of a new graph.
+        """
+        from .flat import reduce_node  # avoid circular import
+
+        return reduce_node(self)
+
+    def __copy__(self):
+        """Return a shallow copy, sharing parent, containers and values with
+        this node, without copying the graph.
+        """
+        from .flat import shallow_copy  # avoid circular import
+
+        return shallow_copy(self)
+
+    @property
+    def children(self):
+        """Node children, list being created on first access.
+
+        :return: Node children.
+        :rtype: list[GuerillaNode]
+        """
+        if self._children is None:
+            self._children = []
+
+        return self._children
+
+    @property
+    def plug_dict(self):
+        """Node plug by name, dict being created on first access.
+
+        :return: Node plug by name.
+        :rtype: dict[str, GuerillaPlug]
+        """
+        if self._plug_dict is None:
+            self._plug_dict = {}
+
+        return self._plug_dict
+
+    def _add_child(self, node):
+        """Add given `node` to node children.
+
+        :param node: Node to add.
+        :type node: GuerillaNode
+        """
+        _graph_edits[0] += 1
+
+        if self._children is None:
+            self._children = [node]
+        else:
+            self._children.append(node)
+
+        if self._child_index is not None:
+            self._child_index.setdefault(node._name_for_path, node)
+
+    def _get_child_by_path_name(self, path_name):
+        """Return child node with given name, as it appears in node paths.
+
+        :param path_name: Name of the child node, as it appears in paths.
+        :type path_name: str
+        :return: Child node, `None` if not found.
+        :rtype: GuerillaNode
+        """
+        if self._children is None:
+            return None
+
+        if self._child_index is None:
+
+            if len(self._children) < _CHILD_INDEX_MIN_SIZE:
+                for child in self._children:
+                    if child._name_for_path == path_name:
+                        return child
+                return None
+
+            # first child win, like a linear search would do
+            self._child_index = {}
+
+            for child in reversed(self._children):
+                self._child_index[child._name_for_path] = child
+
+        return self._child_index.get(path_name)
+
+    def _add_plug(self, plug):
+        """Add given `plug` to node plugs.
+
+        :param plug: Plug to add.
+        :type plug: GuerillaPlug
+        """
+        _graph_edits[0] += 1
+
+        if self._plug_dict is None:
+            self._plug_dict = {plug.name: plug}
+        else:
+            assert plug.name not in self._plug_dict, (plug.name,
+                                                      self._plug_dict)
+            self._plug_dict[plug.name] = plug
+
+    def _remove_plug(self, plug):
+        """Remove given `plug` from node plugs.
+
+        :param plug: Plug to remove.
+        :type plug: GuerillaPlug
+        """
+        _graph_edits[0] += 1
+
+        del self._plug_dict[plug.name]
+
+        if not self._plug_dict:
+            self._plug_dict = None
+
     @property
     def name(self):
         """Node name.
@@ -88,8 +226,49 @@ class GuerillaNode(object):
 
         :param value: New node name.
         """
+        old_name_for_path = self._name_for_path
+
         self.__name = value
-        self.__path_cache = None  # clean path cache as we just renamed node
+        self._name_for_path = node_name_to_path_name(value)
+
+        _graph_edits[0] += 1
+
+        # clean path cache of the node and its subtree as we just renamed node
+        nodes = [self]
+
+        while nodes:
+            node = nodes.pop()
+            node.__path_cache = None
+            nodes.extend(node._children or ())
+
+        # update parent child index
+        parent = self.parent
+
+        if parent is not None and parent._child_index is not None:
+
+            if parent._child_index.get(old_name_for_path) is self:
+
+                del parent._child_index[old_name_for_path]
+
+                # another child could have the same name
+                for child in parent._children:
+                    if child._name_for_path == old_name_for_path:
+                        parent._child_index[old_name_for_path] = child
+                        break
+
+            parent._child_index.setdefault(self._name_for_path, self)
+
+    @property
+    def source_offset(self):
+        """Offset of the ``create`` command creating the node in parsed
+        content.
+
+        See :meth:`GuerillaParser.line_number()` to get line number.
+
+        :return: Command offset, `None` for implicit nodes.
+        :rtype: int
+        """
+        return self._source_offset
 
     @property
     def path(self):
@@ -135,8 +314,8 @@ class GuerillaNode(object):
         :rtype: str
         """
         try:
-            return self.plug_dict['PlugName'].value
-        except KeyError:
+            return self._plug_dict['PlugName'].value
+        except (KeyError, TypeError):
             return self.name
 
     @property
@@ -146,7 +325,10 @@ class GuerillaNode(object):
         :return: Iterator over node plugs.
         :rtype: collection.iterator[GuerillaPlug]
         """
-        for plug in itervalues(self.plug_dict):
+        if self._plug_dict is None:
+            return
+
+        for plug in itervalues(self._plug_dict):
             yield plug
 
     def get_child(self, name):
@@ -155,11 +337,12 @@ class GuerillaNode(object):
         :param name: Name of the child node to return.
         :return: Child node with given `name`.
         :rtype: GuerillaNode
-        :raise KeyError: When no child node with given `name` is found.
+        :raise ChildError: When no child node with given `name` is found.
         """
-        for n in self.children:
-            if n.name == name:
-                return n
+        child = self._get_child_by_path_name(node_name_to_path_name(name))
+
+        if child is not None:
+            return child
 
         raise ChildError("Can't find child node '{name}'".format(**locals()))
 
@@ -171,4 +354,7 @@ class GuerillaNode(object):
         :rtype: GuerillaPlug
         :raise KeyError: When no plug with given name is found
         """
-        return self.plug_dict[name]
+        if self._plug_dict is None:
+            raise KeyError(name)
+
+        return self._plug_dict[name]
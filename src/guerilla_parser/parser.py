@@ -2,13 +2,31 @@
 from __future__ import print_function
 
 import math
+import multiprocessing
 import re
 
+from array import array
+from bisect import bisect_right
+from difflib import SequenceMatcher
+from itertools import chain
+from timeit import default_timer
+
+from .cache import SnapshotCache
 from .exception import PathError
-from .node import GuerillaNode
+from .flat import FlatGraph, flat_graph
+from .graph import GuerillaGraph
+from .hooks import DiagnoseHooks
+from .lua import parse_value
+from .node import GuerillaNode, _graph_edits
 from .plug import GuerillaPlug
+from .stats import ParseStats
 
+from .util import iter_line_chunks
+from .util import iter_mmap_line_chunks
+from .util import iter_str_line_chunks
 from .util import iteritems
+from .util import itervalues
+from .util import node_name_to_path_name
 from .util import open_
 
 
@@ -94,13 +112,702 @@ _FLOAT_PARSE = re.compile('^[0-9.-]+$')
 _FLOAT_TABLE_PARSE = re.compile('^{[0-9.,-]+}$')
 
 
+###############################################################################
+# Plug value decoders, converting raw `create` plug values to python type.
+###############################################################################
+def _decode_float_or_str(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value  # leave the value as string
+
+
+def _decode_bool(value):
+    return GuerillaParser._LUA_TO_PY_BOOL[value]
+
+
+def _decode_tuple(value):
+    # "{1,0.5,0.5}" to (1,0.5,0.5)
+    return tuple(parse_value(value))
+
+
+def _decode_unquote(value):
+    # '"loop"' to 'loop'
+    return value[1:-1]
+
+
+def _decode_set(value):
+    # "Diffuse,-Reflection,-Refraction,Shadows"
+    return set((s.replace(' ', '') for s in value[1:-1].split(',')))
+
+
+def _decode_lua_int(value):
+    if value == 'nil':
+        # Tested in Guerilla 2.1, a 'nil' int value return None. So we
+        # reproduce this behavior here
+        return None
+    else:
+        return int(value)
+
+
+def _decode_multistring(value):
+    return value[1:-1].split('\\010')
+
+
+def _decode_text(value):
+    return value[1:-1].replace('\\010', '\n')
+
+
+# plug type: function converting raw value to python type
+_plug_type_decoders = {'types.bool': _decode_bool,
+                       'types.int': int,
+                       # '{{"Enabled","enable"},{"Disabled","disable"}}'
+                       'types.enum': _decode_unquote,
+                       'LUIPSTypeInt': _decode_lua_int,
+                       # choices are moved to plug param
+                       'types.combo': parse_value,
+                       'types.multistring': _decode_multistring,
+                       'types.text': _decode_text,
+                       'types.lightcategory': _decode_text}
+
+_plug_type_decoders.update((t, str) for t in parse_type_string)
+_plug_type_decoders.update((t, _decode_float_or_str)
+                           for t in parse_type_float_with_param)
+_plug_type_decoders.update((t, _decode_tuple) for t in parse_type_tuple)
+_plug_type_decoders.update((t, _decode_set) for t in parse_type_set)
+_plug_type_decoders.update((t, float) for t in parse_type_float)
+_plug_type_decoders.update((t, _decode_unquote)
+                           for t in parse_type_double_quoted_str)
+
+
+###############################################################################
+# Command tokenizer, converting content chunks to command records.
+###############################################################################
+def _clean_path(path):
+    """Clean node path.
+
+    "|foo|sphereShape\\\\$" -> "|foo|sphereShape$"
+    "|bar|clous\\\\[1\\\\]" -> "|foo|clous[1]"
+    """
+    if '\\' not in path:  # most paths, nothing to clean
+        return path
+
+    return re.sub(r'\\\\(.)', r'\g<1>', path)
+
+
+def _unescape_name(name):
+    """Unescape node name.
+
+    'foo\\"bar' -> 'foo"bar'
+    """
+    if '\\' not in name:  # most names, nothing to unescape
+        return name
+
+    return re.sub(r'\\(.)', r'\g<1>', name)
+
+
+def _create_rest(type_, rest, flag, plug_type, param, value):
+    """Return `rest` field of ``create`` command record.
+
+    :param type_: Created object type.
+    :type type_: str
+    :param rest: Raw ``create`` arguments following object name.
+    :type rest: str
+    :param flag: Plug flag, if already parsed.
+    :type flag: str
+    :param plug_type: Plug type, if already parsed.
+    :type plug_type: str
+    :param param: Plug type parameters, if already parsed.
+    :type param: str
+    :param value: Plug value, if already parsed.
+    :type value: str
+    :return: ``(flag, plug_type, param, value)`` for plugs, the referenced
+        file path for ``ArchReference`` nodes and `None` otherwise.
+    :rtype: tuple|str
+    """
+    if type_ in plug_class_names:
+
+        if flag is None:  # not parsed yet
+            match_rest = GuerillaParser._CREATE_PLUG_REST_PARSE.match(rest)
+
+            flag, plug_type, param, value = match_rest.group(
+                'flag', 'type', 'param', 'value')
+
+        if plug_type == 'types.combo' and param is None and \
+                value.startswith('{'):
+            # choices can be given before value:
+            # {"color","coordinates","density"},"density"
+            # a table without choices after it is the value itself
+            choices_end = value.rfind('},') + 1
+
+            if choices_end:
+                param = value[:choices_end]
+                value = value[choices_end + 1:]
+
+        return int(flag), plug_type, param, value
+
+    elif type_ == 'ArchReference':
+        return GuerillaParser._CREATE_REF_REST_PARSE.match(rest).group('path')
+
+    return None
+
+
+def _tokenize_command(cmd, oid, args, offset, create_offset):
+    """Tokenize a command from its line parts, using per command argument
+    regexes.
+
+    This is the slow path of :func:`_tokenize_chunk()`, used for commands
+    not matched by its combined regex.
+
+    :param cmd: Command name.
+    :type cmd: str
+    :param oid: Created object id, if any.
+    :type oid: str
+    :param args: Raw command arguments.
+    :type args: str
+    :param offset: Command name offset in whole content.
+    :type offset: int
+    :param create_offset: ``oid[`` offset in whole content.
+    :type create_offset: int
+    :return: Command record.
+    :rtype: tuple
+    """
+    cls = GuerillaParser
+
+    if cmd in 'docformatrevision':
+
+        return cmd, offset, int(args)
+
+    elif cmd in ('create', 'createnotref'):
+
+        match_arg = cls._CMD_CREATE_ARG_PARSE.match(args)
+
+        type_, parent, name, rest = match_arg.group('type', 'parent', 'name',
+                                                    'rest')
+
+        if name is None:
+            name = match_arg.group('name_number')
+            if name is not None:  # we have something !
+                name = int(name)  # let's convert it to int
+
+        if name is None:
+            name = ""
+
+        # unescaped node names
+        if isinstance(name, str):
+            name = _unescape_name(name)
+
+        if parent in (r'\"\"', ''):  # GADocument or root
+            parent_id = parent_path = None
+        else:
+            parent_match_grp = cls._PARENT_PARSE.match(parent)
+            parent_id = int(parent_match_grp.group('id'))
+            parent_path = parent_match_grp.group('path')
+
+            if parent_path:
+                parent_path = _clean_path(parent_path)
+
+        return ('create', create_offset, int(oid), type_, name, parent_id,
+                parent_path,
+                _create_rest(type_, rest, None, None, None, None))
+
+    elif cmd == 'set':
+
+        match_arg = cls._CMD_SET_ARG_PARSE.match(args)
+
+        path = match_arg.group('path')
+
+        return (cmd, offset, int(match_arg.group('id')),
+                _clean_path(path) if path else None,
+                match_arg.group('plug'),
+                match_arg.group('value'))
+
+    elif cmd in ('connect', 'depend'):
+
+        if cmd == 'connect':
+            match_arg = cls._CMD_CONNECT_ARG_PARSE.match(args)
+        else:
+            match_arg = cls._CMD_DEPEND_ARG_PARSE.match(args)
+
+        in_path, out_path = match_arg.group('in_path', 'out_path')
+
+        return (cmd, offset,
+                int(match_arg.group('in_id')),
+                _clean_path(in_path) if in_path else None,
+                match_arg.group('in_plug'),
+                int(match_arg.group('out_id')),
+                _clean_path(out_path) if out_path else None,
+                match_arg.group('out_plug'),
+                args)
+
+    return cmd, offset
+
+
+def _tokenize_chunk(chunk_offset):
+    """Tokenize commands of given Guerilla file content chunk.
+
+    Run in worker processes on parallel parsing, so must be module level to
+    be pickled.
+
+    Each command gives a record tuple starting with command name and
+    command offset in whole content::
+
+        (cmd, offset, doc_format_rev)
+        ('create', offset, oid, type, name, parent_id, parent_path, rest)
+        ('set', offset, oid, path, plug_name, value)
+        ('connect'|'depend', offset, in_oid, in_path, in_plug_name,
+         out_oid, out_path, out_plug_name, args)
+        (cmd, offset)  # unknown command
+
+    Where `rest` of ``create`` is ``(flag, plug_type, param, value)`` for
+    plugs, the referenced file path for ``ArchReference`` nodes and `None`
+    otherwise.
+
+    Fields of ``create``, ``set``, ``connect`` and ``depend`` commands are
+    extracted in a single pass by a combined regex, other commands fall back
+    to per command regexes.
+
+    :param chunk_offset: Content chunk of complete lines and its offset in
+        the whole content.
+    :type chunk_offset: (str, int)
+    :return: Command records.
+    :rtype: list[tuple]
+    """
+    chunk, chunk_offset = chunk_offset
+
+    records = []
+
+    append = records.append
+
+    for match in GuerillaParser._COMMAND_PARSE.finditer(chunk):
+
+        kind = match.lastgroup
+
+        if kind == 'create':
+
+            (oid, type_, parent_id, parent_path, name, name_number, rest,
+             flag, plug_type, param, value) = match.group(
+                'c_oid', 'c_type', 'c_parent_id', 'c_parent_path', 'c_name',
+                'c_name_number', 'c_rest', 'c_flag', 'c_plug_type',
+                'c_param', 'c_value')
+
+            if name is not None:
+                name = _unescape_name(name)
+            elif name_number is not None:
+                name = int(name_number)
+            else:
+                name = ""
+
+            if parent_id is not None:
+                parent_id = int(parent_id)
+
+            if parent_path:
+                parent_path = _clean_path(parent_path)
+
+            append(('create', chunk_offset + match.start('create'),
+                    int(oid), type_, name, parent_id, parent_path or None,
+                    _create_rest(type_, rest, flag, plug_type, param,
+                                 value)))
+
+        elif kind == 'set':
+
+            oid, path, plug_name, value = match.group(
+                's_oid', 's_path', 's_plug', 's_value')
+
+            append(('set', chunk_offset + match.start('set'), int(oid),
+                    _clean_path(path) if path else None, plug_name,
+                    value))
+
+        elif kind == 'link':
+
+            (cmd, args, in_oid, in_path, in_plug_name,
+             out_oid, out_path, out_plug_name) = match.group(
+                'l_cmd', 'l_args', 'l_in_oid', 'l_in_path', 'l_in_plug',
+                'l_out_oid', 'l_out_path', 'l_out_plug')
+
+            append((cmd, chunk_offset + match.start('link'), int(in_oid),
+                    _clean_path(in_path) if in_path else None, in_plug_name,
+                    int(out_oid),
+                    _clean_path(out_path) if out_path else None,
+                    out_plug_name, args))
+
+        else:
+
+            cmd, oid, args = match.group('g_cmd', 'g_oid', 'g_args')
+
+            offset = chunk_offset + match.start('g_cmd')
+
+            append(_tokenize_command(
+                cmd, oid, args, offset,
+                offset if oid is None else chunk_offset + match.start(kind)))
+
+    return records
+
+
+def _tokenize_chunk_lines(chunk_offset):
+    """Tokenize commands of given Guerilla file content chunk, matching
+    lines first, then arguments of each command.
+
+    Reference implementation of :func:`_tokenize_chunk()`, giving the same
+    records about two times slower, other tokenizer backends are tested
+    against.
+
+    :param chunk_offset: Content chunk of complete lines and its offset in
+        the whole content.
+    :type chunk_offset: (str, int)
+    :return: Command records.
+    :rtype: list[tuple]
+    """
+    chunk, chunk_offset = chunk_offset
+
+    records = []
+
+    for match in GuerillaParser._LINE_PARSE.finditer(chunk):
+
+        cmd, oid, args = match.group('cmd', 'oid', 'args')
+
+        records.append(_tokenize_command(cmd, oid, args,
+                                         chunk_offset + match.start('cmd'),
+                                         chunk_offset + match.start(1)))
+
+    return records
+
+
+###############################################################################
+# Tokenizer backends.
+###############################################################################
+# name and function of tokenizer backends available in current python, each
+# one converting a content chunk and its offset to command records (see
+# _tokenize_chunk()), and module level so workers can pickle it. Parsing
+# uses the first one: the compiled "_guerilla_speedups" extension when it
+# can be imported, the combined regex otherwise
+_tokenizers = [('re', _tokenize_chunk),
+               ('lines', _tokenize_chunk_lines)]
+
+try:
+    from _guerilla_speedups import tokenize_chunk as _speedups_tokenize_chunk
+except ImportError:  # optional compiled tokenizer
+    pass
+else:
+    _tokenizers.insert(0, ('speedups', _speedups_tokenize_chunk))
+
+# tokenizer backend used by parsers
+_tokenize = _tokenizers[0][1]
+
+
+###############################################################################
+# Content diff, used by incremental updates.
+###############################################################################
+def _common_size(a, a_start, b, b_start, size, backward=False):
+    """Return size of the common part of given strings, starting at given
+    offsets.
+
+    Compared slices grow exponentially, then the first different one is
+    bisected, so comparing costs about the common part size, in C.
+
+    :param a: First string.
+    :type a: str
+    :param a_start: First string offset.
+    :type a_start: int
+    :param b: Second string.
+    :type b: str
+    :param b_start: Second string offset.
+    :type b_start: int
+    :param size: Maximum size to compare.
+    :type size: int
+    :param backward: Compare characters before offsets, offsets being
+        excluded ends.
+    :type backward: bool
+    :rtype: int
+    """
+    if backward:
+        def equal(start, end):
+            return a[a_start - end:a_start - start] == \
+                b[b_start - end:b_start - start]
+    else:
+        def equal(start, end):
+            return a[a_start + start:a_start + end] == \
+                b[b_start + start:b_start + end]
+
+    common = 0
+    step = 64
+
+    while common < size:
+
+        end = min(common + step, size)
+
+        if not equal(common, end):
+            break
+
+        common = end
+        step *= 2
+
+    else:
+        return size
+
+    # first different character is in [common, end[
+    low = common
+    high = end - 1
+
+    while low < high:
+
+        mid = (low + high + 1) // 2
+
+        if equal(common, mid):
+            low = mid
+        else:
+            high = mid - 1
+
+    return low
+
+
+def _read_lines(content, start, end, count):
+    """Return up to `count` lines of given `content`, line endings included.
+
+    :param content: Content to read lines from.
+    :type content: str
+    :param start: Line start offset.
+    :type start: int
+    :param end: Offset to stop reading at, a line start or content end.
+    :type end: int
+    :param count: Maximum line count.
+    :type count: int
+    :rtype: list[str]
+    """
+    lines = []
+
+    while start < end and len(lines) < count:
+
+        line_end = content.find('\n', start, end) + 1
+
+        if not line_end:  # last line, without line ending
+            line_end = end
+
+        lines.append(content[start:line_end])
+
+        start = line_end
+
+    return lines
+
+
+def _sync_lines(old, old_start, old_end, new, new_start, new_end,
+                max_count=1 << 14):
+    """Return where old and new contents are equal again, after different
+    lines.
+
+    Lines following given starts are matched, more and more of them until
+    two consecutive lines match (or one at contents end).
+
+    :param old: Old content.
+    :type old: str
+    :param old_start: Old different line start.
+    :type old_start: int
+    :param old_end: Old offset to stop matching at.
+    :type old_end: int
+    :param new: New content.
+    :type new: str
+    :param new_start: New different line start.
+    :type new_start: int
+    :param new_end: New offset to stop matching at.
+    :type new_end: int
+    :param max_count: Maximum number of matched lines, ends being returned
+        past it.
+    :type max_count: int
+    :return: Old and new matching line starts.
+    :rtype: (int, int)
+    """
+    count = 32
+
+    while count <= max_count:
+
+        old_lines = _read_lines(old, old_start, old_end, count)
+        new_lines = _read_lines(new, new_start, new_end, count)
+
+        last = len(old_lines) < count and len(new_lines) < count
+
+        matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+
+        for i, j, size in matcher.get_matching_blocks():
+
+            if size > 1 or (size and last):
+                return (old_start + sum(len(line) for line in old_lines[:i]),
+                        new_start + sum(len(line) for line in new_lines[:j]))
+
+        if last:
+            break
+
+        count *= 2
+
+    return old_end, new_end
+
+
+def _diff_lines(old, new):
+    """Return unchanged and changed blocks of lines between `old` and `new`
+    contents.
+
+    Contents are compared in C until a different character is found, then
+    following lines are matched to find where contents are equal again, so
+    small changes of huge contents are fast to find. Changed blocks are not
+    minimal, but always made of whole lines.
+
+    :param old: Old content.
+    :type old: str
+    :param new: New content.
+    :type new: str
+    :return: Unchanged blocks as ``(old_start, new_start, size)`` and
+        changed blocks as ``(old_start, old_end, new_start, new_end)``, in
+        character offsets.
+    :rtype: (list[(int, int, int)], list[(int, int, int, int)])
+    """
+    old_size = len(old)
+    new_size = len(new)
+
+    # common trailing lines
+    suffix = _common_size(old, old_size, new, new_size,
+                          min(old_size, new_size), backward=True)
+
+    old_end = old.find('\n', old_size - suffix) + 1
+
+    if old_end:
+        new_end = new_size - (old_size - old_end)
+    else:  # no whole line
+        old_end = old_size
+        new_end = new_size
+
+    equal_blocks = []
+    changed_blocks = []
+
+    old_start = new_start = 0
+
+    while True:
+
+        size = _common_size(old, old_start, new, new_start,
+                            min(old_end - old_start, new_end - new_start))
+
+        if old_start + size == old_end and new_start + size == new_end:
+            equal_blocks.append((old_start, new_start, size))
+            break
+
+        # stop at last common line end
+        size = old.rfind('\n', old_start, old_start + size) + 1 - old_start
+
+        if size > 0:
+            equal_blocks.append((old_start, new_start, size))
+            old_start += size
+            new_start += size
+
+        old_sync, new_sync = _sync_lines(old, old_start, old_end,
+                                         new, new_start, new_end)
+
+        changed_blocks.append((old_start, old_sync, new_start, new_sync))
+
+        old_start = old_sync
+        new_start = new_sync
+
+        if old_start == old_end and new_start == new_end:
+            break
+
+    if old_end < old_size:
+        equal_blocks.append((old_end, new_end, old_size - old_end))
+
+    return equal_blocks, changed_blocks
+
+
+def _offset_mapper(equal_blocks):
+    """Return function converting old content offsets to new content ones.
+
+    :param equal_blocks: Unchanged blocks (see :func:`_diff_lines()`).
+    :type equal_blocks: list[(int, int, int)]
+    :return: Function returning new offset of given old offset, `None` if
+        it's in a changed block.
+    :rtype: function
+    """
+    old_starts = [block[0] for block in equal_blocks]
+
+    def map_offset(offset):
+
+        i = bisect_right(old_starts, offset) - 1
+
+        if i < 0:  # before first unchanged block
+            return None
+
+        old_start, new_start, size = equal_blocks[i]
+
+        if offset < old_start + size:
+            return offset - old_start + new_start
+
+        return None
+
+    return map_offset
+
+
+class _UpdatePlan(object):
+    """Changes patching a parsed graph from its content to a new one, see
+    :meth:`GuerillaParser.update()`.
+
+    :ivar equal_blocks: Unchanged blocks (see :func:`_diff_lines()`).
+    :vartype equal_blocks: list[(int, int, int)]
+    :ivar new_records: Linked command records of new content per key.
+    :vartype new_records: dict[tuple, tuple]
+    """
+
+    def __init__(self, equal_blocks, old_records, new_records):
+
+        self.equal_blocks = equal_blocks
+        self.new_records = new_records
+
+        self.__map_offset = _offset_mapper(equal_blocks)
+
+        self.__old_keys_per_offset = dict(
+            (record[1], key) for key, record in iteritems(old_records))
+
+        self.doc_format_revs = []
+        self.node_creates = []  # (node, record)
+        self.plug_creates = []  # (plug, record)
+        self.set_changes = []  # (plug, record)
+        self.set_adds = []  # (node, record)
+        self.connects = []  # record
+
+        self.removed_plugs = set()  # :type: set[GuerillaPlug]
+        self.disconnected_plugs = set()  # :type: set[GuerillaPlug]
+        self.reconnected_plugs = set()  # :type: set[GuerillaPlug]
+
+        # nodes getting plugs added before existing ones
+        self.reordered_nodes = set()  # :type: set[GuerillaNode]
+
+        # (node, plug name) of plugs added by "set" commands
+        self.added_plugs = set()
+
+    def new_offset(self, offset):
+        """Return new offset of a command of old content.
+
+        :param offset: Command offset in old content.
+        :type offset: int
+        :return: Command offset in new content, `None` if removed.
+        :rtype: int|None
+        """
+        mapped = self.__map_offset(offset)
+
+        if mapped is None:
+            record = self.new_records.get(
+                self.__old_keys_per_offset.get(offset))
+
+            if record is not None:
+                mapped = record[1]
+
+        return mapped
+
+
 class GuerillaParser(object):
     """Guerilla .gproject file parser.
 
     :ivar objs: Guerilla "object" per id (parsed in ``oid[<id>]``).
     :vartype objs: dict[int, GuerillaNode|GuerillaPlug]
-    :ivar diagnose: Diagnose mode.
+    :ivar diagnose: Diagnose mode, printing each linked command.
     :vartype diagnose: bool
+    :ivar parse_stats: Parsing statistics, if asked (see `parse_stats`
+        argument).
+    :vartype parse_stats: ParseStats|None
     """
     _PY_TO_LUA_BOOL = {True: 'true',
                        False: 'false'}
@@ -113,6 +820,41 @@ class GuerillaParser(object):
         r'(?P<cmd>\w+)'
         r'\((?P<args>.*)\)\n')
 
+    # combined command regex, extracting fields of most commands in a single
+    # pass. Each alternative is wrapped in a named group so the matched
+    # command kind is given by match.lastgroup. Paths and quoted strings use
+    # the "unrolled loop" form ([^"\\]*(\\.[^"\\]*)*), way faster than an
+    # alternation per character. Lines not matched by the first alternatives
+    # (unexpected syntax, etc.) are matched by the last one and parsed with
+    # per command regexes.
+    _COMMAND_PARSE = re.compile(
+        r'\s*(?:'
+        # oid[3]=create("Plug","$2|foo","Name",4,types.float {min=0},0.5)
+        r'(?P<create>oid\[(?P<c_oid>\d+)\]=create(?:notref)?\('
+        r'"(?P<c_type>[a-zA-Z0-9]+)",'
+        r'"(?:\$(?P<c_parent_id>\d+)'
+        r'(?P<c_parent_path>\|[^"\\\n]*(?:\\.[^"\\\n]*)*)?|\\"\\"|)",'
+        r'(?:"(?P<c_name>[^"\\\n]*(?:\\.[^"\\\n]*)*)"|'
+        r'(?P<c_name_number>-?\d+))'
+        r'(?P<c_rest>,(?P<c_flag>\d+),(?P<c_plug_type>[a-zA-Z0-9.]+)'
+        r'(?: (?P<c_param>{.*}))?,(?P<c_value>.*)|.*)\)\n)|'
+        # set("$3|foo.Name",0.5)
+        r'(?P<set>set\("\$(?P<s_oid>\d+)'
+        r'(?P<s_path>\|[^"\\\n]*(?:\\.[^"\\\n]*)*)?'
+        r'\.(?P<s_plug>[\w \t]+)",(?P<s_value>.+)\)\n)|'
+        # connect("$3.In","$4|foo.Out")
+        r'(?P<link>(?P<l_cmd>connect|depend)\((?P<l_args>'
+        r'"\$(?P<l_in_oid>\d+)'
+        r'(?:(?P<l_in_path>\|[^"\\\n]*(?:\\.[^"\\\n]*)*)?'
+        r'\.(?P<l_in_plug>\w+))?",'
+        r'"\$(?P<l_out_oid>\d+)'
+        r'(?:(?P<l_out_path>\|[^"\\\n]*(?:\\.[^"\\\n]*)*)?'
+        r'\.(?P<l_out_plug>\w+))?"'
+        r'.*)\)\n)|'
+        # any other command
+        r'(?P<other>(?:oid\[(?P<g_oid>\d+)\]=)?(?P<g_cmd>\w+)'
+        r'\((?P<g_args>.*)\)\n))')
+
     # per command argument regex
     _CMD_CREATE_ARG_PARSE = re.compile(
         r'"(?P<type>[a-zA-Z0-9]+)",'
@@ -143,30 +885,109 @@ class GuerillaParser(object):
 
     _PARENT_PARSE = re.compile(r'\$(?P<id>\d+)(?P<path>(\\"|[^"])+)?')
 
-    def __init__(self, content, diagnose=False):
+    # content chunk size sent to worker processes on parallel parsing
+    _PARALLEL_CHUNK_SIZE = 1 << 22
+
+    # split path on non escaped "|"
+    _PATH_SPLIT = re.compile(r'(?<!\\)\|')
+
+    def __init__(self, content, diagnose=False, keep_content=True,
+                 node_types=None, path_prefixes=None, plug_names=None,
+                 index_paths=None, workers=None,
+                 parse_stats=False, hooks=None, _records=None,
+                 _chunks=None):
         """Init the parser.
 
-        :param content: Raw Guerilla file content to parse.
-        :type content: str
-        :param diagnose: Will print some diagnostic information if True.
+        :param content: Raw Guerilla file content to parse, or file object to
+            read it from, chunk by chunk of lines.
+        :type content: str|io.TextIOBase
+        :param diagnose: Print each linked command if `True`, using
+            :class:`DiagnoseHooks`. Ignored if `hooks` is given.
         :type diagnose: bool
+        :param keep_content: Keep parsed content in memory, needed by
+            :attr:`original_content`, :meth:`set_plug_value()` and
+            :meth:`write()`.
+        :type keep_content: bool
+        :param node_types: Only create nodes of given types, and their whole
+            subtree.
+        :type node_types: collections.iterable[str]
+        :param path_prefixes: Only create nodes under given paths
+            (``'|RenderPass|Layer'``).
+        :type path_prefixes: collections.iterable[str]
+        :param plug_names: Only create plugs with given names.
+        :type plug_names: collections.iterable[str]
+        :param index_paths: Build node path index once file is parsed if
+            `True`, on first :meth:`path_to_node()` call if `None`, never if
+            `False`.
+        :type index_paths: bool|None
+        :param workers: Number of worker processes tokenizing content chunks
+            in parallel, useful on huge files. Content is parsed in current
+            process if `None` or 1.
+        :type workers: int
+        :param parse_stats: Record time spent per parsing phase and object
+            counts in :attr:`parse_stats` (see :class:`ParseStats`). Parsing
+            is a bit slower, but has no overhead if `False`. Plug values
+            are then converted while parsing instead of on first access
+            (values failing to convert still raise on access).
+        :type parse_stats: bool
+        :param hooks: Hooks called with parsed objects each time a command is
+            linked (see :class:`ParseHooks`).
+        :type hooks: ParseHooks
+
+        Node and plug filters allow to parse a small subset of a file.
+        Root node is always created and a node is created if it matches any
+        of given `node_types` or `path_prefixes`. Nodes on the way to
+        `path_prefixes` are created too, but without plugs. Skipped nodes
+        have their whole subtree skipped and connections involving skipped
+        plugs are ignored.
         """
         super(GuerillaParser, self).__init__()
 
+        self.parse_stats = None  # :type: ParseStats
+
+        if parse_stats:
+
+            start_time = default_timer()
+
+            self.parse_stats = ParseStats()
+
+            self.__time_implicit_nodes()
+
         # original content of the gproject, never modified
-        self.__org_content = content  # :type: str
+        self.__org_content = None  # :type: str
 
-        # modified content of the gproject (modified by set_plug_value())
+        # modified content of the gproject (modified by set_plug_value()),
+        # generated from edits on demand
         self.__mod_content = None  # :type: str
 
+        # content edits, per start offset: (end offset, new content)
+        self.__edits = {}  # :type: dict[int, (int, str)]
+
+        # line start offsets, see line_number()
+        self.__line_starts = None  # :type: array.array
+
         self.__doc_format_rev = None
 
         self.objs = {}
 
         self._implicit_nodes = []  # :type: list[GuerillaNode]
 
+        # graph links not stored as plug connections (``depend`` commands and
+        # plugs connected by their id): output node and plug name, input node
+        # and plug name, plug names being None for node links
+        self.__links = []  # :type: list[tuple]
+
+        # connection and dependency graph, built on first access
+        self.__graph = None  # :type: GuerillaGraph
+
         self.diagnose = diagnose
 
+        # hooks called while linking commands, only used during parsing
+        if hooks is None and diagnose:
+            hooks = DiagnoseHooks()
+
+        self.__hooks = hooks  # :type: ParseHooks
+
         # __create_and_get_implicit_node() do a huge amount of calls to
         # GuerillaNode.path property, we have to cache its result for
         # performance purpose.
@@ -175,7 +996,205 @@ class GuerillaParser(object):
         # representing $44 and path is "|foo|bar".
         self.__implicit_node_cache = {}
 
-        self.__parse_nodes()
+        # node and plug selection, see __select_node()
+        self.__node_types = frozenset(node_types or ())
+        self.__path_prefixes = tuple(p.rstrip('|') for p in path_prefixes or ())
+        self.__plug_names = None if plug_names is None \
+            else frozenset(plug_names)
+
+        self.__filtered = bool(self.__node_types or
+                               self.__path_prefixes or
+                               self.__plug_names is not None)
+
+        # nodes created only to reach path prefixes (without plugs)
+        self.__structure_nodes = set()  # :type: set[GuerillaNode]
+
+        # ids of skipped created objects
+        self.__skipped_oids = set()  # :type: set[int]
+
+        # node per absolute path, see path_to_node()
+        self.__index_paths = index_paths
+        self.__path_index = None  # :type: dict[str, GuerillaNode]
+
+        if _records is not None:  # already tokenized, see from_file()
+
+            self.__link_records(_records)
+
+            if keep_content:
+                self.__org_content = content
+
+        elif _chunks is not None or hasattr(content, 'readlines'):
+
+            # content chunks are kept (if asked) while they are read so we
+            # never have to read the file twice
+            chunks = []
+
+            if _chunks is not None:  # already split, see from_file()
+                chunk_iter = _chunks
+            elif workers and workers > 1:
+                chunk_iter = iter_line_chunks(content,
+                                              self._PARALLEL_CHUNK_SIZE)
+            else:
+                chunk_iter = iter_line_chunks(content)
+
+            if keep_content:
+                chunk_iter = self.__keep_chunks(chunk_iter, chunks)
+
+            self.__parse_nodes(chunk_iter, workers)
+
+            if keep_content:
+                self.__org_content = ''.join(chunks)
+
+        else:
+
+            self.__parse_nodes(self.__str_chunks(content, workers), workers)
+
+            if keep_content:
+                self.__org_content = content
+
+        if parse_stats:
+
+            # restore class method
+            del self.__create_and_get_implicit_node
+
+            self.parse_stats._count_objects(self.__root_nodes(),
+                                            self._implicit_nodes)
+
+            self.parse_stats.total_time = default_timer() - start_time
+
+        if index_paths:
+            self.build_path_index()
+
+    def __getstate__(self):
+        """Return parser state, nodes and plugs being stored as flat tables
+        so deep graphs don't hit recursion limit when pickled.
+
+        :rtype: dict
+        """
+        return self.__get_state()
+
+    def __get_state(self, copy_values=False):
+        """Return parser state, see :meth:`__getstate__()`.
+
+        :param copy_values: Deep copy already converted plug values.
+        :type copy_values: bool
+        :rtype: dict
+        """
+        # copy gets its own flat graph, pickle shares it with nodes and plugs
+        # pickled along
+        if copy_values:
+            graph = FlatGraph(self.__root_nodes(), copy_values)
+        else:
+            graph = flat_graph(self.__root_nodes())
+
+        node_indices = graph.node_indices
+        plug_indices = graph.plug_indices
+
+        # node index, or ~plug index for plugs
+        objs = [(oid, node_indices[obj] if isinstance(obj, GuerillaNode)
+                 else ~plug_indices[obj])
+                for oid, obj in iteritems(self.objs)]
+
+        implicit_node_cache = [
+            (node_indices[start_node], path,
+             None if node is None else node_indices[node])
+            for (start_node, path), node in
+            iteritems(self.__implicit_node_cache)]
+
+        return {'graph': graph,
+                'objs': objs,
+                'implicit_nodes': [node_indices[node]
+                                   for node in self._implicit_nodes],
+                'implicit_node_cache': implicit_node_cache,
+                'links': [(node_indices[out_node], out_plug_name,
+                           node_indices[in_node], in_plug_name)
+                          for out_node, out_plug_name, in_node, in_plug_name
+                          in self.__links],
+                'structure_nodes': [node_indices[node]
+                                    for node in self.__structure_nodes],
+                'skipped_oids': self.__skipped_oids,
+                'org_content': self.__org_content,
+                'edits': self.__edits,
+                'doc_format_rev': self.__doc_format_rev,
+                'diagnose': self.diagnose,
+                'parse_stats': self.parse_stats,
+                'node_types': self.__node_types,
+                'path_prefixes': self.__path_prefixes,
+                'plug_names': self.__plug_names,
+                'index_paths': self.__index_paths}
+
+    def __setstate__(self, state):
+        """Restore parser from given `state`, see :meth:`__getstate__()`.
+
+        :type state: dict
+        """
+        nodes, plugs = state['graph'].objects()
+
+        self.objs = dict((oid, nodes[index] if index >= 0 else plugs[~index])
+                         for oid, index in state['objs'])
+
+        self._implicit_nodes = [nodes[index]
+                                for index in state['implicit_nodes']]
+
+        self.__implicit_node_cache = dict(
+            ((nodes[start_index], path),
+             None if index is None else nodes[index])
+            for start_index, path, index in state['implicit_node_cache'])
+
+        self.__links = [(nodes[out_index], out_plug_name,
+                         nodes[in_index], in_plug_name)
+                        for out_index, out_plug_name, in_index, in_plug_name
+                        in state['links']]
+        self.__graph = None
+
+        self.__structure_nodes = set(nodes[index]
+                                     for index in state['structure_nodes'])
+        self.__skipped_oids = set(state['skipped_oids'])
+
+        self.__org_content = state['org_content']
+        self.__mod_content = None
+        self.__edits = dict(state['edits'])
+        self.__line_starts = None
+
+        self.__doc_format_rev = state['doc_format_rev']
+        self.diagnose = state['diagnose']
+        self.__hooks = None
+        self.parse_stats = state['parse_stats']
+
+        self.__node_types = state['node_types']
+        self.__path_prefixes = state['path_prefixes']
+        self.__plug_names = state['plug_names']
+        self.__filtered = bool(self.__node_types or
+                               self.__path_prefixes or
+                               self.__plug_names is not None)
+
+        self.__index_paths = state['index_paths']
+        self.__path_index = None
+
+        if self.__index_paths:
+            self.build_path_index()
+
+    def copy(self):
+        """Return an independent copy of the parser, without parsing content
+        again.
+
+        Nodes, plugs and their values can be modified on the copy without
+        modifying the original.
+
+        :Example:
+
+        >>> p2 = p.copy()
+        >>> plug = p2.path_to_plug('|Preferences.ArchiveSearchPath')
+        >>> p2.set_plug_value([(plug, '/foo/bar')])
+
+        :return: Parser copy.
+        :rtype: GuerillaParser
+        """
+        parser = type(self).__new__(type(self))
+
+        parser.__setstate__(self.__get_state(copy_values=True))
+
+        return parser
 
     def __eq__(self, other):
         """Compare the content of this instance with the content of an other
@@ -189,7 +1208,7 @@ class GuerillaParser(object):
         if self is other:
             return True
 
-        return self.__mod_content == other.__mod_content
+        return self.modified_content == other.modified_content
 
     @classmethod
     def from_file(cls, path, *args, **kwords):
@@ -197,349 +1216,1364 @@ class GuerillaParser(object):
 
         This is the main method to use if you want to use the parser.
 
+        If `keep_content` is `False`, file is parsed while it is read (see
+        :meth:`from_stream()`).
+
+        If `cache_dir` is given, a snapshot of tokenized file is stored in it
+        and reused, as long as file is not modified, skipping most of the
+        parsing work (see :class:`SnapshotCache`). Cache directory must be
+        private to the user. File is still read, but not tokenized, on a
+        snapshot hit unless `keep_content` is `False`.
+
+        If `mmap` is `True`, file is memory mapped and parsed chunk by chunk
+        of lines, each chunk being decoded only when parsed, so the whole
+        file is never read and decoded at once. Combined with
+        ``keep_content=False``, memory used stays close to the node graph
+        size. It's ignored when `cache_dir` is given.
+
+        :Example:
+
+        >>> p = GuerillaParser.from_file('/path/to/project.gproject',
+        ...                              cache_dir='/path/to/private/cache')
+        >>> p = GuerillaParser.from_file('/path/to/huge.gproject',
+        ...                              mmap=True, keep_content=False)
+
         :param path: Path of the Guerilla file to parse.
         :type path: str
+        :param mmap: Memory map the file instead of reading it.
+        :type mmap: bool
+        :param cache_dir: Snapshot cache directory.
+        :type cache_dir: str
+        :param cache_max_size: Maximum size, in bytes, of snapshot cache
+            directory.
+        :type cache_max_size: int
+        :param cache_hash_content: Add file content hash to snapshot keys,
+            so a file modified without changing its size and modification
+            time is parsed again.
+        :type cache_hash_content: bool
         :return: Parser filled with content of given `path`.
         :rtype: GuerillaParser
         """
+        cache_dir = kwords.pop('cache_dir', None)
+        cache_max_size = kwords.pop('cache_max_size',
+                                    SnapshotCache.DEFAULT_MAX_SIZE)
+        cache_hash_content = kwords.pop('cache_hash_content', False)
+        use_mmap = kwords.pop('mmap', False)
+
+        if cache_dir is not None:
+            return cls.__from_cache(path, SnapshotCache(cache_dir,
+                                                        cache_max_size,
+                                                        cache_hash_content),
+                                    *args, **kwords)
+
+        if use_mmap:
+
+            workers = kwords.get('workers')
+
+            if workers and workers > 1:
+                chunks = iter_mmap_line_chunks(path, cls._PARALLEL_CHUNK_SIZE)
+            else:
+                chunks = iter_mmap_line_chunks(path)
+
+            return cls(None, *args, _chunks=chunks, **kwords)
+
         with open_(path) as f:
-            content = f.read()
 
-        return cls(content, *args, **kwords)
+            if kwords.get('keep_content', True):
+                content = f.read()
+            else:
+                return cls(f, *args, **kwords)
+
+        return cls(content, *args, **kwords)
+
+    @classmethod
+    def __from_cache(cls, path, cache, *args, **kwords):
+        """Construct parser from given file `path` snapshot in `cache`,
+        creating the snapshot if needed.
+
+        :param path: Path of the Guerilla file to parse.
+        :type path: str
+        :param cache: Snapshot cache.
+        :type cache: SnapshotCache
+        :return: Parser filled with content of given `path`.
+        :rtype: GuerillaParser
+        """
+        key = cache.key(path, cache.hash_content)
+
+        records = cache.load(path, key)
+
+        if records is None or kwords.get('keep_content', True):
+            with open_(path) as f:
+                content = f.read()
+        else:
+            content = None
+
+        if records is None:
+
+            workers = kwords.get('workers')
+
+            records = list(cls.__iter_records(
+                cls.__str_chunks(content, workers), workers))
+
+            cache.save(path, key, records)
+
+        return cls(content, *args, _records=records, **kwords)
+
+    @classmethod
+    def from_stream(cls, stream, *args, **kwords):
+        """Construct parser reading given file object `stream` content.
+
+        Content is read and parsed chunk by chunk of lines so the whole file
+        content never has to be held as a single string. By default, read
+        content is not kept so :meth:`set_plug_value()` and :meth:`write()`
+        can't be used. Pass ``keep_content=True`` to keep it.
+
+        :Example:
+
+        >>> with open('/path/to/project.gproject') as f:
+        ...     p = GuerillaParser.from_stream(f)
+
+        :param stream: File object to read Guerilla file content from.
+        :type stream: io.TextIOBase
+        :return: Parser filled with content of given `stream`.
+        :rtype: GuerillaParser
+        """
+        kwords.setdefault('keep_content', False)
+
+        return cls(stream, *args, **kwords)
+
+    @property
+    def has_changed(self):
+        """Return if current parsed file has changed.
+
+        A parsed file can be changed using :meth:`set_plug_value()` method.
+
+        :return: True if both parser instance have same modified content.
+        :rtype: bool
+        """
+        # no edits mean we didn't tried to modified it
+        if not self.__edits:
+            return False
+        else:
+            return self.__org_content != self.modified_content
+
+    @property
+    def modified_content(self):
+        """Modified parsed Guerilla file content.
+
+        A parsed file can be changed using :meth:`set_plug_value()` method.
+
+        :return: Modified parsed Guerilla file content.
+        :rtype: str
+        """
+        if not self.__edits:
+            return self.__org_content
+
+        if self.__mod_content is None:
+
+            # apply edits in a single pass
+            chunks = []
+            cur = 0
+
+            for start in sorted(self.__edits):
+
+                end, new_content = self.__edits[start]
+
+                chunks.append(self.__org_content[cur:start])
+                chunks.append(new_content)
+
+                cur = end
+
+            chunks.append(self.__org_content[cur:])
+
+            self.__mod_content = ''.join(chunks)
+
+        return self.__mod_content
+
+    @property
+    def original_content(self):
+        """Original (unmodified) parsed Guerilla file content.
+
+        :return: Original (unmodified) parsed Guerilla file content, `None`
+            if parser has been constructed with ``keep_content=False``.
+        :rtype: str
+        """
+        return self.__org_content
+
+    def write(self, path):
+        """Write modified content to given file `path`.
+
+        :param path: File path to write modified content in.
+        :type path: str
+        :raises RuntimeError: If parsed content has not been kept.
+        """
+        if self.__org_content is None:
+            raise RuntimeError("Can't write file, parsed content has not been "
+                               "kept")
+
+        with open(path, 'w') as f:
+            f.write(self.modified_content)
+
+    def update(self, content):
+        """Update parsed graph to given new `content` of the same file,
+        parsing changed lines only when possible.
+
+        Old and new contents are compared line by line and changed commands
+        are patched in place: plug values of ``create`` and ``set`` commands,
+        added and removed ``set`` commands and ``connect`` commands. Objects
+        are kept, so references to unchanged nodes and plugs stay valid, and
+        their offsets are moved to the new content.
+
+        Content is parsed again from scratch (keeping parser arguments) if a
+        change can't be patched: created, removed or renumbered nodes, plugs
+        created by ``connect`` commands, reordered commands, changed graph
+        links (see :attr:`graph`), etc. It's parsed
+        again too if parser has node or plug filters or if
+        :meth:`set_plug_value()` has been used. Hooks are only called on
+        full parsing and :attr:`parse_stats` are left untouched by patches.
+
+        :Example:
+
+        >>> p = GuerillaParser.from_file('/path/to/project.gproject')
+        >>> with open('/path/to/project.gproject') as f:
+        ...     p.update(f.read())
+        True
+
+        :param content: New Guerilla file content.
+        :type content: str
+        :return: `True` if graph has been patched, `False` if content has
+            been parsed again.
+        :rtype: bool
+        :raises RuntimeError: If parsed content has not been kept.
+        """
+        if self.__org_content is None:
+            raise RuntimeError("Can't update, parsed content has not been "
+                               "kept")
+
+        plan = None
+
+        if not self.__edits and not self.__filtered:
+            plan = self.__plan_update(content)
+
+        if plan is None:
+
+            # graph is replaced only once parsed, so it's left untouched if
+            # new content can't be parsed
+            parser = type(self)(content, diagnose=self.diagnose,
+                                node_types=self.__node_types,
+                                path_prefixes=self.__path_prefixes,
+                                plug_names=self.__plug_names,
+                                index_paths=self.__index_paths,
+                                parse_stats=self.parse_stats is not None,
+                                hooks=self.__hooks)
+
+            self.__take_graph(parser)
+
+            return False
+
+        self.__apply_update(plan)
+
+        # flags, inputs and plug order are set in place
+        _graph_edits[0] += 1
+
+        self.__graph = None
+
+        self.__org_content = content
+        self.__mod_content = None
+        self.__line_starts = None
+
+        return True
+
+    def __take_graph(self, parser):
+        """Replace parsed graph by the one of given `parser`, parsed from new
+        content with the same arguments, see :meth:`update()`.
+
+        Only parsed graph and content are taken, with :attr:`parse_stats`
+        of the new parsing. Other instance attributes (hooks, filters,
+        subclass attributes, etc.) are kept.
+
+        :param parser: Parser of new content.
+        :type parser: GuerillaParser
+        """
+        self.objs = parser.objs
+        self._implicit_nodes = parser._implicit_nodes
+        self.__implicit_node_cache = parser.__implicit_node_cache
+        self.__links = parser.__links
+        self.__graph = parser.__graph
+        self.__structure_nodes = parser.__structure_nodes
+        self.__skipped_oids = parser.__skipped_oids
+
+        self.__org_content = parser.__org_content
+        self.__mod_content = parser.__mod_content
+        self.__edits = parser.__edits
+        self.__line_starts = parser.__line_starts
+        self.__doc_format_rev = parser.__doc_format_rev
+
+        # index of new nodes, built or not depending on `index_paths`
+        self.__path_index = parser.__path_index
+
+        if self.parse_stats is not None:
+            self.parse_stats = parser.parse_stats
+
+    def __update_key(self, record):
+        """Return key identifying command of given `record` in both old and
+        new contents, `None` if command is not linked in the graph.
+
+        :param record: Command record, see :func:`_tokenize_chunk()`.
+        :type record: tuple
+        :rtype: tuple
+        """
+        cmd = record[0]
+
+        if cmd == 'create':
+            return cmd, record[2]  # oid
+
+        elif cmd == 'set':
+            return record[:1] + record[2:5]  # oid, path and plug name
+
+        elif cmd == 'connect':
+
+            (_, _, _, in_path, in_plug_name,
+             out_oid, out_path, out_plug_name, _) = record
+
+            if not (in_path or in_plug_name) or \
+                    not (out_path or out_plug_name):
+                return None  # expression node connection
+
+            if out_oid == 0 and 0 not in self.objs:
+                return None  # document reference
+
+            return record[:1] + record[2:5]  # input oid, path and plug name
+
+        elif cmd in 'docformatrevision':
+            return cmd,
+
+        return None  # depend and unknown commands
+
+    def __existing_node(self, oid, path):
+        """Return node of given command `oid` and `path` if it already
+        exists, implicit nodes included.
+
+        :param oid: Command object id.
+        :type oid: int
+        :param path: Command path, relative to `oid` object.
+        :type path: str
+        :rtype: GuerillaNode|None
+        """
+        node = self.objs.get(oid)
+
+        if path and node is not None:
+            node = self.__implicit_node_cache.get((node, path))
+
+        if not isinstance(node, GuerillaNode):
+            return None
+
+        return node
+
+    def __connected_nodes(self, record):
+        """Return existing output and input nodes of given ``connect``
+        command `record`.
+
+        :param record: ``connect`` command record.
+        :type record: tuple
+        :return: Output and input nodes, `None` if one is missing or
+            referenced as a plug.
+        :rtype: (GuerillaNode, GuerillaNode)|None
+        """
+        (_, _, in_oid, in_path, in_plug_name,
+         out_oid, out_path, out_plug_name, _) = record
+
+        if in_plug_name is None or out_plug_name is None:
+            return None  # plug referenced by its id
+
+        out_node = self.__existing_node(out_oid, out_path)
+        in_node = self.__existing_node(in_oid, in_path)
+
+        if out_node is None or in_node is None:
+            return None
+
+        return out_node, in_node
+
+    def __update_records(self, content, changed_blocks):
+        """Return linked command records of changed blocks in current and
+        given new `content`, per key (see :meth:`__update_key()`).
+
+        :param content: New Guerilla file content.
+        :type content: str
+        :param changed_blocks: Changed blocks (see :func:`_diff_lines()`).
+        :type changed_blocks: list[(int, int, int, int)]
+        :return: Old and new records, `None` if changed graph links or
+            command order can't be patched.
+        :rtype: (dict[tuple, tuple], dict[tuple, tuple])|None
+        """
+        old_content = self.__org_content
+
+        old_records = {}
+        new_records = {}
+
+        # keys per changed block
+        old_block_keys = []
+        new_block_keys = []
+
+        for old_start, old_end, new_start, new_end in changed_blocks:
+
+            block_links = []
+
+            for src, start, end, records, block_keys in (
+                    (old_content, old_start, old_end, old_records,
+                     old_block_keys),
+                    (content, new_start, new_end, new_records,
+                     new_block_keys)):
+
+                keys = []
+                links = []
+
+                for record in _tokenize((src[start:end], start)):
+
+                    key = self.__update_key(record)
+
+                    if key is None:
+
+                        if record[0] in ('connect', 'depend'):
+                            links.append(record[:1] + record[2:8])
+
+                        continue
+
+                    if key in records:
+                        return None  # same object changed twice
+
+                    records[key] = record
+                    keys.append(key)
+
+                block_keys.append(keys)
+                block_links.append(links)
+
+            # graph links are not patched
+            if block_links[0] != block_links[1]:
+                return None
+
+        # commands found in both contents must keep their order, nodes,
+        # plugs and outputs being ordered by command
+        for old_keys, new_keys in zip(old_block_keys, new_block_keys):
+
+            if [k for k in old_keys if k in new_records] != \
+                    [k for k in new_keys if k in old_records]:
+                return None
+
+        return old_records, new_records
+
+    def __plan_update(self, content):
+        """Return changes patching graph from current content to given new
+        `content`, see :meth:`update()`.
+
+        Graph is only modified by :meth:`__apply_update()`, so nothing has
+        to be restored when changes can't be patched.
+
+        :param content: New Guerilla file content.
+        :type content: str
+        :return: Changes, `None` if graph can't be patched.
+        :rtype: _UpdatePlan|None
+        """
+        equal_blocks, changed_blocks = _diff_lines(self.__org_content,
+                                                   content)
+
+        records = self.__update_records(content, changed_blocks)
+
+        if records is None:
+            return None
+
+        old_records, new_records = records
+
+        # implicit nodes are created (and ordered) by the first command
+        # referencing them, so added and removed references aren't patched
+        for key in set(old_records).symmetric_difference(new_records):
+
+            record = old_records.get(key) or new_records[key]
+
+            if record[0] == 'set' and record[3] or \
+                    record[0] == 'connect' and (record[3] or record[6]):
+                return None
+
+        plan = _UpdatePlan(equal_blocks, old_records, new_records)
+
+        # removed commands
+        for key, record in iteritems(old_records):
+
+            cmd = record[0]
+
+            if cmd == 'create' and key not in new_records:
+                return None  # removed node or plug
+
+            elif cmd == 'set' and key not in new_records:
+
+                if not self.__plan_removed_set(plan, record):
+                    return None
+
+            elif cmd == 'connect':  # removed or changed connection
+
+                if not self.__plan_disconnect(plan, record,
+                                              new_records.get(key)):
+                    return None
+
+        if not self.__plan_connection_plugs_removal(plan):
+            return None
+
+        # changed and added commands
+        for key, record in sorted(iteritems(new_records),
+                                  key=lambda item: item[1][1]):
+
+            cmd = record[0]
+
+            if cmd in 'docformatrevision':
+                plan.doc_format_revs.append(record[2])
+
+            elif cmd == 'create':
+
+                if not self.__plan_create(plan, record,
+                                          old_records.get(key)):
+                    return None
+
+            elif cmd == 'set':
+
+                if not self.__plan_set(plan, record, old_records.get(key)):
+                    return None
+
+            elif not self.__plan_connect(plan, record):
+                return None
+
+        return plan
+
+    def __plan_removed_set(self, plan, record):
+        """Plan removal of the plug of given removed ``set`` command
+        `record`.
+
+        :param plan: Changes to fill.
+        :type plan: _UpdatePlan
+        :param record: ``set`` command record of old content.
+        :type record: tuple
+        :return: `False` if removal can't be patched.
+        :rtype: bool
+        """
+        node = self.__existing_node(record[2], record[3])
+
+        plug = None if node is None else \
+            (node._plug_dict or {}).get(record[4])
+
+        if plug is None or plug._source_offset != record[1]:
+            return False
+
+        if plug.input is not None or plug._outputs:
+            return False  # plug would be created by connection
+
+        plan.removed_plugs.add(plug)
+
+        return True
+
+    def __plan_disconnect(self, plan, record, new_record):
+        """Plan disconnection of given removed or changed ``connect``
+        command `record`.
+
+        :param plan: Changes to fill.
+        :type plan: _UpdatePlan
+        :param record: ``connect`` command record of old content.
+        :type record: tuple
+        :param new_record: Changed ``connect`` command record of new
+            content, `None` if connection is removed.
+        :type new_record: tuple|None
+        :return: `False` if disconnection can't be patched.
+        :rtype: bool
+        """
+        nodes = self.__connected_nodes(record)
+
+        if nodes is None:
+            return False
+
+        in_plug = (nodes[1]._plug_dict or {}).get(record[4])
+
+        if in_plug is None or in_plug.input is None or \
+                in_plug._input_source_offset != record[1]:
+            return False
+
+        if new_record is not None:
+
+            # plugs created by a connection can't be moved to an other node
+            if record[5:7] != new_record[5:7] and \
+                    (record[6] or new_record[6]):
+                return False
+
+            plan.reconnected_plugs.add(in_plug)
+
+        plan.disconnected_plugs.add(in_plug)
+
+        return True
+
+    @staticmethod
+    def __plan_connection_plugs_removal(plan):
+        """Plan removal of plugs created by planned disconnections, as they
+        are removed with them.
+
+        :param plan: Changes to fill.
+        :type plan: _UpdatePlan
+        :return: `False` if a plug is still connected to an other one.
+        :rtype: bool
+        """
+        for in_plug in plan.disconnected_plugs:
+
+            for plug in (in_plug, in_plug.input):
+
+                if plug._source_offset is not None or \
+                        plug in plan.reconnected_plugs:
+                    continue
+
+                if plug.input is not None and \
+                        plug not in plan.disconnected_plugs:
+                    return False
+
+                for output in plug._outputs or ():
+                    if output not in plan.disconnected_plugs:
+                        return False
+
+                plan.removed_plugs.add(plug)
+
+        return True
+
+    def __plan_create(self, plan, record, old_record):
+        """Plan changes of given ``create`` command `record`.
+
+        :param plan: Changes to fill.
+        :type plan: _UpdatePlan
+        :param record: ``create`` command record of new content.
+        :type record: tuple
+        :param old_record: Same command record of old content, `None` if
+            command is added.
+        :type old_record: tuple|None
+        :return: `False` if changes can't be patched.
+        :rtype: bool
+        """
+        obj = self.objs.get(record[2])
+
+        if old_record is None or obj is None or \
+                old_record[3:7] != record[3:7]:
+            return False  # added node or plug
+
+        if record[3] in plug_class_names:
+
+            if record[7][1] not in _plug_type_decoders:
+                return False
+
+            plan.plug_creates.append((obj, record))
+
+        elif old_record[7] == record[7]:
+            plan.node_creates.append((obj, record))
+
+        else:  # ArchReference path
+            return False
+
+        return True
+
+    def __plan_set(self, plan, record, old_record):
+        """Plan changes of given ``set`` command `record`.
+
+        :param plan: Changes to fill.
+        :type plan: _UpdatePlan
+        :param record: ``set`` command record of new content.
+        :type record: tuple
+        :param old_record: Same command record of old content, `None` if
+            command is added.
+        :type old_record: tuple|None
+        :return: `False` if changes can't be patched.
+        :rtype: bool
+        """
+        node = self.__existing_node(record[2], record[3])
+
+        if node is None:
+            return False
+
+        plugs = node._plug_dict or {}
+
+        plug = plugs.get(record[4])
+
+        if old_record is not None:
+
+            if plug is None or plug._source_offset != old_record[1]:
+                return False
+
+            plan.set_changes.append((plug, record))
+
+            return True
+
+        if plug is not None:
+            return False  # plug created by an other command
+
+        # plugs are ordered by command, plugs created by connections can't be
+        # moved
+        for other in itervalues(plugs):
+
+            if other in plan.removed_plugs:
+                continue
+
+            if other._source_offset is None:
+                return False
+
+            if plan.new_offset(other._source_offset) > record[1]:
+                plan.reordered_nodes.add(node)
+
+        plan.added_plugs.add((node, record[4]))
+        plan.set_adds.append((node, record))
+
+        return True
+
+    def __plan_connect(self, plan, record):
+        """Plan connection of given changed or added ``connect`` command
+        `record`.
+
+        :param plan: Changes to fill.
+        :type plan: _UpdatePlan
+        :param record: ``connect`` command record of new content.
+        :type record: tuple
+        :return: `False` if connection can't be patched.
+        :rtype: bool
+        """
+        nodes = self.__connected_nodes(record)
+
+        if nodes is None:
+            return False
+
+        for node, name in zip(nodes, (record[7], record[4])):
+
+            plug = (node._plug_dict or {}).get(name)
+
+            if plug is None:
+                if (node, name) not in plan.added_plugs:
+                    return False  # plug created by connection
+
+            elif plug in plan.removed_plugs:
+                return False
+
+            elif plug._source_offset is None and \
+                    plug not in plan.reconnected_plugs:
+                return False  # plug created by connection
+
+            elif name == record[4] and plug.input is not None and \
+                    plug not in plan.disconnected_plugs:
+                return False  # already connected
+
+        plan.connects.append(record)
+
+        return True
+
+    def __shift_offsets(self, equal_blocks):
+        """Move offsets of nodes and plugs by the shift of their unchanged
+        block.
+
+        Offsets of changed commands are moved too, then set by
+        :meth:`__apply_update()`.
+
+        :param equal_blocks: Unchanged blocks (see :func:`_diff_lines()`).
+        :type equal_blocks: list[(int, int, int)]
+        """
+        starts = [old_start for old_start, _, _ in equal_blocks]
+        shifts = [new_start - old_start
+                  for old_start, new_start, _ in equal_blocks]
+
+        if not any(shifts):
+            return
+
+        for node in chain((obj for obj in itervalues(self.objs)
+                           if isinstance(obj, GuerillaNode)),
+                          self._implicit_nodes):
+
+            offset = node._source_offset
+
+            if offset is not None:
+                node._source_offset = offset + shifts[
+                    bisect_right(starts, offset) - 1]
+
+            if node._plug_dict is None:
+                continue
+
+            for plug in itervalues(node._plug_dict):
+
+                offset = plug._source_offset
+
+                if offset is not None:
+                    plug._source_offset = offset + shifts[
+                        bisect_right(starts, offset) - 1]
+
+                offset = plug._input_source_offset
+
+                if offset is not None:
+                    plug._input_source_offset = offset + shifts[
+                        bisect_right(starts, offset) - 1]
+
+    def __apply_update(self, plan):
+        """Patch graph with given changes, see :meth:`__plan_update()`.
+
+        :param plan: Changes to apply.
+        :type plan: _UpdatePlan
+        """
+        self.__shift_offsets(plan.equal_blocks)
+
+        for doc_format_rev in plan.doc_format_revs:
+            self.__doc_format_rev = doc_format_rev
+
+        for node, record in plan.node_creates:
+            node._source_offset = record[1]
+
+        for plug, record in plan.plug_creates:
+
+            flag, plug_type, param, value = record[7]
+
+            plug.flag = flag
+            plug._param = param
+            plug._set_raw_value(value, _plug_type_decoders[plug_type])
+            plug._source_offset = record[1]
+
+        for in_plug in plan.disconnected_plugs:
+
+            in_plug.input._remove_output(in_plug)
+            in_plug.input = None
+            in_plug._input_source_offset = None
+
+        for plug in plan.removed_plugs:
+            plug.parent._remove_plug(plug)
+
+        for plug, record in plan.set_changes:
+
+            plug.org_value = record[5]
+            plug._set_raw_value(record[5], self._lua_to_py_value)
+            plug._source_offset = record[1]
+
+        for node, record in plan.set_adds:
+
+            plug = GuerillaPlug(record[4], 'Plug', node, record[5],
+                                org_value=record[5],
+                                value_decoder=self._lua_to_py_value)
+
+            plug._source_offset = record[1]
+
+        for node in plan.reordered_nodes:
+
+            plugs = sorted(itervalues(node._plug_dict),
+                           key=lambda plug: plug._source_offset)
+
+            node._plug_dict = dict((plug.name, plug) for plug in plugs)
+
+        for record in plan.connects:
+
+            offset = record[1]
+
+            out_node, in_node = self.__connected_nodes(record)
+
+            out_plug = out_node.get_plug(record[7])
+            in_plug = in_node.get_plug(record[4])
+
+            # outputs are ordered by connection offset
+            outputs = out_plug._outputs or []
+
+            i = len(outputs)
+
+            while i and outputs[i - 1]._input_source_offset > offset:
+                i -= 1
+
+            if i == len(outputs):
+                out_plug._add_output(in_plug)
+            else:
+                outputs.insert(i, in_plug)
+
+            in_plug.input = out_plug
+            in_plug._input_source_offset = offset
+
+    @property
+    def root(self):
+        """Root node (top node of the parsed file).
+
+        On standard .gproject files, root node is the `Document`.
+
+        :return: Root node.
+        :rtype: GuerillaNode
+        """
+        return self.objs[1]
+
+    @property
+    def doc_format_rev(self):
+        """Document format revision.
+
+        :return: Document format revision.
+        :rtype: int
+        :raises AttributeError: If no document format revision is present in
+            file.
+        """
+        if self.__doc_format_rev is None:
+            raise AttributeError("Missing doc format revision")
+
+        return self.__doc_format_rev
+
+    @classmethod
+    def __recursive_node(cls, node):
+        """Macro to recursively iterate over children of given `node`
+
+        :param node: Node to iterate into children.
+        :type node: GuerillaNode
+        :rtype: collections.iterator[GuerillaNode]
+        """
+        for child in node._children or ():
+
+            yield child
+
+            for sub_child in cls.__recursive_node(child):
+
+                yield sub_child
+
+    @property
+    def nodes(self):
+        """Recursively iterate over nodes of the gproject file (except root
+        node).
+
+        :return: Generator of nodes of the parsed Guerilla file.
+        :rtype: collections.iterator[GuerillaNode]
+        """
+        for node in self.__recursive_node(self.root):
+
+            yield node
+
+    @property
+    def plugs(self):
+        """Iterate over plugs of the gproject file.
+
+        :return: Generator of plugs of the parsed Guerilla file.
+        :rtype: collections.iterator[GuerillaPlug]
+        """
+        for node in self.nodes:
+            for plug in node.plugs:
+                yield plug
+
+    @property
+    def graph(self):
+        """Connection and dependency graph of parsed plugs and nodes, built
+        on first access.
+
+        Graph is built from plug connections and from graph links stored
+        while parsing: ``depend`` commands and ``connect`` commands
+        referencing plugs by their id (like expression node plugs), which
+        don't set :attr:`GuerillaPlug.input`.
+
+        :Example:
+
+        >>> plug = p.path_to_plug('|RenderGraph|Output.Input')
+        >>> upstream_plugs = p.graph.upstream(plug)
+
+        :return: Connection and dependency graph.
+        :rtype: GuerillaGraph
+        """
+        if self.__graph is None:
+            self.__graph = GuerillaGraph(self.__iter_graph_edges())
+
+        return self.__graph
+
+    def __iter_graph_edges(self):
+        """Iterate over plug connections and graph links, nodes being walked
+        depth-first so graph doesn't depend on how it has been built.
+
+        :return: Generator of output and input plugs (or nodes, for node
+            links).
+        :rtype: collections.iterator[(GuerillaPlug|GuerillaNode,
+            GuerillaPlug|GuerillaNode)]
+        """
+        stack = self.__root_nodes()[::-1]
+
+        while stack:
+
+            node = stack.pop()
+
+            for plug in node.plugs:
+                for output in plug._outputs or ():
+                    yield plug, output
+
+            if node._children is not None:
+                stack.extend(reversed(node._children))
+
+        for out_node, out_plug_name, in_node, in_plug_name in self.__links:
+
+            yield (self.__link_end(out_node, out_plug_name),
+                   self.__link_end(in_node, in_plug_name))
+
+    @staticmethod
+    def __link_end(node, plug_name):
+        """Return plug of given graph link end, or node if plug is not
+        referenced or doesn't exist (node dependency).
+
+        :type node: GuerillaNode
+        :type plug_name: str
+        :rtype: GuerillaPlug|GuerillaNode
+        """
+        if plug_name is None or node._plug_dict is None:
+            return node
+
+        return node._plug_dict.get(plug_name, node)
+
+    @staticmethod
+    def __iter_chunk_offsets(chunks):
+        """Macro to iterate over given content chunks with their offset in
+        the whole content.
+
+        :param chunks: Guerilla file content, as chunks of complete lines.
+        :type chunks: collections.iterable[str]
+        :rtype: collections.iterator[(str, int)]
+        """
+        offset = 0
+
+        for chunk in chunks:
+
+            yield chunk, offset
+
+            offset += len(chunk)
+
+    @staticmethod
+    def __keep_chunks(chunks, kept_chunks):
+        """Macro to store each chunk of given iterable in `kept_chunks` list
+        while they are iterated.
+
+        :param chunks: Chunks of Guerilla file content.
+        :type chunks: collections.iterator[str]
+        :param kept_chunks: List to append iterated chunks to.
+        :type kept_chunks: list[str]
+        :rtype: collections.iterator[str]
+        """
+        for chunk in chunks:
+
+            kept_chunks.append(chunk)
+
+            yield chunk
+
+    def __parse_nodes(self, chunks, workers=None):
+        """Parse commands in Guerilla file.
+
+        Chunks are tokenized (see :data:`_tokenize`), in worker
+        processes if `workers` is more than one, then command records are
+        linked together sequentially.
+
+        :param chunks: Guerilla file content, as chunks of complete lines.
+        :type chunks: collections.iterable[str]
+        :param workers: Number of worker processes tokenizing chunks.
+        :type workers: int
+        """
+        self.__link_records(self.__iter_records(chunks, workers))
+
+    @classmethod
+    def __str_chunks(cls, content, workers=None):
+        """Return given `content` as chunks of lines to tokenize.
+
+        Content is split only when tokenized in parallel.
+
+        :param content: Guerilla file content.
+        :type content: str
+        :param workers: Number of worker processes tokenizing chunks.
+        :type workers: int
+        :rtype: collections.iterable[str]
+        """
+        if workers and workers > 1:
+            return iter_str_line_chunks(content, cls._PARALLEL_CHUNK_SIZE)
+        else:
+            return content,
+
+    @classmethod
+    def __iter_records(cls, chunks, workers=None):
+        """Macro to iterate over command records of given content chunks.
+
+        :param chunks: Guerilla file content, as chunks of complete lines.
+        :type chunks: collections.iterable[str]
+        :param workers: Number of worker processes tokenizing chunks, chunks
+            are tokenized in current process if `None` or 1.
+        :type workers: int
+        :return: Command records, see :func:`_tokenize_chunk()`.
+        :rtype: collections.iterator[tuple]
+        """
+        chunk_offsets = cls.__iter_chunk_offsets(chunks)
+
+        if not workers or workers <= 1:
+
+            for chunk_offset in chunk_offsets:
+                for record in _tokenize(chunk_offset):
+                    yield record
+
+            return
+
+        pool = multiprocessing.Pool(workers)
+
+        try:
+            for records in pool.imap(_tokenize, chunk_offsets):
+                for record in records:
+                    yield record
+
+            pool.close()
+
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def __root_nodes(self):
+        """Return nodes without parent.
+
+        :rtype: list[GuerillaNode]
+        """
+        return [obj for obj in itervalues(self.objs)
+                if isinstance(obj, GuerillaNode) and obj.parent is None]
+
+    def __time_implicit_nodes(self):
+        """Record implicit node creation time in :attr:`parse_stats`.
+
+        Timed function overrides :meth:`__create_and_get_implicit_node()` on
+        this instance only, so parsing without stats is untouched.
+        """
+        create_and_get_implicit_node = self.__create_and_get_implicit_node
+
+        stats = self.parse_stats
+
+        def timed(start_node, path):
 
-    @property
-    def has_changed(self):
-        """Return if current parsed file has changed.
+            start = default_timer()
 
-        A parsed file can be changed using :meth:`set_plug_value()` method.
+            try:
+                return create_and_get_implicit_node(start_node, path)
+            finally:
+                stats.implicit_node_time += default_timer() - start
 
-        :return: True if both parser instance have same modified content.
-        :rtype: bool
-        """
-        # no modified content mean we didn't tried to modified it
-        if self.__mod_content is None:
-            return False
-        else:
-            return self.__org_content != self.__mod_content
+        self.__create_and_get_implicit_node = timed
 
-    @property
-    def modified_content(self):
-        """Modified parsed Guerilla file content.
+    def __profile_records(self, records):
+        """Macro to iterate over given command records, recording tokenize,
+        link and value conversion times in :attr:`parse_stats`.
 
-        A parsed file can be changed using :meth:`set_plug_value()` method.
+        Records are tokenized while iterated and linked between two
+        iterations, so no timer is needed in the link loop. Values of plugs
+        created by linked command are then converted.
 
-        :return: Modified parsed Guerilla file content.
-        :rtype: str
+        :param records: Command records, see :func:`_tokenize_chunk()`.
+        :type records: collections.iterable[tuple]
+        :rtype: collections.iterator[tuple]
         """
-        if self.__mod_content is None:
-            return self.__org_content
+        stats = self.parse_stats
 
-        else:
-            return self.__mod_content
+        clock = default_timer
 
-    @property
-    def original_content(self):
-        """Original (unmodified) parsed Guerilla file content.
+        end = clock()
 
-        :return: Original (unmodified) parsed Guerilla file content.
-        :rtype: str
-        """
-        return self.__org_content
+        for record in records:
 
-    def write(self, path):
-        """Write modified content to given file `path`.
+            stats.tokenize_time += clock() - end
 
-        :param path: File path to write modified content in.
-        :type path: str
-        """
-        with open(path, 'w') as f:
-            f.write(self.modified_content)
+            kind = record[0]
 
-    @property
-    def root(self):
-        """Root node (top node of the parsed file).
+            if kind == 'create':
+                kind = 'create plug' if record[3] in plug_class_names \
+                    else 'create node'
 
-        On standard .gproject files, root node is the `Document`.
+            implicit_node_time = stats.implicit_node_time
 
-        :return: Root node.
-        :rtype: GuerillaNode
-        """
-        return self.objs[1]
+            start = clock()
 
-    @property
-    def doc_format_rev(self):
-        """Document format revision.
+            yield record
 
-        :return: Document format revision.
-        :rtype: int
-        :raises AttributeError: If no document format revision is present in
-            file.
-        """
-        if self.__doc_format_rev is None:
-            raise AttributeError("Missing doc format revision")
+            end = clock()
 
-        return self.__doc_format_rev
+            stats._add_command(kind, end - start - (
+                stats.implicit_node_time - implicit_node_time))
 
-    @classmethod
-    def __recursive_node(cls, node):
-        """Macro to recursively iterate over children of given `node`
+            if kind == 'create plug' or kind == 'set':
 
-        :param node: Node to iterate into children.
-        :type node: GuerillaNode
-        :rtype: collections.iterator[GuerillaNode]
+                plug = self.__linked_plug(record)
+
+                if plug is not None:
+                    stats._time_value(record[7][1] if kind == 'create plug'
+                                      else 'set()', plug)
+
+                    end = clock()
+
+    def __linked_plug(self, record):
+        """Return plug created by given linked ``create`` or ``set`` command
+        record, `None` if skipped.
+
+        :param record: Command record, see :func:`_tokenize_chunk()`.
+        :type record: tuple
+        :rtype: GuerillaPlug|None
         """
-        for child in node.children:
+        if record[0] == 'create':
 
-            yield child
+            plug = self.objs.get(record[2])
 
-            for sub_child in cls.__recursive_node(child):
+            return plug if isinstance(plug, GuerillaPlug) else None
 
-                yield sub_child
+        _, offset, oid, path, plug_name, _ = record
 
-    @property
-    def nodes(self):
-        """Recursively iterate over nodes of the gproject file (except root
-        node).
+        node = self.objs.get(oid)
 
-        :return: Generator of nodes of the parsed Guerilla file.
-        :rtype: collections.iterator[GuerillaNode]
-        """
-        for node in self.__recursive_node(self.root):
+        if node is not None and path:
+            node = self.__implicit_node_cache.get((node, path))
 
-            yield node
+        if node is None or node._plug_dict is None:
+            return None
 
-    @property
-    def plugs(self):
-        """Iterate over plugs of the gproject file.
+        plug = node._plug_dict.get(plug_name)
 
-        :return: Generator of plugs of the parsed Guerilla file.
-        :rtype: collections.iterator[GuerillaPlug]
-        """
-        for node in self.nodes:
-            for plug in node.plugs:
-                yield plug
+        # plug can be an older one if command has been skipped
+        if plug is None or plug.source_offset != offset:
+            return None
 
-    @staticmethod
-    def __clean_path(path):
-        """Clean node path.
+        return plug
 
-        "|foo|sphereShape\\\\$" -> "|foo|sphereShape$"
-        "|bar|clous\\\\[1\\\\]" -> "|foo|clous[1]"
-        """
-        return re.sub(r'\\\\(.)', r'\g<1>', path)
+    def __link_records(self, records):
+        """Create nodes and plugs from given command records, resolving
+        object ids, parents and implicit nodes.
 
-    def __parse_nodes(self):
-        """Parse commands in Guerilla file.
+        :param records: Command records, see :func:`_tokenize_chunk()`.
+        :type records: collections.iterable[tuple]
         """
+        if self.parse_stats is not None:
+            records = self.__profile_records(records)
+
+        hooks = self.__hooks
+
         self.objs = {}
 
-        for match in self._LINE_PARSE.finditer(self.original_content):
+        for record in records:
 
-            cmd = match.group('cmd')
-            args = match.group('args')
+            cmd = record[0]
 
             if cmd in 'docformatrevision':
 
-                self.__doc_format_rev = int(args)
+                self.__doc_format_rev = record[2]
 
-            elif cmd in ('create', 'createnotref'):
+            elif cmd == 'create':
                 ###############################################################
                 # create
                 ###############################################################
-                oid = int(match.group('oid'))
-
-                match_arg = self._CMD_CREATE_ARG_PARSE.match(args)
-
-                type_ = match_arg.group('type')
-                parent = match_arg.group('parent')
-                name = match_arg.group('name')
-
-                if name is None:
-                    name = match_arg.group('name_number')
-                    if name is not None:  # we have something !
-                        name = int(name)  # let's convert it to int
+                (_, offset, oid, type_, name,
+                 parent_id, parent_path, rest) = record
 
-                if name is None:
-                    name = ""
-
-                # unescaped node names
-                if isinstance(name, str):
-                    name = re.sub(r'\\(.)', r'\g<1>', name)
-
-                if parent in (r'\"\"', ''):  # GADocument or root
+                if parent_id is None:  # GADocument or root
                     parent = None
                 else:
-                    parent_match_grp = self._PARENT_PARSE.match(parent)
-                    parent_id = int(parent_match_grp.group('id'))
-                    parent_path = parent_match_grp.group('path')
+                    if self.__filtered and parent_id in self.__skipped_oids:
+                        self.__skipped_oids.add(oid)
+                        continue
 
                     parent = self.objs[parent_id]
 
                     if parent_path:
-                        parent_path = self.__clean_path(parent_path)
                         parent = self.__create_and_get_implicit_node(
                             parent, parent_path)
 
+                        if parent is None:  # implicit node has been skipped
+                            self.__skipped_oids.add(oid)
+                            continue
+
                 if type_ in plug_class_names:
                     assert not isinstance(name, int), (type(name), name)
                     ###########################################################
                     # Plugs
                     ###########################################################
-                    rest = match_arg.group('rest')
-
-                    match_rest = self._CREATE_PLUG_REST_PARSE.match(rest)
-
-                    flag = int(match_rest.group('flag'))
-                    plug_type = match_rest.group('type')
-                    param = match_rest.group('param')
-                    value = match_rest.group('value')
-
-                    # convert value to python type
-                    if plug_type in parse_type_string:
-                        value = str(value)
-                    elif plug_type in parse_type_float_with_param:
-                        # value = float(value)
-                        try:
-                            value = float(value)
-                        except ValueError:
-                            pass  # leave the value as float
-                        if param is not None:
-                            param = self.__lua_dict_to_python(param)
-                    elif plug_type == 'types.bool':
-                        value = self._LUA_TO_PY_BOOL[value]
-                    elif plug_type == 'types.int':
-                        value = int(value)
-                        if param is not None:
-                            param = self.__lua_dict_to_python(param)
-                    elif plug_type in parse_type_tuple:
-                        # "{1,0.5,0.5}" to (1,0.5,0.5)
-                        value = eval(value.replace('{', '(').replace('}', ')'))
-                    elif plug_type == 'types.enum':
-                        value = str(value[1:-1])
-                        # '{{"Enabled","enable"},{"Disabled","disable"}}'
-                        # '{{"Distant","distant"},{"Directional","directional"}}'
-                        # TODO
-                        param = {}
-                    elif plug_type in parse_type_set:
-                        # "Diffuse,-Reflection,-Refraction,Shadows"
-                        value = set((s.replace(' ', '')
-                                     for s in value[1:-1].split(',')))
-                    elif plug_type == 'LUIPSTypeInt':
-                        if value == 'nil':
-                            # Tested in Guerilla 2.1, a 'nil' int value return
-                            # None. So we reproduce this behavior here
-                            value = None
-                        else:
-                            value = int(value)
-                    elif plug_type in parse_type_float:
-                        value = float(value)
-                    elif plug_type in parse_type_double_quoted_str:
-                        value = value[1:-1]
-                    elif plug_type == 'types.combo':
-                        # {"color","coordinates","density","fallof","fuel","pressure","temperature","velocity"},"density"
-                        # TODO
-                        param = {}
-                    elif plug_type == 'types.multistring':
-                        value = value[1:-1].split('\\010')
-                        param = self.__lua_dict_to_python(param)
-                    elif plug_type == 'types.text':
-                        value = value[1:-1].replace('\\010', '\n')
-                    elif plug_type == 'types.lightcategory':
-                        value = value[1:-1].replace('\\010', '\n')
-                    else:
-                        assert False, args
-
-                    # convert param to python dict
-                    if any((param == '{}',
-                            param is None)):
-                        param = {}
-
-                    assert isinstance(param, dict), param
-
-                    plug = GuerillaPlug(name, type_, parent, value, flag)
+                    if self.__filtered and \
+                            not self.__is_plug_selected(parent, name):
+                        self.__skipped_oids.add(oid)
+                        continue
+
+                    flag, plug_type, param, value = rest
+
+                    # value is converted to python type on first access
+                    decoder = _plug_type_decoders.get(plug_type)
+
+                    assert decoder is not None, plug_type
+
+                    plug = GuerillaPlug(name, type_, parent, value, flag,
+                                        value_decoder=decoder, param=param)
+
+                    plug._source_offset = offset
 
                     assert oid not in self.objs, oid
 
                     self.objs[oid] = plug
 
+                    if hooks is not None:
+                        hooks.on_create(plug, offset)
+
                 else:
                     ###########################################################
                     # Nodes
                     ###########################################################
+                    if self.__filtered:
+                        selected = self.__select_node(parent, name, type_)
+
+                        if selected is None:
+                            self.__skipped_oids.add(oid)
+                            continue
+
                     node = GuerillaNode(oid, name, type_, parent)
 
+                    node._source_offset = offset
+
+                    if self.__filtered and not selected:
+                        self.__structure_nodes.add(node)
+
                     assert oid not in self.objs, oid
 
                     self.objs[oid] = node
 
+                    if hooks is not None:
+                        hooks.on_create(node, offset)
+
                     if type_ == 'ArchReference':
                         #######################################################
                         # ArchReference
                         #######################################################
-                        rest = match_arg.group('rest')
-
-                        match_rest = self._CREATE_REF_REST_PARSE.match(rest)
-
-                        path = match_rest.group('path')
-                        param = match_rest.group('param')
-
-                        GuerillaPlug('ReferenceFileName', 'Plug', node, path)
-
-                if self.diagnose:
-                    if node.id == 1:
-                        node_path = ""
-                    else:
-                        node_path = node.path
-                    print(("Create '{node_path}' "
-                           "'{node.type}'").format(**locals()))
+                        if not self.__filtered or self.__is_plug_selected(
+                                node, 'ReferenceFileName'):
+                            GuerillaPlug('ReferenceFileName', 'Plug', node,
+                                         rest)
 
             elif cmd == 'set':
                 ###############################################################
                 # set
                 ###############################################################
-                match_arg = self._CMD_SET_ARG_PARSE.match(args)
+                _, offset, oid, path, plug_name, org_value = record
 
-                oid = int(match_arg.group('id'))
-                path = match_arg.group('path')
-                plug_name = match_arg.group('plug')
-                org_value = match_arg.group('value')
-
-                value = self._lua_to_py_value(org_value)
+                if self.__filtered and oid in self.__skipped_oids:
+                    continue
 
                 node = self.objs[oid]
 
                 if path:
-                    path = self.__clean_path(path)
                     node = self.__create_and_get_implicit_node(node, path)
 
-                GuerillaPlug(plug_name, 'Plug', node, value,
-                             org_value=org_value)
+                if self.__filtered and (
+                        node is None or
+                        not self.__is_plug_selected(node, plug_name)):
+                    continue
+
+                # value is converted to python type on first access
+                plug = GuerillaPlug(plug_name, 'Plug', node, org_value,
+                                    org_value=org_value,
+                                    value_decoder=self._lua_to_py_value)
 
-                if self.diagnose:
-                    if node.id == 1:
-                        node_path = ""
-                    else:
-                        node_path = node.path
-                    print(('Set: {node_path}.{plug_name} -> '
-                           '{value}').format(**locals()))
+                plug._source_offset = offset
+
+                if hooks is not None:
+                    hooks.on_set(plug, offset)
 
             elif cmd == 'connect':
                 ###############################################################
                 # connect
                 ###############################################################
-                match_arg = self._CMD_CONNECT_ARG_PARSE.match(args)
-
-                in_oid = int(match_arg.group('in_id'))
-                in_path = match_arg.group('in_path')
-                in_plug_name = match_arg.group('in_plug')
+                (_, offset, in_oid, in_path, in_plug_name,
+                 out_oid, out_path, out_plug_name, args) = record
 
-                out_oid = int(match_arg.group('out_id'))
-                out_path = match_arg.group('out_path')
-                out_plug_name = match_arg.group('out_plug')
+                if self.__filtered and (in_oid in self.__skipped_oids or
+                                        out_oid in self.__skipped_oids):
+                    continue
 
                 in_node = self.objs[in_oid]
 
-                if out_oid is 0 and 0 not in self.objs:
+                if out_oid == 0 and 0 not in self.objs:
                     # 0 is a special value referencing root document, we have a
                     # glayer trying to connect to document root attribute, we
                     # don't support this.
@@ -550,29 +2584,27 @@ class GuerillaParser(object):
                 out_node = self.objs[out_oid]
 
                 if in_path:
-                    in_path = self.__clean_path(in_path)
                     in_node = self.__create_and_get_implicit_node(in_node,
                                                                   in_path)
 
                 if out_path:
-                    out_path = self.__clean_path(out_path)
                     out_node = self.__create_and_get_implicit_node(out_node,
                                                                    out_path)
 
-                if not out_path and not out_plug_name:
-                    # output is in the form "$64", an expression node
-                    if _print_expression_node_connection:
-                        print(out_node.type, out_node.path, '->',
-                              in_node.type, in_node.path, in_plug_name)
-                    # TODO: support when output is $64-like
+                if in_node is None or out_node is None:  # skipped
                     continue
 
-                if not in_path and not in_plug_name:
-                    # same here for inputs
+                if not (out_path or out_plug_name) or \
+                        not (in_path or in_plug_name):
+                    # output or input is in the form "$64", a plug (of an
+                    # expression node mostly) referenced by its id, only
+                    # stored as a graph link
                     if _print_expression_node_connection:
-                        print(in_node.type, in_node.path, '->',
-                              in_node.type, in_node.path, in_plug_name)
-                    # TODO: support when input is $64-like
+                        print(out_node.type, out_node.path, out_plug_name,
+                              '->', in_node.type, in_node.path, in_plug_name)
+
+                    self.__add_link(out_node, out_plug_name,
+                                    in_node, in_plug_name)
                     continue
 
                 # document is referencing a plug by its id, this mean a plug
@@ -589,86 +2621,99 @@ class GuerillaParser(object):
                 assert in_plug_name is not None
                 assert out_plug_name is not None
 
+                if self.__filtered and not (
+                        self.__is_plug_selected(in_node, in_plug_name) and
+                        self.__is_plug_selected(out_node, out_plug_name)):
+                    continue
+
                 try:
-                    in_plug = in_node.plug_dict[in_plug_name]
+                    in_plug = in_node.get_plug(in_plug_name)
                 except KeyError:
                     in_plug = GuerillaPlug(in_plug_name, 'Plug', in_node)
 
                 try:
-                    out_plug = out_node.plug_dict[out_plug_name]
+                    out_plug = out_node.get_plug(out_plug_name)
                 except KeyError:
                     out_plug = GuerillaPlug(out_plug_name, 'Plug', out_node)
 
                 assert in_plug.input is None, in_plug_name
 
                 # p1.out -> p2.in
-                out_plug.outputs.append(in_plug)
+                out_plug._add_output(in_plug)
                 in_plug.input = out_plug
+                in_plug._input_source_offset = offset
 
-                if self.diagnose:
-                    if out_node.id == 1:
-                        out_node_path = ""
-                    else:
-                        out_node_path = out_node.path
-                    if in_node.id == 1:
-                        in_node_path = ""
-                    else:
-                        in_node_path = in_node.path
-                    print(('Connect: {out_node_path}.{out_plug_name} -> '
-                           '{in_node_path}.{in_plug_name}').format(**locals()))
+                if hooks is not None:
+                    hooks.on_connect(out_plug, in_plug, offset)
 
             elif cmd == 'depend':
                 ###############################################################
                 # depend
                 ###############################################################
-                match_arg = self._CMD_DEPEND_ARG_PARSE.match(args)
-
-                in_oid = int(match_arg.group('in_id'))
-                in_path = match_arg.group('in_path')
-                in_plug_name = match_arg.group('in_plug')
-
-                out_oid = int(match_arg.group('out_id'))
-                out_path = match_arg.group('out_path')
-                out_plug_name = match_arg.group('out_plug')
+                (_, offset, in_oid, in_path, in_plug_name,
+                 out_oid, out_path, out_plug_name, args) = record
 
                 # Some .grendergraph/.glayer files attempts to connect to
                 # Guerilla root node. This node doesn't exists in the context
                 # of parsing:
                 # depend("$17.Out","$0|Preferences.ShutterClose")
-                if out_oid is 0 and 0 not in self.objs:
+                if out_oid == 0 and 0 not in self.objs:
                     print(("Trying to depends on document reference "
                            "'{args}'").format(**locals()))
                     continue
 
+                if self.__filtered and (in_oid in self.__skipped_oids or
+                                        out_oid in self.__skipped_oids):
+                    continue
+
                 in_node = self.objs[in_oid]
                 out_node = self.objs[out_oid]
 
                 if in_path:
-                    in_path = self.__clean_path(in_path)
                     in_node = self.__create_and_get_implicit_node(in_node,
                                                                   in_path)
 
                 if out_path:
-                    out_path = self.__clean_path(out_path)
                     out_node = self.__create_and_get_implicit_node(out_node,
                                                                    out_path)
 
-                if self.diagnose:
-                    if out_node.id == 1:
-                        out_node_path = ""
-                    else:
-                        out_node_path = out_node.path
-                    if in_node.id == 1:
-                        in_node_path = ""
-                    else:
-                        in_node_path = in_node.path
-                    print(('Depend: {out_node_path}.{out_plug_name} -> '
-                           '{in_node_path}.{in_plug_name}').format(**locals()))
+                if in_node is None or out_node is None:  # skipped
+                    continue
+
+                if hooks is not None:
+                    hooks.on_depend(out_node, out_plug_name, in_node,
+                                    in_plug_name, offset)
+
+                self.__add_link(out_node, out_plug_name,
+                                in_node, in_plug_name)
 
-                # TODO: For now, dependencies are not supported
+            else:
+
+                if hooks is not None:
+                    hooks.on_unknown(cmd, record[1])
+
+                if _print_unknown_command:
+                    print("Unknown command '{cmd}'".format(**locals()))
+
+    def __add_link(self, out_obj, out_plug_name, in_obj, in_plug_name):
+        """Macro to add a graph link, see :attr:`graph`.
 
-            elif _print_unknown_command:
-                print("Unknown command '{cmd}'".format(**locals()))
+        :param out_obj: Output node, or plug referenced by its id.
+        :type out_obj: GuerillaNode|GuerillaPlug
+        :param out_plug_name: Output plug name, `None` if not referenced.
+        :type out_plug_name: str
+        :param in_obj: Input node, or plug referenced by its id.
+        :type in_obj: GuerillaNode|GuerillaPlug
+        :param in_plug_name: Input plug name, `None` if not referenced.
+        :type in_plug_name: str
+        """
+        if isinstance(out_obj, GuerillaPlug):
+            out_obj, out_plug_name = out_obj.parent, out_obj.name
+
+        if isinstance(in_obj, GuerillaPlug):
+            in_obj, in_plug_name = in_obj.parent, in_obj.name
+
+        self.__links.append((out_obj, out_plug_name, in_obj, in_plug_name))
 
     def __create_and_get_implicit_node(self, start_node, path):
         """Macro to recursively create implicit nodes from given `path`
@@ -686,7 +2731,8 @@ class GuerillaParser(object):
         :type start_node: GuerillaNode
         :param path:
         :type path: str
-        :return:
+        :return: Implicit node, `None` if it has been skipped by node
+            selection.
         :rtype: GuerillaNode
         """
         # get in the cache for full path first
@@ -714,39 +2760,92 @@ class GuerillaParser(object):
                                                             cur_path)]
             except KeyError:
 
-                implicit_node = GuerillaNode(-1, name, 'UNKNOWN', cur_parent)
+                selected = True
 
-                self._implicit_nodes.append(implicit_node)
+                if self.__filtered:
+                    selected = self.__select_node(cur_parent, name, 'UNKNOWN')
+
+                if selected is None:
+                    implicit_node = None
+                else:
+                    implicit_node = GuerillaNode(-1, name, 'UNKNOWN',
+                                                 cur_parent)
+
+                    self._implicit_nodes.append(implicit_node)
+
+                    if not selected:
+                        self.__structure_nodes.add(implicit_node)
 
                 # store it in the cache
                 self.__implicit_node_cache[(start_node, cur_path)] = \
                     implicit_node
 
+            if implicit_node is None:  # skipped by node selection
+                return None
+
             # prepare next iteration
             cur_parent = implicit_node
 
         # we now have our implicit node
         return cur_parent
 
-    @staticmethod
-    def __lua_dict_to_python(lua_dict_str):
-        """Convert given lua table representation to python dict.
+    def __select_node(self, parent, name, type_):
+        """Return if node to create with given `parent`, `name` and `type_`
+        is selected by node filters.
+
+        :param parent: Parent of the node to create.
+        :type parent: GuerillaNode
+        :param name: Name of the node to create.
+        :type name: str|int
+        :param type_: Type of the node to create.
+        :type type_: str
+        :return: `True` if node is selected, `False` if node is only needed
+            to reach a selected path, `None` if node must be skipped.
+        :rtype: bool|None
+        """
+        if not (self.__node_types or self.__path_prefixes):
+            return True  # no node filter
 
-        "{foo=1,bar=2}" -> {'foo': 1, 'bar': 2}
-        {min=0,max=16} to {'min': 0, max': 16}
-        {slidermax=4,min=0} to {'slidermax': 4, 'min': 0}
+        if parent is not None and parent not in self.__structure_nodes:
+            return True  # we are inside a selected subtree
 
-        :param lua_dict_str: Lua table representation to convert in python.
-        :type lua_dict_str: str
-        :return: Lua table representation converted to python dict.
-        :rtype: dict
+        if type_ in self.__node_types:
+            return True
+
+        if parent is None:
+            return False  # root node is always created
+
+        if parent.parent is None:
+            parent_path = ""
+        else:
+            parent_path = parent.path
+
+        path = '|'.join((parent_path, node_name_to_path_name(name)))
+
+        for prefix in self.__path_prefixes:
+            if path == prefix or path.startswith(prefix + '|'):
+                return True
+
+        for prefix in self.__path_prefixes:
+            if prefix.startswith(path + '|'):
+                return False
+
+        return None
+
+    def __is_plug_selected(self, node, name):
+        """Return if plug with given `name` on given `node` is selected by
+        node and plug filters.
+
+        :param node: Plug node.
+        :type node: GuerillaNode
+        :param name: Plug name.
+        :type name: str
+        :rtype: bool
         """
-        # reformat
-        lua_dict_str = re.sub(r'([a-zA-Z0-9_-]+)=([a-zA-Z0-9_-]+)',
-                              r"'\g<1>':\g<2>",
-                              lua_dict_str)
-        # and eval as python expression
-        return eval(lua_dict_str.replace('=', ':'))
+        if node in self.__structure_nodes:
+            return False
+
+        return self.__plug_names is None or name in self.__plug_names
 
     @staticmethod
     def _lua_to_py_value(raw_str):
@@ -755,7 +2854,7 @@ class GuerillaParser(object):
         :param raw_str: Raw string representing lua value to convert to python.
         :type raw_str: str
         :return: Value converted from lua to python.
-        :rtype: bool|float|list[float]|str
+        :rtype: bool|float|list|dict|str
         """
         if raw_str == 'true':
 
@@ -785,6 +2884,14 @@ class GuerillaParser(object):
             # eg. NodePos, PreClamp, PostClamp, Value, etc.
             return [float(v) for v in raw_str[1:-1].split(',')]
 
+        elif raw_str[0] == '{' and raw_str[-1] == '}':
+
+            # other tables: {}, {"foo","bar"}, {min=0,max=1}, etc.
+            try:
+                return parse_value(raw_str)
+            except ValueError:
+                pass
+
             # TODO: "matrix.create" and "transform.create" are not supported yet
             # because we loose the matrix.create and transform.create
             # information when setting plug values
@@ -860,14 +2967,22 @@ class GuerillaParser(object):
 
         elif type(value) is list:
 
+            if not value:
+                return '{}'
+
             res = ['{']
 
             for v in value:
 
-                if cls.__is_float_intable(v):
-                    v = int(v)
+                if type(v) in (int, float):
+
+                    if cls.__is_float_intable(v):
+                        v = int(v)
+
+                    res += [str(v), ',']
 
-                res += [str(v), ',']
+                else:
+                    res += [cls._py_to_lua_value(v), ',']
 
             res.pop()  # remove latest ","
 
@@ -875,15 +2990,63 @@ class GuerillaParser(object):
 
             return "".join(res)
 
+        elif type(value) is dict:
+
+            res = []
+
+            for k, v in iteritems(value):
+
+                if type(k) is not str:
+                    k = '[{}]'.format(k)
+
+                res.append('{}={}'.format(k, cls._py_to_lua_value(v)))
+
+            return '{' + ','.join(res) + '}'
+
         else:
             print(("Missing python to lua conversion "
                    "'{value}'").format(**locals()))
 
         return value
 
+    def build_path_index(self):
+        """Build (or rebuild) node path index used by :meth:`path_to_node()`.
+
+        Index is built on first :meth:`path_to_node()` call. Entries of
+        renamed nodes are found outdated when looked up, then replaced by a
+        walk from root node. Like a walk from root node, a path shared by
+        many siblings gives the first one.
+        """
+        path_index = {}
+
+        for node in self.nodes:
+            path_index.setdefault(node.path, node)
+
+        self.__path_index = path_index
+
+    def __get_path_index(self):
+        """Return node path index, building it if needed (see `index_paths`
+        parser argument).
+
+        :return: Node per absolute path, `None` if paths are not indexed.
+        :rtype: dict[str, GuerillaNode]
+        """
+        if self.__path_index is None and self.__index_paths is not False:
+            self.build_path_index()
+
+        return self.__path_index
+
+    def clear_path_index(self):
+        """Clear node path index, see :meth:`build_path_index()`.
+        """
+        self.__path_index = None
+
     def path_to_node(self, path):
         """Find and return node at given `path`.
 
+        Absolute paths are found from a node path index, built on first
+        call (see `index_paths` parser argument).
+
         :Example:
 
         >>> p.path_to_node('|foo|bar|bee')
@@ -903,6 +3066,23 @@ class GuerillaParser(object):
 
         # find first node of the path
         if path.startswith('|'):  # "|foo|bar|bee" like
+
+            path_index = self.__get_path_index()
+
+            if path_index is not None:
+
+                node = path_index.get(path)
+
+                # node (or a parent) can have been renamed since indexed
+                if node is not None:
+
+                    if node.path == path:
+                        return node
+
+                    del path_index[path]
+
+                # not indexed, let's find it
+
             cur_node = self.root  # absolute path
 
         elif path.startswith('$'):  # "$65|bar|bee"
@@ -915,18 +3095,99 @@ class GuerillaParser(object):
         # find node for each name in path:
         # "|foo|bar|bee" -> look for "foo" in document children, then "bar" in
         # "foo" children, etc.
-        for path_node_name in re.split(r'(?<!\\)\|', path)[1:]:
+        for path_node_name in self._split_path(path)[1:]:
 
-            for node in cur_node.children:
-                if node._name_for_path == path_node_name:
-                    cur_node = node
-                    break  # we've found it! let's move to the next node
+            cur_node = cur_node._get_child_by_path_name(path_node_name)
 
-            else:  # no break?
+            if cur_node is None:
                 raise PathError("Can't find node '{path}'".format(**locals()))
 
+        if self.__path_index is not None and path.startswith('|'):
+            self.__path_index[path] = cur_node
+
         return cur_node
 
+    def paths_to_nodes(self, paths, ignore_missing=False):
+        """Find and return nodes at given `paths`.
+
+        :Example:
+
+        >>> p.paths_to_nodes(['|foo|bar', '|foo|bee'])
+        [GuerillaNode(9, 'bar', 'primitive'),
+         GuerillaNode(10, 'bee', 'primitive')]
+
+        :param paths: Paths to get nodes from.
+        :type paths: collections.iterable[str]
+        :param ignore_missing: Return `None` for missing nodes instead of
+            raising.
+        :type ignore_missing: bool
+        :return: Nodes found from given `paths`, in the same order.
+        :rtype: list[GuerillaNode]
+        :raises PathError: If a path can't be found and `ignore_missing` is
+            `False`.
+        """
+        path_index = self.__get_path_index() or {}
+
+        nodes = []
+
+        for path in paths:
+
+            node = path_index.get(path)
+
+            if node is None or node.path != path:
+                try:
+                    node = self.path_to_node(path)
+                except PathError:
+                    if not ignore_missing:
+                        raise
+
+                    node = None
+
+            nodes.append(node)
+
+        return nodes
+
+    def paths_to_plugs(self, paths, ignore_missing=False):
+        """Find and return plugs at given `paths`.
+
+        :param paths: Paths to get plugs from.
+        :type paths: collections.iterable[str]
+        :param ignore_missing: Return `None` for missing plugs instead of
+            raising.
+        :type ignore_missing: bool
+        :return: Plugs found from given `paths`, in the same order.
+        :rtype: list[GuerillaPlug]
+        :raises PathError: If a path can't be found and `ignore_missing` is
+            `False`.
+        """
+        plugs = []
+
+        for path in paths:
+            try:
+                plugs.append(self.path_to_plug(path))
+            except PathError:
+                if not ignore_missing:
+                    raise
+                plugs.append(None)
+
+        return plugs
+
+    @classmethod
+    def _split_path(cls, path):
+        """Split given node `path` on non escaped "|".
+
+        "|foo|bar\\|bee" -> ['', 'foo', 'bar\\|bee']
+
+        :param path: Node path to split.
+        :type path: str
+        :return: Path node names.
+        :rtype: list[str]
+        """
+        if '\\' not in path:  # no escaped character, fast path
+            return path.split('|')
+
+        return cls._PATH_SPLIT.split(path)
+
     def path_to_plug(self, path):
         """Find and return plug at given `path`.
 
@@ -1000,95 +3261,130 @@ class GuerillaParser(object):
 
         return '|'.join(reversed(path))
 
-    @staticmethod
-    def __escape_str_for_regex(value):
-        """Escape given string `value` to make it parsed in regex.
+    def line_number(self, offset):
+        """Return line number (starting from 1) of given parsed content
+        `offset`.
 
-        :param value: String to escape for regex.
-        :type value: str
-        :return: Escaped string.
-        :rtype: str
+        :Example:
+
+        >>> p.line_number(node.source_offset)
+        42
+
+        :param offset: Offset in parsed content (see
+            :attr:`GuerillaNode.source_offset`).
+        :type offset: int
+        :return: Line number.
+        :rtype: int
+        :raises RuntimeError: If parsed content has not been kept.
+        """
+        if self.__line_starts is None:
+
+            if self.__org_content is None:
+                raise RuntimeError("Can't get line number, parsed content has "
+                                   "not been kept")
+
+            line_starts = array('l', [0])
+            line_starts.extend(m.end() for m in
+                               re.finditer('\n', self.__org_content))
+
+            self.__line_starts = line_starts
+
+        return bisect_right(self.__line_starts, offset)
+
+    def command_span(self, offset):
+        """Return span of the command at given parsed content `offset`.
+
+        :Example:
+
+        >>> start, end = p.command_span(plug.source_offset)
+        >>> p.original_content[start:end]
+        'set("$3.Lines",100)'
+
+        :param offset: Command offset (see
+            :attr:`GuerillaNode.source_offset`).
+        :type offset: int
+        :return: Command start and end offsets (end excluded).
+        :rtype: (int, int)
+        :raises RuntimeError: If parsed content has not been kept.
+        """
+        if self.__org_content is None:
+            raise RuntimeError("Can't get command span, parsed content has "
+                               "not been kept")
+
+        end = self.__org_content.find('\n', offset)
+
+        return offset, len(self.__org_content) if end == -1 else end
+
+    def subtree_span(self, node):
+        """Return span of the commands of given `node` subtree (nodes, plugs
+        and connections).
+
+        Guerilla writes commands of a subtree one after the other, so the
+        returned span can be used to extract subtree text.
+
+        :param node: Node to get subtree span from.
+        :type node: GuerillaNode
+        :return: Subtree first command start and last command end offsets
+            (end excluded), `None` if no command is related to the subtree.
+        :rtype: (int, int)
+        :raises RuntimeError: If parsed content has not been kept.
         """
-        return value.replace('\\', '\\\\')\
-                    .replace('^', '\\^')\
-                    .replace('$', '\\$')\
-                    .replace('{', '\\{')\
-                    .replace('}', '\\}')\
-                    .replace('[', '\\[')\
-                    .replace(']', '\\]')\
-                    .replace('(', '\\(')\
-                    .replace(')', '\\)')\
-                    .replace('.', '\\.')\
-                    .replace('*', '\\*')\
-                    .replace('+', '\\+')\
-                    .replace('?', '\\?')\
-                    .replace('|', '\\|')\
-                    .replace('<', '\\<')\
-                    .replace('>', '\\>')\
-                    .replace('-', '\\-')\
-                    .replace('&', '\\&')
+        offsets = []
+
+        for sub_node in chain((node,), self.__recursive_node(node)):
+
+            offsets.append(sub_node.source_offset)
+
+            for plug in sub_node.plugs:
+                offsets.append(plug.source_offset)
+                offsets.append(plug.input_source_offset)
+
+        offsets = [o for o in offsets if o is not None]
+
+        if not offsets:
+            return None
+
+        return min(offsets), self.command_span(max(offsets))[1]
 
     def set_plug_value(self, plug_values):
         """While exposed, this method is not stable yet and could potentially
         change in the future.
 
+        Each plug value position in parsed content is known so values are
+        replaced in a single pass when :attr:`modified_content` is generated,
+        whatever the number of modified plugs and calls.
+
         :param plug_values:
         :type plug_values: list[(GuerillaPlug, str)]
+        :raises RuntimeError: If parsed content has not been kept.
         """
-        # this list will be filled with "set(attr, value)" regex so we can
-        # create a "set(attr1, value1)|set(attr2, value2)|set(attr3, value3)"
-        # string that will be used to apply regex and set values only once
-        regex_list = []
-
-        # plug path (eg. "$60.Color"): value to set (eg. "{1,0,0}")
-        # this variable is used in the replace_func() function to find the
-        # value to set based on plug path
-        plug_value_list = {}
+        if self.__org_content is None:
+            raise RuntimeError("Can't set plug values, parsed content has not "
+                               "been kept")
 
         for plug, value in plug_values:
 
-            old_lua_value = self._py_to_lua_value(plug.value)
-            new_lua_value = self._py_to_lua_value(value)
+            # only plugs set using a "set()" command are modified
+            if plug.org_value is not None and \
+                    plug.source_offset is not None:
 
-            path = self.node_to_id_path(plug.parent)
+                # set("$3.AxisColor",{0,0,0,1})
+                #                    ^        ^
+                #                  start     end
+                end = self.__org_content.find('\n', plug.source_offset) - 1
+                start = end - len(plug.org_value)
 
-            plug_path = "{path}.{plug.name}".format(**locals())
+                assert self.__org_content[start:end] == plug.org_value, \
+                    (self.__org_content[start:end], plug.org_value)
 
-            plug_value_list[plug_path] = new_lua_value
+                self.__edits[start] = (end, self._py_to_lua_value(value))
 
-            # regex is separated in three groups:
-            # set(" | $3.AxisColor | ",{0,0,0,1})
-            # we need the second
-            # the job of the replace function (outside the loop) is to
-            # recreated the latest group
-            regex_str = [r'(\s*set\(")(',
-                         plug_path.replace('$', '\\$').replace('.', '\\.'),
-                         ')(",',
-                         self.__escape_str_for_regex(old_lua_value),
-                         '\\)\n)']
-
-            regex_list.append(''.join(regex_str))
+                # modified content has to be generated again
+                self.__mod_content = None
 
             # and of course, don't forget to set the value on the plug object
             plug.value = value
 
-        # the "set(attr1, value1)|set(attr2, value2)|set(attr3, value3)" string
-        set_plug_regex = re.compile('|'.join(regex_list))
-
-        # the replace function point is to recreated the parsed line
-        def replace_func(match_grp):
-
-            set_prefix = match_grp.group(1)  # 'set("'
-            plug_path = match_grp.group(2)  # '$60.Color'
-
-            new_lua_value = plug_value_list[plug_path]  # "{1,1,1}"
-
-            return '{0}{1}",{2})\n'.format(set_prefix,
-                                           plug_path,
-                                           new_lua_value)
-
-        if not self.__mod_content:
-            self.__mod_content = self.__org_content
 
-        self.__mod_content = set_plug_regex.sub(replace_func,
-                                                self.__mod_content)
+# plug value decoder, module level so Python 2 can pickle it by name
+_lua_to_py_value = GuerillaParser._lua_to_py_value
@@ -1,4 +1,8 @@
 
+from .lua import parse_value
+from .node import _graph_edits
+
+
 class GuerillaPlug(object):
     """Class representing a parsed Guerilla plug.
 
@@ -8,17 +12,28 @@ class GuerillaPlug(object):
     :vartype type: str
     :ivar parent: Parent plug's node.
     :vartype parent: GuerillaNode
-    :ivar value: Plug value.
-    :vartype value: bool|float|str
     :ivar org_value: Original parser plug value.
     :vartype org_value: str
     :ivar input: Plug input.
     :vartype input: GuerillaPlug
-    :ivar outputs: Plug outputs.
-    :vartype outputs: list[GuerillaPlug]
     """
+    # huge files can have millions of plugs, slots and lazily created
+    # containers keep them small
+    __slots__ = ('name',
+                 'type',
+                 'parent',
+                 '__value',
+                 '__value_decoder',
+                 'flag',
+                 'org_value',
+                 'input',
+                 '_outputs',
+                 '_param',
+                 '_source_offset',
+                 '_input_source_offset')
+
     def __init__(self, name, type_, parent, value=None, flag=None,
-                 org_value=None):
+                 org_value=None, value_decoder=None, param=None):
         """init plug
 
         :param name: Plug name.
@@ -31,6 +46,12 @@ class GuerillaPlug(object):
         :type value: bool|float|str
         :param org_value: Original parser plug value.
         :type org_value: str
+        :param value_decoder: Function converting given raw `value` to python
+            type. Conversion is done on first :attr:`value` access.
+        :type value_decoder: function
+        :param param: Raw plug type parameters (``'{min=0,max=1}'``),
+            converted to python type on first :attr:`param` access.
+        :type param: str
         """
         assert isinstance(name, str), (type(name), name)
         assert isinstance(type_, str), (type(type_), type_)
@@ -39,19 +60,25 @@ class GuerillaPlug(object):
         self.name = name
         self.type = type_
         self.parent = parent
-        self.value = value
+        self.__value = value
+        self.__value_decoder = value_decoder
         self.flag = flag
         self.org_value = org_value
 
         self.input = None
 
-        self.outputs = []
+        self._param = param
 
-        # add current plug to given parent plugs
-        assert name not in self.parent.plug_dict, (name,
-                                                   self.parent.plug_dict)
+        # list is only created when first output is connected
+        self._outputs = None  # :type: list[GuerillaPlug]
 
-        self.parent.plug_dict[name] = self
+        # offset, in parsed content, of the command creating the plug and of
+        # the command connecting its input
+        self._source_offset = None  # :type: int
+        self._input_source_offset = None  # :type: int
+
+        # add current plug to given parent plugs
+        self.parent._add_plug(self)
 
     def __repr__(self):
         """
@@ -59,8 +86,160 @@ class GuerillaPlug(object):
         :return:
         :rtype: str
         """
-        return "{}('{name}', '{type}', '{parent.path}')".format(
-            type(self).__name__, **vars(self))
+        return "{}('{}', '{}', '{}')".format(
+            type(self).__name__, self.name, self.type, self.parent.path)
+
+    def __reduce__(self):
+        """Pickle plug as an index in its graph flat tables, so deep graphs
+        don't hit recursion limit.
+
+        Flat tables are stored once per pickle, so nodes, plugs and parsers
+        pickled together stay in the same unpickled graph. A plug pickled
+        alone is part of a new graph.
+        """
+        from .flat import reduce_plug  # avoid circular import
+
+        return reduce_plug(self)
+
+    def __copy__(self):
+        """Return a shallow copy, sharing parent, containers and values with
+        this plug, without copying the graph.
+        """
+        from .flat import shallow_copy  # avoid circular import
+
+        return shallow_copy(self)
+
+    @property
+    def outputs(self):
+        """Plug outputs, list being created on first access.
+
+        :return: Plug outputs.
+        :rtype: list[GuerillaPlug]
+        """
+        if self._outputs is None:
+            self._outputs = []
+
+        return self._outputs
+
+    def _add_output(self, plug):
+        """Add given `plug` to plug outputs.
+
+        :param plug: Plug to add.
+        :type plug: GuerillaPlug
+        """
+        _graph_edits[0] += 1
+
+        if self._outputs is None:
+            self._outputs = [plug]
+        else:
+            self._outputs.append(plug)
+
+    def _remove_output(self, plug):
+        """Remove given `plug` from plug outputs.
+
+        :param plug: Plug to remove.
+        :type plug: GuerillaPlug
+        """
+        _graph_edits[0] += 1
+
+        self._outputs.remove(plug)
+
+        if not self._outputs:
+            self._outputs = None
+
+    @property
+    def value(self):
+        """Plug value.
+
+        Raw parsed value is converted to python type on first access, then
+        cached.
+
+        :return: Plug value.
+        :rtype: bool|float|str
+        """
+        if self.__value_decoder is not None:
+            self.__value = self.__value_decoder(self.__value)
+            self.__value_decoder = None
+
+        return self.__value
+
+    @value.setter
+    def value(self, value):
+        """Set plug value.
+
+        :param value: New plug value.
+        """
+        _graph_edits[0] += 1
+
+        self.__value = value
+        self.__value_decoder = None
+
+    @property
+    def param(self):
+        """Plug type parameters (limits, enum and combo choices, etc.).
+
+        Raw parsed parameters are converted to python type on first access,
+        then cached.
+
+        :Example:
+
+        >>> plug.param  # types.float {min=0,max=1}
+        {'min': 0, 'max': 1}
+        >>> plug.param  # types.enum {{"Distant","distant"}}
+        [['Distant', 'distant']]
+
+        :return: Plug type parameters, `None` if plug type has no parameter.
+        :rtype: dict|list
+        """
+        if isinstance(self._param, str):
+            self._param = parse_value(self._param)
+
+        return self._param
+
+    @property
+    def source_offset(self):
+        """Offset of the ``create`` or ``set`` command creating the plug in
+        parsed content.
+
+        See :meth:`GuerillaParser.line_number()` to get line number.
+
+        :return: Command offset, `None` if plug has not been created by a
+            command (connection only, etc.).
+        :rtype: int
+        """
+        return self._source_offset
+
+    @property
+    def input_source_offset(self):
+        """Offset of the ``connect`` command connecting plug input in parsed
+        content.
+
+        :return: Command offset, `None` if plug has no input.
+        :rtype: int
+        """
+        return self._input_source_offset
+
+    def _get_raw_value(self):
+        """Return plug value without converting it.
+
+        :return: Plug value and function to convert it to python type (`None`
+            if value is already converted).
+        :rtype: (object, function)
+        """
+        return self.__value, self.__value_decoder
+
+    def _set_raw_value(self, value, value_decoder):
+        """Set plug value, converted on first access.
+
+        :param value: Plug value.
+        :param value_decoder: Function converting given `value` to python
+            type, `None` if value is already converted.
+        :type value_decoder: function
+        """
+        _graph_edits[0] += 1
+
+        self.__value = value
+        self.__value_decoder = value_decoder
 
     @property
     def path(self):
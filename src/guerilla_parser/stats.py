@@ -0,0 +1,188 @@
+from timeit import default_timer
+
+
+class ParseStats(object):
+    """Time spent per parsing phase, command and object counts of a parsed
+    Guerilla file.
+
+    Filled when parser is created with ``parse_stats=True`` (see
+    :attr:`GuerillaParser.parse_stats`). Printing it gives a report table.
+
+    Commands are tokenized (command regex, arguments and path unescaping)
+    then linked one by one, link time being recorded per command kind
+    (``create node``, ``create plug``, ``set``, ``connect``, ``depend``,
+    etc.), implicit node creation time excluded. On parallel parsing,
+    tokenize time is the time spent waiting for workers.
+
+    Plug values are converted to python type on first access, not while
+    parsing: value conversion time per plug type is measured apart, by
+    converting the value of each created plug once its command is linked,
+    converted value being kept by the plug. Plugs skipped by parser filters
+    are not converted.
+
+    :Example:
+
+    >>> p = GuerillaParser.from_file('/path/to/project.gproject',
+    ...                              parse_stats=True)
+    >>> print(p.parse_stats)
+
+    :ivar total_time: Whole parsing time, reading included, in seconds.
+    :vartype total_time: float
+    :ivar tokenize_time: Command tokenizing time, in seconds.
+    :vartype tokenize_time: float
+    :ivar link_times: Link time per command kind, in seconds.
+    :vartype link_times: dict[str, float]
+    :ivar command_counts: Command count per command kind.
+    :vartype command_counts: dict[str, int]
+    :ivar implicit_node_time: Implicit node creation and lookup time, in
+        seconds.
+    :vartype implicit_node_time: float
+    :ivar value_times: Value conversion time per plug type (``set()`` for
+        plug values given by ``set`` commands), in seconds.
+    :vartype value_times: dict[str, float]
+    :ivar value_counts: Converted value count per plug type.
+    :vartype value_counts: dict[str, int]
+    :ivar value_error_counts: Count of values failing to convert per plug
+        type, not counted in :attr:`value_counts` and :attr:`value_times`.
+        These values still raise when accessed.
+    :vartype value_error_counts: dict[str, int]
+    :ivar node_count: Created node count, root and implicit nodes
+        included.
+    :vartype node_count: int
+    :ivar implicit_node_count: Implicit node count.
+    :vartype implicit_node_count: int
+    :ivar plug_count: Created plug count.
+    :vartype plug_count: int
+    :ivar connection_count: Plug connection count.
+    :vartype connection_count: int
+    """
+    def __init__(self):
+        """Init empty stats.
+        """
+        self.total_time = 0.0
+        self.tokenize_time = 0.0
+        self.link_times = {}
+        self.command_counts = {}
+        self.implicit_node_time = 0.0
+        self.value_times = {}
+        self.value_counts = {}
+        self.value_error_counts = {}
+        self.node_count = 0
+        self.implicit_node_count = 0
+        self.plug_count = 0
+        self.connection_count = 0
+
+    def __str__(self):
+        """Return stats report table.
+
+        :rtype: str
+        """
+        lines = []
+
+        def add(label, value, unit=''):
+            lines.append("{:<40}{:>12} {}".format(label, value,
+                                                  unit).rstrip())
+
+        def add_time(label, seconds):
+            add(label, "{:.2f}".format(seconds * 1000.0), "ms")
+
+        add_time("total", self.total_time)
+        add_time("tokenize", self.tokenize_time)
+
+        for kind in sorted(self.link_times):
+            add_time("link {} ({})".format(kind, self.command_counts[kind]),
+                     self.link_times[kind])
+
+        add_time("link implicit nodes", self.implicit_node_time)
+
+        for plug_type in sorted(self.value_times):
+            add_time("value {} ({})".format(plug_type,
+                                            self.value_counts[plug_type]),
+                     self.value_times[plug_type])
+
+        for plug_type in sorted(self.value_error_counts):
+            add("value errors {}".format(plug_type),
+                self.value_error_counts[plug_type])
+
+        add("nodes", self.node_count)
+        add("implicit nodes", self.implicit_node_count)
+        add("plugs", self.plug_count)
+        add("connections", self.connection_count)
+
+        return '\n'.join(lines)
+
+    @property
+    def link_time(self):
+        """Return whole link time, implicit node creation included.
+
+        :rtype: float
+        """
+        return sum(self.link_times.values()) + self.implicit_node_time
+
+    def _add_command(self, kind, seconds):
+        """Add a linked command of given `kind`.
+
+        :type kind: str
+        :param seconds: Link time.
+        :type seconds: float
+        """
+        self.link_times[kind] = self.link_times.get(kind, 0.0) + seconds
+        self.command_counts[kind] = self.command_counts.get(kind, 0) + 1
+
+    def _time_value(self, plug_type, plug):
+        """Convert given `plug` value, adding conversion time to given
+        `plug_type`. Converted value is kept by the plug.
+
+        A value failing to convert is counted in :attr:`value_error_counts`
+        and left raw, so it raises on access like without stats.
+
+        :type plug_type: str
+        :type plug: GuerillaPlug
+        """
+        start = default_timer()
+
+        try:
+            plug.value
+        except Exception:
+            self.value_error_counts[plug_type] = \
+                self.value_error_counts.get(plug_type, 0) + 1
+            return
+
+        seconds = default_timer() - start
+
+        self.value_times[plug_type] = \
+            self.value_times.get(plug_type, 0.0) + seconds
+        self.value_counts[plug_type] = \
+            self.value_counts.get(plug_type, 0) + 1
+
+    def _count_objects(self, roots, implicit_nodes):
+        """Count nodes, plugs and connections of given node graphs.
+
+        :param roots: Root nodes of the graphs.
+        :type roots: collections.iterable[GuerillaNode]
+        :param implicit_nodes: Implicit nodes of the graphs.
+        :type implicit_nodes: list[GuerillaNode]
+        """
+        self.node_count = 0
+        self.plug_count = 0
+        self.connection_count = 0
+        self.implicit_node_count = len(implicit_nodes)
+
+        stack = list(roots)
+
+        while stack:
+
+            node = stack.pop()
+
+            self.node_count += 1
+
+            if node._plug_dict is not None:
+
+                self.plug_count += len(node._plug_dict)
+
+                for plug in node._plug_dict.values():
+                    if plug._outputs is not None:
+                        self.connection_count += len(plug._outputs)
+
+            if node._children is not None:
+                stack.extend(node._children)
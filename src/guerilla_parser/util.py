@@ -1,3 +1,4 @@
+import mmap
 import sys
 
 from .exception import PathError
@@ -53,6 +54,24 @@ def name_to_path_name(name):
                .replace("]", r"\]")
 
 
+def node_name_to_path_name(name):
+    """Return given node `name` as it appears in node paths.
+
+    Names with number are exposed with bracket: 0 -> '[0]'
+
+    :param name: Node name.
+    :type name: str|int
+    :return: Node name as it appears in node paths.
+    :rtype: str
+    """
+    if isinstance(name, int):
+        return '[{}]'.format(name)
+    elif name.isalnum():  # most names, nothing to escape
+        return name
+    else:
+        return name_to_path_name(name)
+
+
 def aov_node(parser, rp_name, rl_name, aov_name):
     """Utility function to get an AOV from it's given info.
 
@@ -99,6 +118,105 @@ def aov_node(parser, rp_name, rl_name, aov_name):
         return aov_nodes[0]
 
 
+def iter_line_chunks(stream, size_hint=1 << 16):
+    """Read given file object by chunks of complete lines.
+
+    Chunks always end on a line boundary so each command line is entirely
+    contained in a single chunk.
+
+    :param stream: File object to read lines from.
+    :type stream: io.TextIOBase
+    :param size_hint: Approximate size of each chunk, in characters.
+    :type size_hint: int
+    :return: Generator of chunks of lines.
+    :rtype: collections.iterator[str]
+    """
+    while True:
+
+        lines = stream.readlines(size_hint)
+
+        if not lines:
+            return
+
+        yield ''.join(lines)
+
+
+def iter_str_line_chunks(content, size_hint=1 << 16):
+    """Split given `content` string by chunks of complete lines.
+
+    See :func:`iter_line_chunks()`.
+
+    :param content: String to split.
+    :type content: str
+    :param size_hint: Approximate size of each chunk, in characters.
+    :type size_hint: int
+    :return: Generator of chunks of lines.
+    :rtype: collections.iterator[str]
+    """
+    start = 0
+
+    while start < len(content):
+
+        end = content.find('\n', start + size_hint) + 1
+
+        if not end:  # no line ending after size hint
+            end = len(content)
+
+        yield content[start:end]
+
+        start = end
+
+
+def iter_mmap_line_chunks(path, size_hint=1 << 16):
+    """Memory map given file and iterate over its content by chunks of
+    complete lines.
+
+    Content is never read as a whole, only one chunk at a time is copied
+    from the mapping and decoded, the same way :func:`open_()` does
+    (iso-8859-1 encoding, universal newlines).
+
+    See :func:`iter_line_chunks()`.
+
+    :param path: Path of the file to read.
+    :type path: str
+    :param size_hint: Approximate size of each chunk, in bytes.
+    :type size_hint: int
+    :return: Generator of chunks of lines.
+    :rtype: collections.iterator[str]
+    """
+    with open(path, 'rb') as f:
+
+        try:
+            content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be mapped
+            return
+
+    try:
+        size = len(content)
+
+        start = 0
+
+        while start < size:
+
+            end = content.find(b'\n', start + size_hint) + 1
+
+            if not end:  # no line ending after size hint
+                end = size
+
+            chunk = content[start:end]
+
+            # "\r\n" never span chunks as they end after "\n"
+            if b'\r' in chunk:
+                chunk = chunk.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+            yield _decode(chunk)
+
+            start = end
+
+    finally:
+        content.close()
+
+
 if sys.version_info[0] == 3:
     def iteritems(d, **kw):
         return iter(d.items(**kw))
@@ -109,6 +227,9 @@ if sys.version_info[0] == 3:
     def open_(path):
         import io
         return io.open(path, 'rt', encoding='iso-8859-1')
+
+    def _decode(content):
+        return content.decode('iso-8859-1')
 else:
     def iteritems(d, **kw):
         return d.iteritems(**kw)
@@ -118,3 +239,6 @@ else:
 
     def open_(path):
         return open(path, 'rU')
+
+    def _decode(content):
+        return content
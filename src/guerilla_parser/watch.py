@@ -0,0 +1,201 @@
+import os
+import time
+import traceback
+
+from .cache import SnapshotCache
+from .parser import GuerillaParser
+from .util import open_
+
+
+class GuerillaProjectWatcher(object):
+    """Keep parsed graphs of a set of Guerilla files in memory, reloading
+    files modified on disk.
+
+    Files are polled (size and modification time, see
+    :meth:`SnapshotCache.key()`), so it works on any file system, network
+    ones included. Modified files are updated incrementally (see
+    :meth:`GuerillaParser.update()`) so unchanged nodes and plugs are kept,
+    unless `incremental` is `False` or parsers don't keep their content.
+
+    A file failing to (re)load keeps its previous parser, error being stored
+    in :attr:`errors` until file is successfully loaded.
+
+    :Example:
+
+    >>> watcher = GuerillaProjectWatcher(['/path/to/project.gproject',
+    ...                                   '/path/to/render.grendergraph'])
+    >>> p = watcher['/path/to/project.gproject']
+    >>> for path in watcher.watch(interval=2.0):
+    ...     print(path, watcher[path].doc_format_rev)
+
+    :ivar incremental: Update modified files incrementally instead of
+        parsing them again.
+    :vartype incremental: bool
+    :ivar errors: Formatted traceback of the last failed load, per file
+        absolute path.
+    :vartype errors: dict[str, str]
+    """
+    def __init__(self, paths=(), incremental=True, **kwargs):
+        """Init the watcher, parsing given files.
+
+        :param paths: Paths of the Guerilla files to watch.
+        :type paths: collections.iterable[str]
+        :param incremental: Update modified files incrementally.
+        :type incremental: bool
+        :param kwargs: Arguments passed to
+            :meth:`GuerillaParser.from_file()`.
+        """
+        self.incremental = incremental
+        self.errors = {}
+
+        self.__kwargs = kwargs
+
+        # parser and snapshot key of last load, per absolute path
+        self.__parsers = {}  # :type: dict[str, GuerillaParser]
+        self.__keys = {}  # :type: dict[str, (str, int, float)]
+
+        for path in paths:
+            self.add(path)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self.__keys
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def __getitem__(self, path):
+        """Return parser of given watched file `path`.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :rtype: GuerillaParser
+        :raises KeyError: If file is not watched or has never been loaded.
+        """
+        return self.__parsers[os.path.abspath(path)]
+
+    @property
+    def paths(self):
+        """Absolute paths of watched files.
+
+        :rtype: list[str]
+        """
+        return sorted(self.__keys)
+
+    def add(self, path):
+        """Watch given file `path`, parsing it if not watched yet.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :return: File parser, `None` if it failed to load (see
+            :attr:`errors`).
+        :rtype: GuerillaParser|None
+        """
+        path = os.path.abspath(path)
+
+        if path not in self.__keys:
+
+            self.__keys[path] = None
+
+            self.__load(path)
+
+        return self.__parsers.get(path)
+
+    def remove(self, path):
+        """Stop watching given file `path`, dropping its parser.
+
+        :param path: Guerilla file path.
+        :type path: str
+        :raises KeyError: If file is not watched.
+        """
+        path = os.path.abspath(path)
+
+        del self.__keys[path]
+
+        self.__parsers.pop(path, None)
+        self.errors.pop(path, None)
+
+    def poll(self):
+        """Reload watched files modified since their last load.
+
+        A missing file (being saved, etc.) keeps its parser and is loaded
+        once back.
+
+        :return: Absolute paths of reloaded files.
+        :rtype: list[str]
+        """
+        reloaded = []
+
+        for path in sorted(self.__keys):
+
+            try:
+                key = SnapshotCache.key(path)
+            except OSError:
+                self.errors[path] = traceback.format_exc()
+                continue
+
+            if key != self.__keys[path] and self.__load(path, key):
+                reloaded.append(path)
+
+        return reloaded
+
+    def watch(self, interval=1.0, stop_event=None):
+        """Poll watched files every `interval` seconds, yielding reloaded
+        ones.
+
+        :param interval: Time between two polls, in seconds.
+        :type interval: float
+        :param stop_event: Event stopping the iteration once set, iterate
+            forever if `None`.
+        :type stop_event: threading.Event
+        :return: Generator of reloaded file absolute paths.
+        :rtype: collections.iterator[str]
+        """
+        while stop_event is None or not stop_event.is_set():
+
+            for path in self.poll():
+                yield path
+
+            if stop_event is None:
+                time.sleep(interval)
+            else:
+                stop_event.wait(interval)
+
+    def __load(self, path, key=None):
+        """(Re)load given file `path`.
+
+        :param path: Guerilla file absolute path.
+        :type path: str
+        :param key: File snapshot key, got before reading file.
+        :type key: (str, int, float)
+        :return: `True` if file has been loaded.
+        :rtype: bool
+        """
+        parser = self.__parsers.get(path)
+
+        try:
+            if key is None:
+                key = SnapshotCache.key(path)
+
+            if parser is not None and self.incremental and \
+                    parser.original_content is not None:
+
+                with open_(path) as f:
+                    parser.update(f.read())
+
+            else:
+                self.__parsers[path] = GuerillaParser.from_file(
+                    path, **self.__kwargs)
+
+        except Exception:
+            self.errors[path] = traceback.format_exc()
+            # a broken file is loaded again once modified
+            self.__keys[path] = key
+            return False
+
+        self.__keys[path] = key
+        self.errors.pop(path, None)
+
+        return True
@@ -1,10 +1,25 @@
+import copy
 import difflib
 import filecmp
+import io
 import os.path
+import pickle
+import re
+import shutil
 import sys
 import tempfile
+import threading
+import time
 import unittest
 
+from functools import partial
+from itertools import chain
+
+try:
+    from StringIO import StringIO
+except ImportError:  # python 3
+    from io import StringIO
+
 
 def _get_parent_dir(path):
     """utility function to get parent dir
@@ -21,6 +36,7 @@ sys.path.insert(0, root_dir+'/src')
 
 import guerilla_parser
 import guerilla_parser.util as grl_util
+from guerilla_parser.lua import parse_value
 
 
 default_gprojects = [
@@ -565,6 +581,55 @@ def test_generator_write_file(path):
     return test_func
 
 
+def test_generator_set_plug_values(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """set many plug values and parse modified content back
+        """
+        p = guerilla_parser.parse(path)
+
+        plugs = [plug for plug in p.plugs
+                 if plug.org_value is not None and
+                 isinstance(plug.value, float)]
+
+        self.assertTrue(plugs)
+
+        # two calls, second one overriding some values of the first one
+        p.set_plug_value([(plug, 42.0) for plug in plugs])
+        p.set_plug_value([(plug, 1.5) for plug in plugs[::2]])
+
+        self.assertTrue(p.has_changed)
+
+        p_mod = guerilla_parser.GuerillaParser(p.modified_content)
+
+        for i, plug in enumerate(plugs):
+            mod_plug = p_mod.path_to_plug(plug.path)
+            self.assertEqual(mod_plug.value, 1.5 if i % 2 == 0 else 42.0)
+            self.assertEqual(mod_plug.value, plug.value)
+
+        # restoring original values, written with parser Lua formatting
+        # (python 2 str() keeps less float digits)
+        p.set_plug_value([(plug, float(plug.org_value)) for plug in plugs])
+
+        to_lua = guerilla_parser.GuerillaParser._py_to_lua_value
+
+        self.assertEqual(p.has_changed,
+                         any(to_lua(float(plug.org_value)) != plug.org_value
+                             for plug in plugs))
+
+    return test_func
+
+
+for gproject in all_gprojects:
+    test_name = _gen_test_name('set_plug_values', gproject)
+    test = test_generator_set_plug_values(gproject)
+    setattr(SetPlugValueTestCase, test_name, test)
+
+
 class WriteFileTestCase(unittest.TestCase):
     pass
 
@@ -728,6 +793,2081 @@ class TestUniqueAttr(unittest.TestCase):
         self.assertEqual(plug.value, "distant")
 
 
+def _graph_signature(p):
+    """Macro to get a comparable representation of given parser nodes, plugs
+    and connections.
+
+    :param p: Parser to get graph signature from.
+    :type p: guerilla_parser.GuerillaParser
+    :rtype: list[tuple]
+    """
+    sig = [p.doc_format_rev]
+
+    nodes = [p.root] + list(p.nodes)
+
+    for node in nodes:
+
+        node_path = node.path if node.id != 1 else ""
+
+        sig.append((node.id, node_path, node.type))
+
+        plugs = node.plugs
+
+        # Python 2 dict order depends on insertion history
+        if sys.version_info[0] < 3:
+            plugs = sorted(plugs, key=lambda plug: plug.name)
+
+        for plug in plugs:
+            sig.append((plug.path, plug.type, plug.value, plug.flag,
+                        plug.input.path if plug.input else None,
+                        sorted(o.path for o in plug.outputs)))
+
+    return sig
+
+
+def test_generator_from_stream(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check streamed parsing build the same graph than regular parsing
+        """
+        p = guerilla_parser.parse(path)
+
+        with grl_util.open_(path) as f:
+            p_stream = guerilla_parser.GuerillaParser.from_stream(f)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_stream))
+
+        self.assertIsNone(p_stream.original_content)
+
+        with self.assertRaises(RuntimeError):
+            p_stream.set_plug_value([])
+
+        with grl_util.open_(path) as f:
+            p_stream = guerilla_parser.GuerillaParser.from_stream(
+                f, keep_content=True)
+
+        self.assertEqual(p.original_content, p_stream.original_content)
+
+        p_file = guerilla_parser.parse(path, keep_content=False)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_file))
+
+    return test_func
+
+
+class FromStreamTestCase(unittest.TestCase):
+    pass
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('from_stream', path)
+    test = test_generator_from_stream(path)
+    setattr(FromStreamTestCase, test_name, test)
+
+
+def test_generator_mmap(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check memory mapped parsing build the same graph than regular
+        parsing
+        """
+        p = guerilla_parser.parse(path)
+
+        p_mmap = guerilla_parser.parse(path, mmap=True)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_mmap))
+        self.assertEqual(p.original_content, p_mmap.original_content)
+        self.assertEqual([n.source_offset for n in p.nodes],
+                         [n.source_offset for n in p_mmap.nodes])
+
+        p_mmap = guerilla_parser.parse(path, mmap=True, keep_content=False)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_mmap))
+        self.assertIsNone(p_mmap.original_content)
+
+        p_mmap = _SmallChunkParser.from_file(path, mmap=True, workers=2)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_mmap))
+
+    return test_func
+
+
+class MmapTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __write(self, content):
+        path = os.path.join(self.tmp_dir, 'test.gproject')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_newlines_and_encoding(self):
+
+        path = self.__write(
+            b'docformatrevision(19)\r\n'
+            b'oid[1]=create("GADocument","\\"\\"","LUIDocument")\r\n'
+            b'oid[2]=create("SceneGraphNode","$1","caf\xe9")\r\n'
+            b'set("$2.Visible",true)\r\n')
+
+        chunks = list(grl_util.iter_mmap_line_chunks(path, 8))
+
+        self.assertEqual(len(chunks), 4)
+
+        for chunk in chunks:
+            self.assertTrue(chunk.endswith('\n'))
+            self.assertNotIn('\r', chunk)
+
+        p = guerilla_parser.parse(path)
+        p_mmap = guerilla_parser.parse(path, mmap=True)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_mmap))
+        self.assertEqual(p.original_content, p_mmap.original_content)
+        self.assertEqual(p_mmap.path_to_node('|caf\xe9').name, 'caf\xe9')
+
+    def test_empty(self):
+
+        path = self.__write(b'')
+
+        self.assertEqual(list(grl_util.iter_mmap_line_chunks(path)), [])
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('mmap', path)
+    test = test_generator_mmap(path)
+    setattr(MmapTestCase, test_name, test)
+
+
+def test_generator_iter_commands(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check raw commands match parsed objects
+        """
+        p = guerilla_parser.parse(path)
+
+        creates = list(guerilla_parser.iter_commands(
+            path, {'create', 'createnotref'}))
+
+        self.assertEqual(sorted(cmd.oid for cmd in creates), sorted(p.objs))
+
+        for cmd in guerilla_parser.iter_commands(path):
+            self.assertIsInstance(cmd, guerilla_parser.Command)
+            if cmd.cmd == 'docformatrevision':
+                self.assertEqual(int(cmd.args), p.doc_format_rev)
+            elif cmd.cmd not in ('create', 'createnotref'):
+                self.assertIsNone(cmd.oid)
+
+        # early exit
+        for cmd in guerilla_parser.iter_commands(path):
+            break
+
+        self.assertEqual(cmd.cmd, 'docformatrevision')
+
+    return test_func
+
+
+class IterCommandsTestCase(unittest.TestCase):
+    pass
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('iter_commands', path)
+    test = test_generator_iter_commands(path)
+    setattr(IterCommandsTestCase, test_name, test)
+
+
+def _node_path(node):
+    return "" if node.id == 1 else node.path
+
+
+def _is_in_subtree(node, types):
+    while node is not None:
+        if node.type in types:
+            return True
+        node = node.parent
+    return False
+
+
+def test_generator_selective_parse(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check node and plug filters
+        """
+        p = guerilla_parser.parse(path)
+
+        # node types
+        types = {'RenderPass', 'RenderLayer'}
+
+        p_sel = guerilla_parser.parse(path, node_types=types)
+
+        expected = {node.path for node in p.nodes
+                    if _is_in_subtree(node, types)}
+
+        self.assertEqual({node.path for node in p_sel.nodes}, expected)
+
+        for node in p_sel.nodes:
+
+            # plugs only created from connections to skipped nodes are missing
+            self.assertEqual(
+                {plug.name: plug.value for plug in node.plugs
+                 if plug.value is not None},
+                {plug.name: plug.value
+                 for plug in p.path_to_node(node.path).plugs
+                 if plug.value is not None})
+
+        self.assertEqual(p_sel.root.type, p.root.type)
+
+        # path prefixes
+        prefix = '|RenderPass|Layer'
+
+        p_sel = guerilla_parser.parse(path, path_prefixes=[prefix])
+
+        for node in p_sel.nodes:
+
+            node_path = node.path
+
+            if node_path in ('|RenderPass', prefix):
+                self.assertEqual(node_path == prefix,
+                                 bool(list(node.plugs)))
+            else:
+                self.assertTrue(node_path.startswith(prefix + '|'),
+                                node_path)
+
+        self.assertEqual(list(p_sel.root.plugs), [])
+
+        self.assertEqual(
+            sorted(n.path for n in p_sel.path_to_node(prefix).children),
+            sorted(n.path for n in p.path_to_node(prefix).children))
+
+        # plug names
+        p_sel = guerilla_parser.parse(path, plug_names={'PlugName'})
+
+        self.assertEqual(sorted(_node_path(n) for n in p_sel.nodes),
+                         sorted(_node_path(n) for n in p.nodes))
+
+        self.assertEqual(
+            sorted((plug.path, plug.value) for plug in p_sel.plugs),
+            sorted((plug.path, plug.value) for plug in p.plugs
+                   if plug.name == 'PlugName'))
+
+    return test_func
+
+
+class SelectiveParseTestCase(unittest.TestCase):
+    pass
+
+
+for path in default_gprojects:
+    test_name = _gen_test_name('selective_parse', path)
+    test = test_generator_selective_parse(path)
+    setattr(SelectiveParseTestCase, test_name, test)
+
+
+class LazyValueTestCase(unittest.TestCase):
+
+    def test_cached_value(self):
+
+        p = guerilla_parser.parse(default_gprojects[1])
+
+        pref = p.root.get_child('Preferences')
+
+        plug = pref.get_plug('LightAmbient')
+
+        self.assertEqual(plug.org_value, '{0,0,0,1}')
+        self.assertIs(plug.value, plug.value)  # converted once
+
+        plug.value = [1, 1, 1, 1]
+        self.assertEqual(plug.value, [1, 1, 1, 1])
+
+    def test_decoder(self):
+
+        node = guerilla_parser.GuerillaNode(1, 'Node', 'Type')
+
+        plug = guerilla_parser.GuerillaPlug('Count', 'Plug', node, '12',
+                                            value_decoder=int)
+
+        self.assertEqual(plug.value, 12)
+
+
+class SlotsTestCase(unittest.TestCase):
+
+    def test_lazy_containers(self):
+
+        node = guerilla_parser.GuerillaNode(1, 'Node', 'Type')
+
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertEqual(node.children, [])
+        self.assertEqual(node.plug_dict, {})
+        self.assertEqual(list(node.plugs), [])
+
+        with self.assertRaises(KeyError):
+            node.get_plug('Foo')
+
+        child = guerilla_parser.GuerillaNode(2, 'Child', 'Type', node)
+
+        self.assertEqual(node.children, [child])
+        self.assertIs(node.get_child('Child'), child)
+
+        plug = guerilla_parser.GuerillaPlug('Foo', 'Plug', node)
+
+        self.assertFalse(hasattr(plug, '__dict__'))
+        self.assertEqual(plug.outputs, [])
+        self.assertEqual(node.plug_dict, {'Foo': plug})
+
+        plug = guerilla_parser.GuerillaPlug('Bar', 'Plug', child)
+
+        self.assertEqual(repr(plug), "GuerillaPlug('Bar', 'Plug', '|Child')")
+
+    def test_mutable_containers(self):
+
+        # containers returned while empty are the node and plug ones
+        node = guerilla_parser.GuerillaNode(1, 'Node', 'Type')
+        child = guerilla_parser.GuerillaNode(2, 'Child', 'Type')
+
+        node.children.append(child)
+
+        self.assertEqual(node.children, [child])
+
+        plug = guerilla_parser.GuerillaPlug('Foo', 'Plug', child)
+        other = guerilla_parser.GuerillaPlug('Bar', 'Plug', child)
+
+        node.plug_dict['Foo'] = plug
+        plug.outputs.append(other)
+
+        self.assertIs(node.get_plug('Foo'), plug)
+        self.assertEqual(plug.outputs, [other])
+
+
+def test_generator_columnar_store(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check columnar store hold the same graph than the parser
+        """
+        p = guerilla_parser.parse(path)
+
+        store = guerilla_parser.GuerillaColumnarStore.from_parser(p)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(store))
+
+        for node in store.nodes:
+            self.assertEqual(node, store.path_to_node(node.path))
+            for child in node.children:
+                self.assertEqual(node.get_child(child.name), child)
+
+        for plug in store.plugs:
+            self.assertEqual(plug, store.path_to_plug(plug.path))
+
+        for oid, obj in p.objs.items():
+            view = store.get_obj(oid)
+            self.assertEqual(view.name, obj.name)
+            self.assertEqual(view.type, obj.type)
+
+        with self.assertRaises(KeyError):
+            store.get_obj(-1)
+
+        with self.assertRaises(guerilla_parser.PathError):
+            store.path_to_node('TAGADAPOUETPOUET')
+
+        # queries
+        for node in [p.root] + list(p.nodes):
+
+            under = "" if node.id == 1 else node.path
+            view = store.path_to_node(under) if under else store.root
+
+            descendants = [n for n in p.nodes
+                           if n.path.startswith(under + '|')]
+
+            self.assertEqual(
+                [n.path for n in store.find_nodes(under=view)],
+                [n.path for n in descendants])
+
+            self.assertEqual(
+                [n.path for n in store.find_nodes('LayerOut', view)],
+                [n.path for n in descendants if n.type == 'LayerOut'])
+
+            self.assertEqual(
+                sorted(pl.path for pl in store.find_plugs('PlugName', view)),
+                sorted(pl.path for n in descendants for pl in n.plugs
+                       if pl.name == 'PlugName'))
+
+        self.assertEqual(store.find_nodes('TAGADAPOUETPOUET'), [])
+
+    return test_func
+
+
+class ColumnarStoreTestCase(unittest.TestCase):
+
+    def test_from_file(self):
+
+        path = default_gprojects[0]
+
+        store = guerilla_parser.GuerillaColumnarStore.from_file(path)
+
+        self.assertEqual(_graph_signature(guerilla_parser.parse(path)),
+                         _graph_signature(store))
+
+        self.assertEqual(
+            store.path_to_plug('|Preferences|RenderViewport.ColorMode').value,
+            'multiply')
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('columnar_store', path)
+    test = test_generator_columnar_store(path)
+    setattr(ColumnarStoreTestCase, test_name, test)
+
+
+class ChildIndexTestCase(unittest.TestCase):
+
+    def test_wide_node(self):
+
+        root = guerilla_parser.GuerillaNode(1, 'Root', 'Root')
+
+        children = [guerilla_parser.GuerillaNode(i + 2, name, 'Child', root)
+                    for i, name in enumerate(['foo|bar', 'foo.bar']
+                                             + list(range(100)))]
+
+        for child in children:
+            self.assertIs(root.get_child(child.name), child)
+
+        # children added after index creation
+        child = guerilla_parser.GuerillaNode(200, 'late', 'Child', root)
+
+        self.assertIs(root.get_child('late'), child)
+
+        # rename
+        child.name = 'renamed'
+
+        self.assertIs(root.get_child('renamed'), child)
+        self.assertEqual(child.path, '|renamed')
+
+        with self.assertRaises(guerilla_parser.ChildError):
+            root.get_child('late')
+
+        with self.assertRaises(guerilla_parser.ChildError):
+            root.get_child('99')  # only int 99 exists
+
+
+class PathIndexTestCase(unittest.TestCase):
+
+    def test_bulk(self):
+
+        path = default_gprojects[0]
+
+        for index_paths in (None, True, False):
+
+            p = guerilla_parser.parse(path, index_paths=index_paths)
+
+            nodes = list(p.nodes)
+            plugs = list(p.plugs)
+
+            self.assertEqual(p.paths_to_nodes(n.path for n in nodes), nodes)
+            self.assertEqual(p.paths_to_plugs(pl.path for pl in plugs), plugs)
+
+            with self.assertRaises(guerilla_parser.PathError):
+                p.paths_to_nodes(['|Preferences', '|TAGADAPOUETPOUET'])
+
+            self.assertEqual(
+                p.paths_to_nodes(['|TAGADAPOUETPOUET', '|Preferences'],
+                                 ignore_missing=True),
+                [None, p.root.get_child('Preferences')])
+
+            self.assertEqual(
+                p.paths_to_plugs(['|Preferences.TAGADAPOUETPOUET'],
+                                 ignore_missing=True),
+                [None])
+
+    def test_rename(self):
+
+        p = guerilla_parser.parse(default_gprojects[0])
+
+        node = p.path_to_node('|Preferences')
+
+        node.name = 'Renamed'
+
+        p.clear_path_index()
+
+        self.assertIs(p.path_to_node('|Renamed'), node)
+
+        with self.assertRaises(guerilla_parser.PathError):
+            p.path_to_node('|Preferences')
+
+        # outdated index entries are found again once nodes are renamed
+        node.name = 'Preferences'
+
+        self.assertIs(p.path_to_node('|Preferences'), node)
+
+        child = node.children[0]
+
+        node.name = 'Renamed'
+
+        self.assertIs(p.path_to_node('|Renamed|' + child.name), child)
+
+    def test_other_parser_rename(self):
+
+        p = guerilla_parser.parse(default_gprojects[0])
+        p_other = guerilla_parser.parse(default_gprojects[0])
+
+        node = p_other.path_to_node('|Preferences')
+        path_index = p_other._GuerillaParser__path_index
+
+        p.path_to_node('|Preferences').name = 'Renamed'
+
+        # renaming a node doesn't drop index of other parsers
+        self.assertIs(p_other.path_to_node('|Preferences'), node)
+        self.assertIs(p_other._GuerillaParser__path_index, path_index)
+
+    def test_same_name_siblings(self):
+
+        content = ('oid[1]=create("GADocument","\\"\\"","LUIDocument")\n'
+                   'oid[2]=create("SceneGraphNode","$1","foo")\n'
+                   'oid[3]=create("SceneGraphNode","$1","foo")\n')
+
+        for index_paths in (None, False):
+
+            p = guerilla_parser.GuerillaParser(content,
+                                               index_paths=index_paths)
+
+            # first sibling, like a walk from root
+            self.assertEqual(p.path_to_node('|foo').id, 2)
+
+            p.objs[2].name = 'bar'
+            p.objs[3].name = 'baz'
+
+            with self.assertRaises(guerilla_parser.PathError):
+                p.path_to_node('|foo')
+
+            self.assertEqual(p.paths_to_nodes(['|bar', '|baz']),
+                             [p.objs[2], p.objs[3]])
+
+
+def test_generator_source_location(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check node and plug source offsets point to their commands
+        """
+        p = guerilla_parser.parse(path)
+
+        content = p.original_content
+
+        for node in p.nodes:
+
+            if node.source_offset is None:
+                continue
+
+            start, end = p.command_span(node.source_offset)
+
+            self.assertTrue(content[start:end].startswith(
+                'oid[{}]='.format(node.id)))
+
+            self.assertEqual(p.line_number(start),
+                             content.count('\n', 0, start) + 1)
+
+            sub_start, sub_end = p.subtree_span(node)
+
+            self.assertLessEqual(sub_start, start)
+            self.assertGreaterEqual(sub_end, end)
+
+        for plug in p.plugs:
+
+            if plug.source_offset is not None:
+                start, end = p.command_span(plug.source_offset)
+                self.assertTrue(content[start:end].startswith(('oid[',
+                                                               'set(')))
+
+            if plug.input_source_offset is not None:
+                start, end = p.command_span(plug.input_source_offset)
+                self.assertTrue(content[start:end].startswith('connect('))
+
+        # streamed parsing record same offsets
+        p_stream = guerilla_parser.parse(path, keep_content=False)
+
+        self.assertEqual([n.source_offset for n in p.nodes],
+                         [n.source_offset for n in p_stream.nodes])
+        self.assertEqual([(pl.source_offset, pl.input_source_offset)
+                          for pl in p.plugs],
+                         [(pl.source_offset, pl.input_source_offset)
+                          for pl in p_stream.plugs])
+
+        with self.assertRaises(RuntimeError):
+            p_stream.line_number(0)
+
+    return test_func
+
+
+class SourceLocationTestCase(unittest.TestCase):
+    pass
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('source_location', path)
+    test = test_generator_source_location(path)
+    setattr(SourceLocationTestCase, test_name, test)
+
+
+def test_generator_parse_stats(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check parse stats match parsed graph
+        """
+        p = guerilla_parser.parse(path)
+
+        self.assertIsNone(p.parse_stats)
+
+        p_stats = guerilla_parser.parse(path, parse_stats=True)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_stats))
+
+        stats = p_stats.parse_stats
+
+        self.assertEqual(stats.node_count, len(list(p.nodes)) + 1)
+        self.assertEqual(stats.implicit_node_count, len(p._implicit_nodes))
+        # root plugs are not in p.plugs
+        plugs = list(p.root.plugs) + list(p.plugs)
+
+        self.assertEqual(stats.plug_count, len(plugs))
+        self.assertEqual(stats.connection_count,
+                         sum(len(plug.outputs) for plug in plugs))
+
+        commands = list(guerilla_parser.iter_commands(path))
+
+        self.assertEqual(sum(stats.command_counts.values()), len(commands))
+        self.assertEqual(sorted(stats.link_times),
+                         sorted(stats.command_counts))
+        self.assertEqual(stats.command_counts.get('set', 0),
+                         sum(1 for c in commands if c.cmd == 'set'))
+        self.assertEqual(sum(stats.value_counts.values()) +
+                         sum(stats.value_error_counts.values()),
+                         stats.command_counts.get('set', 0) +
+                         stats.command_counts.get('create plug', 0))
+
+        for seconds in chain(stats.link_times.values(),
+                             stats.value_times.values(),
+                             [stats.tokenize_time,
+                              stats.implicit_node_time]):
+            self.assertGreaterEqual(seconds, 0.0)
+
+        self.assertLessEqual(stats.tokenize_time + stats.link_time,
+                             stats.total_time)
+
+        self.assertIn('tokenize', str(stats))
+
+        # stats are kept by copies
+        self.assertEqual(p_stats.copy().parse_stats.plug_count,
+                         stats.plug_count)
+
+    return test_func
+
+
+class ParseStatsTestCase(unittest.TestCase):
+
+    def test_filtered_values(self):
+
+        p = guerilla_parser.parse(default_gprojects[0], parse_stats=True,
+                                  plug_names=['ArchiveSearchPath'])
+
+        plugs = [plug for node in chain([p.root], p.nodes)
+                 for plug in node.plugs]
+
+        # only kept plug values are converted, once
+        self.assertEqual(sum(p.parse_stats.value_counts.values()),
+                         len(plugs))
+
+        for plug in plugs:
+            self.assertIsNone(plug._get_raw_value()[1])
+
+    def test_value_errors(self):
+
+        p = guerilla_parser.GuerillaParser(
+            'oid[1]=create("GADocument","\\"\\"","LUIDocument")\n'
+            'oid[2]=create("Plug","$1","Count",4,types.int,foo)\n'
+            'oid[3]=create("Plug","$1","Size",4,types.int,3)\n',
+            parse_stats=True)
+
+        stats = p.parse_stats
+
+        self.assertEqual(stats.value_error_counts, {'types.int': 1})
+        self.assertEqual(stats.value_counts, {'types.int': 1})
+        self.assertIn('value errors types.int', str(stats))
+
+        # invalid value still raise on access
+        with self.assertRaises(ValueError):
+            p.path_to_plug('.Count').value
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('parse_stats', path)
+    test = test_generator_parse_stats(path)
+    setattr(ParseStatsTestCase, test_name, test)
+
+
+class _RecordHooks(guerilla_parser.ParseHooks):
+    """Hooks recording every call.
+    """
+    def __init__(self):
+        self.calls = []
+
+    def on_create(self, obj, offset):
+        self.calls.append(('create', obj, offset))
+
+    def on_set(self, plug, offset):
+        self.calls.append(('set', plug, offset))
+
+    def on_connect(self, out_plug, in_plug, offset):
+        self.calls.append(('connect', (out_plug, in_plug), offset))
+
+    def on_depend(self, out_node, out_plug_name, in_node, in_plug_name,
+                  offset):
+        self.calls.append(('depend', (out_node, in_node), offset))
+
+    def on_unknown(self, cmd, offset):
+        self.calls.append((cmd, None, offset))
+
+
+def test_generator_hooks(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check hooks are called once per linked command
+        """
+        hooks = _RecordHooks()
+
+        p = guerilla_parser.parse(path, hooks=hooks, parse_stats=True)
+
+        self.assertEqual(_graph_signature(p),
+                         _graph_signature(guerilla_parser.parse(path)))
+
+        counts = dict(p.parse_stats.command_counts)
+
+        counts['create'] = counts.pop('create node', 0) + \
+            counts.pop('create plug', 0)
+
+        counts.pop('docformatrevision')
+
+        # some connections are skipped (expression nodes, document root)
+        connect_count = counts.pop('connect', 0)
+
+        calls = {}
+
+        for kind, obj, offset in hooks.calls:
+
+            calls[kind] = calls.get(kind, 0) + 1
+
+            self.assertTrue(p.original_content.startswith(
+                'oid[' if kind == 'create' else kind, offset))
+
+            if kind in ('create', 'set'):
+                self.assertEqual(obj.source_offset, offset)
+            elif kind == 'connect':
+                self.assertIs(obj[1].input, obj[0])
+                self.assertEqual(obj[1].input_source_offset, offset)
+
+        self.assertLessEqual(calls.pop('connect', 0), connect_count)
+        self.assertEqual(calls, counts)
+
+    return test_func
+
+
+class HooksTestCase(unittest.TestCase):
+
+    def test_diagnose(self):
+
+        path = default_gprojects[0]
+
+        stdout = sys.stdout
+
+        sys.stdout = out = StringIO()
+
+        try:
+            guerilla_parser.parse(path, diagnose=True)
+            diagnose_out = out.getvalue()
+
+            out.truncate(0)
+
+            # diagnose is ignored if hooks are given
+            guerilla_parser.parse(path, diagnose=True,
+                                  hooks=guerilla_parser.ParseHooks())
+        finally:
+            sys.stdout = stdout
+
+        self.assertIn("Create '|Preferences' 'Preferences'", diagnose_out)
+        self.assertIn("Set: |Preferences", diagnose_out)
+        self.assertIn("Connect: ", diagnose_out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_filters(self):
+
+        path = default_gprojects[0]
+
+        hooks = _RecordHooks()
+
+        p = guerilla_parser.parse(path, hooks=hooks,
+                                  node_types=['RenderPass'])
+
+        # root node is always created
+        for kind, obj, _ in hooks.calls:
+            if kind == 'create' and obj is not p.root:
+                self.assertTrue(obj.path.startswith('|RenderPass'))
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('hooks', path)
+    test = test_generator_hooks(path)
+    setattr(HooksTestCase, test_name, test)
+
+
+def _offset_signature(p):
+    """Macro to get node and plug offsets and ordered connections of given
+    parser.
+
+    :param p: Parser to get offset signature from.
+    :type p: guerilla_parser.GuerillaParser
+    :rtype: list[tuple]
+    """
+    sig = []
+
+    for node in [p.root] + list(p.nodes):
+
+        sig.append(node.source_offset)
+
+        for plug in node.plugs:
+            sig.append((plug.name, plug.source_offset,
+                        plug.input_source_offset,
+                        [o.path for o in plug.outputs]))
+
+    return sig
+
+
+def _replace_line(content, prefix, func):
+    """Macro to replace last line of given `content` starting with
+    `prefix`.
+
+    :param content: Guerilla file content.
+    :type content: str
+    :param prefix: Stripped line prefix.
+    :type prefix: str
+    :param func: Function returning new line from line.
+    :type func: function
+    :return: New content, `None` if no line start with `prefix`.
+    :rtype: str
+    """
+    lines = content.split('\n')
+
+    for i in reversed(range(len(lines))):
+        if lines[i].lstrip().startswith(prefix):
+            lines[i] = func(lines[i])
+            return '\n'.join(lines)
+
+    return None
+
+
+def test_generator_update(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check updated parser graph match a full parsing of new content
+        """
+        p = guerilla_parser.parse(path)
+
+        content = p.original_content
+
+        root = p.root
+
+        # value change, added line, removed line, added node
+        updates = [
+            (_replace_line(content, 'set("$',
+                           lambda l: l[:l.index('",') + 2] + '"changed")'),
+             True),
+            ('\n' + content, True),
+            (_replace_line(content, 'set("$', lambda l: ''), None),
+            (_replace_line(content, 'connect("$', lambda l: ''), None),
+            (content + 'oid[999999]=create("SceneGraphNode","$1","Foo")\n',
+             False),
+            (content, None)]
+
+        for new_content, incremental in updates:
+
+            if new_content is None:
+                continue
+
+            is_incremental = p.update(new_content)
+
+            if incremental is not None:
+                self.assertEqual(is_incremental, incremental)
+
+            if is_incremental:
+                self.assertIs(p.root, root)
+
+            root = p.root
+
+            p_new = guerilla_parser.GuerillaParser(new_content)
+
+            self.assertEqual(p.original_content, new_content)
+            self.assertEqual(_graph_signature(p), _graph_signature(p_new))
+            self.assertEqual(_offset_signature(p), _offset_signature(p_new))
+
+    return test_func
+
+
+class UpdateTestCase(unittest.TestCase):
+
+    def test_renumbered(self):
+
+        p = guerilla_parser.parse(default_gprojects[0])
+
+        # oid[2] and $2 references
+        content = re.sub(r'(?<=[\[$])2(?=\D)', '999999', p.original_content)
+
+        self.assertFalse(p.update(content))
+        self.assertIn(999999, p.objs)
+        self.assertEqual(_graph_signature(p), _graph_signature(
+            guerilla_parser.GuerillaParser(content)))
+
+    def test_fallback(self):
+
+        path = default_gprojects[0]
+
+        # edited and filtered parsers are parsed again
+        p = guerilla_parser.parse(path)
+        plug = p.path_to_plug('|Preferences.ArchiveSearchPath')
+        p.set_plug_value([(plug, '/foo/bar')])
+
+        self.assertFalse(p.update(p.original_content))
+        self.assertFalse(p.has_changed)
+
+        p = guerilla_parser.parse(path, node_types=['RenderPass'])
+
+        self.assertFalse(p.update(p.original_content))
+
+        # filters are kept
+        for node in p.nodes:
+            self.assertTrue(node.path.startswith('|RenderPass'))
+
+        # parser is left untouched on parsing error
+        p = guerilla_parser.parse(path)
+        content = p.original_content
+
+        with self.assertRaises(Exception):
+            p.update(content + 'oid[999999]=create("Plug","$999998","A",'
+                               '4,types.float,0)\n')
+
+        self.assertEqual(p.original_content, content)
+        self.assertEqual(_graph_signature(p), _graph_signature(
+            guerilla_parser.GuerillaParser(content)))
+
+        with self.assertRaises(RuntimeError):
+            guerilla_parser.parse(path, keep_content=False).update('')
+
+    def test_fallback_state(self):
+
+        p = guerilla_parser.parse(default_gprojects[0], parse_stats=True,
+                                  index_paths=True)
+        p.foo = 'bar'
+
+        content = re.sub(r'(?<=[\[$])2(?=\D)', '999999', p.original_content)
+
+        stats = p.parse_stats
+        node = p.path_to_node('|Preferences')
+
+        self.assertFalse(p.update(content))
+
+        # only parsed graph is replaced
+        self.assertEqual(p.foo, 'bar')
+        self.assertIsNot(p.parse_stats, stats)
+        self.assertEqual(p.parse_stats.node_count, stats.node_count)
+
+        new_node = p.path_to_node('|Preferences')
+
+        self.assertIsNot(new_node, node)
+        self.assertIn(new_node, list(p.nodes))
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('update', path)
+    test = test_generator_update(path)
+    setattr(UpdateTestCase, test_name, test)
+
+
+class _StopAfterPolls(object):
+    """Stop event set after given number of waits.
+    """
+    def __init__(self, count):
+        self.count = count
+
+    def is_set(self):
+        return self.count <= 0
+
+    def wait(self, timeout):
+        self.count -= 1
+
+
+class ProjectWatcherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'project.gproject')
+        shutil.copy(default_gprojects[0], self.path)
+
+        # read the way the watcher does
+        with grl_util.open_(self.path) as f:
+            self.content = f.read()
+
+        self.mtime = os.stat(self.path).st_mtime
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def __write(self, content):
+        """Write given content to watched file, with a new modification
+        time.
+        """
+        if not isinstance(content, bytes):  # Python 3
+            content = content.encode('iso-8859-1')
+
+        with io.open(self.path, 'wb') as f:
+            f.write(content)
+
+        self.mtime += 10
+
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    def test_poll(self):
+
+        watcher = guerilla_parser.GuerillaProjectWatcher([self.path])
+
+        self.assertIn(self.path, watcher)
+        self.assertEqual(watcher.paths, [os.path.abspath(self.path)])
+        self.assertEqual(len(watcher), 1)
+        self.assertEqual(watcher.poll(), [])
+
+        p = watcher[self.path]
+
+        plug = p.path_to_plug('|Preferences.ArchiveSearchPath')
+
+        # incremental update keep objects
+        content = self.content.replace(
+            'set("$' + str(plug.parent.id) + '.ArchiveSearchPath",' +
+            plug.org_value + ')',
+            'set("$' + str(plug.parent.id) + '.ArchiveSearchPath",'
+            '"/foo/bar")')
+
+        self.assertNotEqual(content, self.content)
+
+        self.__write(content)
+
+        self.assertEqual(watcher.poll(), [os.path.abspath(self.path)])
+        self.assertIs(watcher[self.path], p)
+        self.assertEqual(plug.value, '/foo/bar')
+        self.assertEqual(watcher.poll(), [])
+
+        # new node
+        content += 'oid[999999]=create("SceneGraphNode","$1","Foo")\n'
+
+        self.__write(content)
+
+        self.assertEqual(watcher.poll(), [os.path.abspath(self.path)])
+        self.assertEqual(watcher[self.path].path_to_node('|Foo').id, 999999)
+        self.assertEqual(_graph_signature(watcher[self.path]),
+                         _graph_signature(
+                             guerilla_parser.GuerillaParser(content)))
+
+        watcher.remove(self.path)
+
+        self.assertNotIn(self.path, watcher)
+        self.assertEqual(watcher.poll(), [])
+
+    def test_errors(self):
+
+        watcher = guerilla_parser.GuerillaProjectWatcher([self.path])
+
+        p = watcher[self.path]
+
+        # broken file keep previous parser
+        self.__write(self.content + 'oid[999999]=create("Plug","$999998",'
+                                    '"A",4,types.float,0)\n')
+
+        self.assertEqual(watcher.poll(), [])
+        self.assertIs(watcher[self.path], p)
+        self.assertIn(os.path.abspath(self.path), watcher.errors)
+
+        # missing file
+        os.remove(self.path)
+
+        self.assertEqual(watcher.poll(), [])
+        self.assertIs(watcher[self.path], p)
+
+        self.__write(self.content)
+
+        self.assertEqual(watcher.poll(), [os.path.abspath(self.path)])
+        self.assertEqual(watcher.errors, {})
+
+        # never loaded file
+        missing = os.path.join(self.tmp_dir, 'missing.gproject')
+
+        self.assertIsNone(watcher.add(missing))
+        self.assertIn(missing, watcher.errors)
+
+        with self.assertRaises(KeyError):
+            watcher[missing]
+
+    def test_not_incremental(self):
+
+        watcher = guerilla_parser.GuerillaProjectWatcher(
+            [self.path], incremental=False, node_types=['RenderPass'])
+
+        p = watcher[self.path]
+
+        self.__write('\n' + self.content)
+
+        self.assertEqual(list(watcher.watch(
+            stop_event=_StopAfterPolls(1))), [os.path.abspath(self.path)])
+        self.assertIsNot(watcher[self.path], p)
+
+        for node in watcher[self.path].nodes:
+            self.assertTrue(node.path.startswith('|RenderPass'))
+
+
+def _graph_object_key(obj):
+    """Macro to get path of given graph node or plug.
+
+    :type obj: guerilla_parser.GuerillaNode|guerilla_parser.GuerillaPlug
+    :rtype: str
+    """
+    if isinstance(obj, guerilla_parser.GuerillaNode):
+        return _node_path(obj)
+
+    return _node_path(obj.parent) + '.' + obj.name
+
+
+def _graph_edges(g):
+    """Macro to get node and plug outputs of given graph, in graph order.
+
+    :type g: guerilla_parser.GuerillaGraph
+    :rtype: list[tuple]
+    """
+    return [(_graph_object_key(obj),
+             [_graph_object_key(output) for output in g.outputs(obj)])
+            for obj in g.nodes + g.plugs]
+
+
+def test_generator_graph(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check graph closures and order match a naive walk
+        """
+        p = guerilla_parser.parse(path)
+
+        g = p.graph
+
+        self.assertIs(p.graph, g)
+
+        for plug in p.plugs:
+            if plug.input is not None:
+                self.assertIn(plug, g.outputs(plug.input))
+                self.assertIn(plug.input, g.inputs(plug))
+
+        for obj in g.nodes + g.plugs:
+
+            for closure, next_objs in ((g.upstream, g.inputs),
+                                       (g.downstream, g.outputs)):
+
+                reached = set()
+                todo = list(next_objs(obj))
+
+                while todo:
+                    other = todo.pop()
+                    if other not in reached:
+                        reached.add(other)
+                        todo.extend(next_objs(other))
+
+                self.assertEqual(closure(obj), reached)
+                self.assertIs(closure(obj), closure(obj))
+
+        for plugs, objs in ((False, g.nodes), (True, g.plugs)):
+
+            cycles = g.cycles(plugs)
+
+            for cycle in cycles:
+                for obj in cycle:
+                    self.assertEqual(g.downstream(obj) & set(cycle),
+                                     set(cycle))
+
+            if cycles:
+                with self.assertRaises(guerilla_parser.CycleError):
+                    g.topological_order(plugs)
+                continue
+
+            order = g.topological_order(plugs)
+
+            self.assertEqual(sorted(order, key=id), sorted(objs, key=id))
+
+            positions = dict((obj, i) for i, obj in enumerate(order))
+
+            for obj in order:
+                for output in g.outputs(obj):
+                    self.assertLess(positions[obj], positions[output])
+
+        # graph doesn't depend on how parser has been built
+        edges = _graph_edges(g)
+
+        p_pickle = pickle.loads(pickle.dumps(p, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(_graph_edges(p_pickle.graph), edges)
+        self.assertEqual(_graph_edges(p.copy().graph), edges)
+
+        self.assertTrue(p.update('\n' + p.original_content))
+        self.assertIsNot(p.graph, g)
+        self.assertEqual(_graph_edges(p.graph), edges)
+
+    return test_func
+
+
+class GraphTestCase(unittest.TestCase):
+
+    content = ('oid[1]=create("GADocument","\\"\\"","LUIDocument")\n'
+               'oid[2]=create("SceneGraphNode","$1","A")\n'
+               'set("$2.X",1)\n'
+               'oid[3]=create("SceneGraphNode","$1","B")\n'
+               'oid[4]=create("ExpressionInput","$3","In",4,types.float,0)\n'
+               'oid[5]=create("ExpressionOutput","$3","Out",4,types.float,'
+               '0)\n'
+               'oid[6]=create("SceneGraphNode","$1","C")\n'
+               'set("$6.Y",1)\n'
+               'connect("$4","$2.X")\n'
+               'connect("$6.Y","$5")\n'
+               'depend("$5","$4")\n'
+               'depend("$2.Missing","$6.Y")\n')
+
+    def test_links(self):
+
+        p = guerilla_parser.GuerillaParser(self.content)
+
+        g = p.graph
+
+        a, b, c = p.objs[2], p.objs[3], p.objs[6]
+        a_x, b_in, b_out, c_y = (a.get_plug('X'), p.objs[4], p.objs[5],
+                                 c.get_plug('Y'))
+
+        # plugs connected by id are not plug inputs
+        self.assertIsNone(b_in.input)
+
+        self.assertEqual(g.topological_order(plugs=True),
+                         [a_x, b_in, b_out, c_y])
+        self.assertEqual(g.upstream(c_y), set([a_x, b_in, b_out]))
+        self.assertEqual(g.downstream(c_y), set())
+        self.assertEqual(g.cycles(plugs=True), [])
+
+        # missing plug is a node dependency
+        self.assertEqual(g.inputs(a), [c])
+        self.assertEqual(g.outputs(b), [c])
+
+        self.assertEqual([set(cycle) for cycle in g.cycles()],
+                         [set([a, b, c])])
+        self.assertEqual(g.upstream(a), set([a, b, c]))
+
+        with self.assertRaises(guerilla_parser.CycleError):
+            g.topological_order()
+
+        # objects out of the graph
+        self.assertEqual(g.upstream(p.root), set())
+        self.assertEqual(g.outputs(p.root), [])
+
+    def test_update(self):
+
+        p = guerilla_parser.GuerillaParser(self.content)
+
+        g = p.graph
+
+        self.assertTrue(p.update(self.content.replace('set("$2.X",1)',
+                                                      'set("$2.X",2)')))
+        self.assertEqual(_graph_edges(p.graph), _graph_edges(g))
+
+        # graph links are parsed again
+        content = self.content.replace('depend("$2.Missing","$6.Y")\n', '')
+
+        self.assertFalse(p.update(content))
+        self.assertEqual(p.graph.cycles(), [])
+        self.assertEqual(_graph_edges(p.graph), _graph_edges(
+            guerilla_parser.GuerillaParser(content).graph))
+
+    def test_deep_graph(self):
+
+        lines = ['oid[1]=create("GADocument","\\"\\"","LUIDocument")\n']
+
+        for oid in range(2, 10000):
+            lines.append('oid[{}]=create("SceneGraphNode","$1","n{}")\n'
+                         .format(oid, oid))
+
+        for oid in range(3, 10000):
+            lines.append('depend("${}","${}")\n'.format(oid, oid - 1))
+
+        g = guerilla_parser.GuerillaParser(''.join(lines)).graph
+
+        first, last = g.topological_order()[::len(g.nodes) - 1]
+
+        self.assertEqual((first.id, last.id), (2, 9999))
+        self.assertEqual(len(g.downstream(first)), 9997)
+        self.assertEqual(len(g.upstream(last)), 9997)
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('graph', path)
+    test = test_generator_graph(path)
+    setattr(GraphTestCase, test_name, test)
+
+
+def _count_nodes(p):
+    """Module level callback for parse_many() tests.
+    """
+    return sum(1 for _ in p.nodes)
+
+
+def _iter_nodes(p):
+    """Module level callback for parse_many() tests, returning a value that
+    can't be pickled.
+    """
+    return p.nodes
+
+
+class ParseManyTestCase(unittest.TestCase):
+
+    def test_callback(self):
+
+        expected = [(path, _count_nodes(guerilla_parser.parse(path)), None)
+                    for path in all_gfiles]
+
+        for workers in (1, 2):
+
+            results = list(guerilla_parser.parse_many(
+                all_gfiles, workers=workers, callback=_count_nodes))
+
+            self.assertEqual(results, expected)
+
+            results = guerilla_parser.parse_many(
+                all_gfiles, workers=workers, callback=_count_nodes,
+                ordered=False)
+
+            self.assertEqual(sorted(results), sorted(expected))
+
+    def test_parser(self):
+
+        path = default_gprojects[0]
+
+        for workers in (1, 2):
+
+            res, = guerilla_parser.parse_many([path], workers=workers)
+
+            self.assertTrue(res.ok)
+            self.assertEqual(_graph_signature(res.value),
+                             _graph_signature(guerilla_parser.parse(path)))
+
+    def test_error(self):
+
+        paths = [default_gprojects[0], '/TAGADAPOUETPOUET.gproject']
+
+        for workers in (1, 2):
+
+            ok_res, err_res = guerilla_parser.parse_many(
+                paths, workers=workers, callback=_count_nodes)
+
+            self.assertTrue(ok_res.ok)
+            self.assertFalse(err_res.ok)
+            self.assertEqual(err_res.path, paths[1])
+            self.assertIsNone(err_res.value)
+            self.assertIn('Error', err_res.error)
+
+    def test_unpicklable_value(self):
+
+        paths = [default_gprojects[0], default_gprojects[1]]
+
+        results = list(guerilla_parser.parse_many(paths, workers=2,
+                                                  callback=_iter_nodes))
+
+        self.assertEqual([res.path for res in results], paths)
+
+        for res in results:
+            self.assertFalse(res.ok)
+            self.assertIsNone(res.value)
+
+
+# currently running and maximum running callbacks, see _count_nodes_slow()
+_running = [0, 0]
+_running_lock = threading.Lock()
+
+
+def _count_nodes_slow(p):
+    """Module level callback for parse_async() tests, recording maximum
+    number of callbacks running at once.
+    """
+    with _running_lock:
+        _running[0] += 1
+        _running[1] = max(_running)
+
+    time.sleep(0.02)
+
+    with _running_lock:
+        _running[0] -= 1
+
+    return _count_nodes(p)
+
+
+@unittest.skipIf(sys.version_info < (3, 4), "needs python 3.4 or later")
+class ParseAsyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        import asyncio
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def __gather(self, *calls):
+        """Run given parse_async() calls from the running loop and return
+        their results.
+        """
+        import asyncio
+
+        result = asyncio.Future(loop=self.loop)
+
+        def start():
+            future = asyncio.gather(*(call() for call in calls))
+            future.add_done_callback(
+                lambda future: result.set_exception(future.exception())
+                if future.exception() else result.set_result(future.result()))
+
+        self.loop.call_soon(start)
+
+        return self.loop.run_until_complete(result)
+
+    def test_parser(self):
+
+        path = default_gprojects[0]
+
+        p, = self.__gather(lambda: guerilla_parser.parse_async(path))
+
+        self.assertEqual(_graph_signature(p),
+                         _graph_signature(guerilla_parser.parse(path)))
+
+        p, = self.__gather(lambda: guerilla_parser.parse_async(
+            path, keep_content=False))
+
+        self.assertIsNone(p.original_content)
+
+    def test_semaphore(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        expected = [_count_nodes(guerilla_parser.parse(path))
+                    for path in all_gfiles]
+
+        semaphore = asyncio.Semaphore(2)
+
+        _running[1] = 0
+
+        with ThreadPoolExecutor(4) as executor:
+            results = self.__gather(*(partial(
+                guerilla_parser.parse_async, path, executor=executor,
+                semaphore=semaphore, callback=_count_nodes_slow)
+                for path in all_gfiles))
+
+        self.assertEqual(results, expected)
+        self.assertLessEqual(_running[1], 2)
+
+    def test_process_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+
+        expected = [_count_nodes(guerilla_parser.parse(path))
+                    for path in all_gfiles]
+
+        with ProcessPoolExecutor(2) as executor:
+            results = self.__gather(*(partial(
+                guerilla_parser.parse_async, path, executor=executor,
+                callback=_count_nodes) for path in all_gfiles))
+
+        self.assertEqual(results, expected)
+
+    def test_error(self):
+
+        with self.assertRaises(IOError):
+            self.__gather(lambda: guerilla_parser.parse_async(
+                '/TAGADAPOUETPOUET.gproject'))
+
+    def test_max_concurrency(self):
+        import guerilla_parser.aio
+        from concurrent.futures import ThreadPoolExecutor
+
+        max_concurrency = guerilla_parser.aio.max_concurrency
+
+        _running[1] = 0
+
+        try:
+            guerilla_parser.aio.max_concurrency = 2
+
+            with ThreadPoolExecutor(4) as executor:
+                results = self.__gather(*(partial(
+                    guerilla_parser.parse_async, path, executor=executor,
+                    callback=_count_nodes_slow) for path in all_gfiles))
+
+        finally:
+            guerilla_parser.aio.max_concurrency = max_concurrency
+
+        self.assertEqual(len(results), len(all_gfiles))
+        self.assertLessEqual(_running[1], 2)
+        self.assertGreater(_running[1], 0)
+
+
+class _SmallChunkParser(guerilla_parser.GuerillaParser):
+    """Parser sending small chunks to workers, so test files are split.
+    """
+    _PARALLEL_CHUNK_SIZE = 1 << 12
+
+
+def test_generator_parallel_parse(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check parallel parsing build the same graph than regular parsing
+        """
+        p = guerilla_parser.parse(path)
+
+        chunks = list(grl_util.iter_str_line_chunks(
+            p.original_content, _SmallChunkParser._PARALLEL_CHUNK_SIZE))
+
+        self.assertEqual(''.join(chunks), p.original_content)
+
+        for chunk in chunks:
+            self.assertTrue(chunk.endswith('\n'))
+
+        p_para = _SmallChunkParser.from_file(path, workers=2)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_para))
+        self.assertEqual([n.source_offset for n in p.nodes],
+                         [n.source_offset for n in p_para.nodes])
+        self.assertEqual(p.original_content, p_para.original_content)
+
+        p_para = _SmallChunkParser.from_file(path, keep_content=False,
+                                             workers=2)
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_para))
+
+    return test_func
+
+
+class ParallelParseTestCase(unittest.TestCase):
+    pass
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('parallel_parse', path)
+    test = test_generator_parallel_parse(path)
+    setattr(ParallelParseTestCase, test_name, test)
+
+
+def test_generator_tokenizer(path, name, tokenize):
+    """Generate a function testing given `path` with given tokenizer
+    backend.
+
+    :param path: gproject path to test
+    :param name: tokenizer backend name
+    :param tokenize: tokenizer backend function
+    :return: function
+    """
+    def test_func(self):
+        """check tokenizer backend gives reference records and graph
+        """
+        with grl_util.open_(path) as f:
+            content = f.read()
+
+        self.assertEqual(tokenize((content, 0)),
+                         guerilla_parser.parser._tokenize_chunk_lines(
+                             (content, 0)))
+
+        p = guerilla_parser.parse(path)
+
+        default_tokenize = guerilla_parser.parser._tokenize
+
+        try:
+            guerilla_parser.parser._tokenize = tokenize
+
+            p_tok = guerilla_parser.parse(path)
+
+            self.assertEqual(_graph_signature(p), _graph_signature(p_tok))
+            self.assertEqual([n.source_offset for n in p.nodes],
+                             [n.source_offset for n in p_tok.nodes])
+
+            p_tok = _SmallChunkParser.from_file(path, workers=2)
+
+            self.assertEqual(_graph_signature(p), _graph_signature(p_tok))
+
+        finally:
+            guerilla_parser.parser._tokenize = default_tokenize
+
+    return test_func
+
+
+class TokenizerTestCase(unittest.TestCase):
+
+    def test_default(self):
+
+        tokenizers = guerilla_parser.parser._tokenizers
+
+        self.assertIs(guerilla_parser.parser._tokenize, tokenizers[0][1])
+
+        # compiled tokenizer first, if available
+        self.assertEqual([name for name, _ in tokenizers][-2:],
+                         ['re', 'lines'])
+
+
+# every tokenizer backend available in current python
+for path in all_gfiles:
+    for name, tokenize in guerilla_parser.parser._tokenizers:
+        test_name = _gen_test_name('tokenizer_' + name, path)
+        test = test_generator_tokenizer(path, name, tokenize)
+        setattr(TokenizerTestCase, test_name, test)
+
+
+class SnapshotCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_snapshot_path(self):
+
+        cache = guerilla_parser.SnapshotCache(self.cache_dir)
+
+        # native string path, bytes on Python 2
+        snapshot_path = cache.snapshot_path(
+            os.path.join(self.tmp_dir, 'caf\xe9.gproject'))
+
+        self.assertEqual(os.path.dirname(snapshot_path), self.cache_dir)
+        self.assertNotEqual(snapshot_path, cache.snapshot_path(
+            os.path.join(self.tmp_dir, 'cafe.gproject')))
+
+    def __copy(self, path):
+        dst = os.path.join(self.tmp_dir, os.path.basename(path))
+        shutil.copy(path, dst)
+        return dst
+
+    def test_load(self):
+
+        for path in all_gfiles:
+
+            p = guerilla_parser.parse(path)
+
+            # first parse create snapshot, second one load it
+            for _ in range(2):
+
+                p_cache = guerilla_parser.parse(path,
+                                                cache_dir=self.cache_dir)
+
+                self.assertEqual(_graph_signature(p),
+                                 _graph_signature(p_cache))
+                self.assertEqual(p.original_content,
+                                 p_cache.original_content)
+                self.assertEqual(p.doc_format_rev, p_cache.doc_format_rev)
+
+            p_cache = guerilla_parser.parse(path, cache_dir=self.cache_dir,
+                                            keep_content=False)
+
+            self.assertEqual(_graph_signature(p), _graph_signature(p_cache))
+            self.assertIsNone(p_cache.original_content)
+
+    def test_filters(self):
+
+        path = default_gprojects[0]
+
+        guerilla_parser.parse(path, cache_dir=self.cache_dir)
+
+        p = guerilla_parser.parse(path, node_types=['RenderPass'])
+        p_cache = guerilla_parser.parse(path, cache_dir=self.cache_dir,
+                                        node_types=['RenderPass'])
+
+        self.assertEqual(_graph_signature(p), _graph_signature(p_cache))
+
+    def test_invalidation(self):
+
+        path = self.__copy(default_gprojects[0])
+
+        guerilla_parser.parse(path, cache_dir=self.cache_dir)
+
+        cache = guerilla_parser.SnapshotCache(self.cache_dir)
+
+        self.assertIsNotNone(cache.load(path, cache.key(path)))
+
+        with open(path, 'a') as f:
+            f.write('oid[999999]=create("SceneGraphNode","$1","Appended")\n')
+
+        self.assertIsNone(cache.load(path, cache.key(path)))
+
+        p = guerilla_parser.parse(path, cache_dir=self.cache_dir)
+
+        self.assertEqual(p.path_to_node('|Appended').id, 999999)
+
+        # corrupted snapshot is ignored
+        with open(cache.snapshot_path(path), 'wb') as f:
+            f.write(b'TAGADAPOUETPOUET')
+
+        self.assertIsNone(cache.load(path, cache.key(path)))
+
+        p = guerilla_parser.parse(path, cache_dir=self.cache_dir)
+
+        self.assertEqual(p.path_to_node('|Appended').id, 999999)
+
+    def test_hash_content(self):
+
+        path = self.__copy(default_gprojects[0])
+
+        with open(path) as f:
+            content = f.read()
+
+        stat = os.stat(path)
+
+        guerilla_parser.parse(path, cache_dir=self.cache_dir,
+                              cache_hash_content=True)
+
+        # same size and modification time
+        with open(path, 'w') as f:
+            f.write(content.replace('"LUIDocument"', '"LUIDocumenT"', 1))
+
+        os.utime(path, (stat.st_atime, stat.st_mtime))
+
+        p = guerilla_parser.parse(path, cache_dir=self.cache_dir,
+                                  cache_hash_content=True)
+
+        self.assertEqual(p.root.name, 'LUIDocumenT')
+
+    def test_untrusted_snapshot(self):
+
+        path = self.__copy(default_gprojects[0])
+
+        guerilla_parser.parse(path, cache_dir=self.cache_dir)
+
+        if os.name == 'posix':
+            self.assertEqual(os.stat(self.cache_dir).st_mode & 0o777, 0o700)
+
+        cache = guerilla_parser.SnapshotCache(self.cache_dir)
+
+        # snapshots are never unpickled
+        with open(cache.snapshot_path(path), 'wb') as f:
+            pickle.dump((cache._VERSION, cache.key(path), []), f)
+
+        self.assertIsNone(cache.load(path, cache.key(path)))
+
+    def test_eviction(self):
+
+        paths = [self.__copy(path) for path in default_gprojects]
+
+        cache = guerilla_parser.SnapshotCache(self.cache_dir)
+
+        guerilla_parser.parse(paths[0], cache_dir=self.cache_dir)
+
+        snapshot_size = os.path.getsize(cache.snapshot_path(paths[0]))
+
+        # make first snapshot the least recently used
+        os.utime(cache.snapshot_path(paths[0]), (0, 0))
+
+        guerilla_parser.parse(paths[1], cache_dir=self.cache_dir,
+                              cache_max_size=snapshot_size * 2 - 1)
+
+        self.assertFalse(os.path.exists(cache.snapshot_path(paths[0])))
+        self.assertTrue(os.path.exists(cache.snapshot_path(paths[1])))
+
+        cache.clear()
+
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+def test_generator_pickle(path):
+    """Generate a function testing given `path`.
+
+    :param path: gproject path to test
+    :return: function
+    """
+    def test_func(self):
+        """check pickled and copied parsers have the same graph
+        """
+        p = guerilla_parser.parse(path)
+
+        # decode some values first
+        for plug in p.plugs:
+            if plug.org_value is not None:
+                plug.value
+
+        sig = _graph_signature(p)
+
+        p_pickle = pickle.loads(pickle.dumps(p, pickle.HIGHEST_PROTOCOL))
+        p_copy = p.copy()
+
+        for other in (p_pickle, p_copy):
+
+            self.assertEqual(_graph_signature(other), sig)
+            self.assertEqual(other.original_content, p.original_content)
+            self.assertEqual(other.doc_format_rev, p.doc_format_rev)
+            self.assertEqual(sorted(other.objs), sorted(p.objs))
+            self.assertEqual([n.source_offset for n in other.nodes],
+                             [n.source_offset for n in p.nodes])
+
+    return test_func
+
+
+class PickleTestCase(unittest.TestCase):
+
+    def test_deep_graph(self):
+
+        lines = ['oid[1]=create("GADocument","\\"\\"","LUIDocument")\n']
+
+        for oid in range(2, 10000):
+            lines.append('oid[{}]=create("SceneGraphNode","${}","n")\n'
+                         .format(oid, oid - 1))
+
+        p = guerilla_parser.GuerillaParser(''.join(lines))
+
+        p = pickle.loads(pickle.dumps(p, pickle.HIGHEST_PROTOCOL))
+
+        self.assertEqual(p.objs[9999].parent.id, 9998)
+
+    def test_copy(self):
+
+        p = guerilla_parser.parse(default_gprojects[0])
+
+        plug = p.path_to_plug('|Preferences.ArchiveSearchPath')
+        plug.value  # decode value
+
+        p_copy = p.copy()
+
+        plug_copy = p_copy.path_to_plug('|Preferences.ArchiveSearchPath')
+
+        self.assertIsNot(plug_copy, plug)
+
+        p_copy.set_plug_value([(plug_copy, 'TAGADAPOUETPOUET')])
+
+        self.assertNotEqual(plug.value, 'TAGADAPOUETPOUET')
+        self.assertFalse(p.has_changed)
+        self.assertTrue(p_copy.has_changed)
+
+        p_copy.path_to_node('|Preferences').name = 'Renamed'
+
+        self.assertEqual(p.path_to_node('|Preferences').name, 'Preferences')
+
+    def test_node_plug(self):
+
+        p = guerilla_parser.parse(default_gprojects[0])
+
+        node = p.path_to_node('|Preferences')
+        plug = p.path_to_plug('|Preferences.ArchiveSearchPath')
+
+        node_pickle = pickle.loads(pickle.dumps(node))
+        plug_pickle = pickle.loads(pickle.dumps(plug))
+
+        self.assertEqual(node_pickle.path, node.path)
+        self.assertEqual(sorted(pl.name for pl in node_pickle.plugs),
+                         sorted(pl.name for pl in node.plugs))
+        self.assertEqual(plug_pickle.path, plug.path)
+        self.assertEqual(plug_pickle.value, plug.value)
+
+    def test_shared_graph(self):
+
+        p = guerilla_parser.parse(default_gprojects[0])
+
+        nodes = list(p.nodes)
+
+        nodes_dump = pickle.dumps(nodes, pickle.HIGHEST_PROTOCOL)
+
+        # graph is stored once, not once per node
+        self.assertLess(len(nodes_dump),
+                        2 * len(pickle.dumps(p, pickle.HIGHEST_PROTOCOL)))
+
+        nodes_pickle = pickle.loads(nodes_dump)
+
+        self.assertEqual([n.path for n in nodes_pickle],
+                         [n.path for n in nodes])
+        self.assertEqual(len(set(id(n.parent) for n in nodes_pickle
+                                 if n.parent.id == 1)), 1)
+
+        # nodes pickled along their parser are part of its graph
+        p_pickle, node_pickle = pickle.loads(pickle.dumps(
+            (p, p.path_to_node('|Preferences'))))
+
+        self.assertIs(p_pickle.path_to_node('|Preferences'), node_pickle)
+
+        # graph flat tables are not reused once graph is edited
+        node = p.path_to_node('|Preferences')
+        plug = p.path_to_plug('|Preferences.ArchiveSearchPath')
+
+        held = node.__reduce__(), p.__getstate__()
+
+        node.name = 'Renamed'
+        plug.value = 'TAGADAPOUETPOUET'
+
+        p_pickle, node_pickle = pickle.loads(pickle.dumps((p, node)))
+
+        self.assertEqual(node_pickle.name, 'Renamed')
+        self.assertEqual(p_pickle.path_to_plug(
+            '|Renamed.ArchiveSearchPath').value, 'TAGADAPOUETPOUET')
+        self.assertIs(node_pickle.parent, p_pickle.root)
+
+        node.name = 'Preferences'
+
+        # shallow copy doesn't copy the graph
+        node = p.path_to_node('|Preferences')
+        node_copy = copy.copy(node)
+
+        self.assertIsNot(node_copy, node)
+        self.assertIs(node_copy.parent, node.parent)
+        self.assertEqual(node_copy.path, node.path)
+        self.assertIs(copy.copy(next(node.plugs)).parent, node)
+
+
+for path in all_gfiles:
+    test_name = _gen_test_name('pickle', path)
+    test = test_generator_pickle(path)
+    setattr(PickleTestCase, test_name, test)
+
+
+class LuaTestCase(unittest.TestCase):
+
+    def test_parse_value(self):
+
+        for raw, value in (('{1,0.5,-0.5}', [1, 0.5, -0.5]),
+                           ('{1e-05, 2}', [1e-05, 2]),
+                           ('{}', {}),
+                           ('{min=0,slidermax=4.5}',
+                            {'min': 0, 'slidermax': 4.5}),
+                           ('{{"Distant","distant"},{"Dir","dir"}}',
+                            [['Distant', 'distant'], ['Dir', 'dir']]),
+                           ('{"a",b=true;nil}', {1: 'a', 2: None,
+                                                 'b': True}),
+                           ('{["min"]=0,[2]="x"}', {'min': 0, 2: 'x'}),
+                           ('"foo\\"bar\\010"', 'foo"bar\n'),
+                           ('"a\\\\b"', 'a\\b'),
+                           ('transform.Id', 'transform.Id'),
+                           ('false', False),
+                           ('-3', -3)):
+            self.assertEqual(parse_value(raw), value)
+
+        for raw in ('', '{', '{1,2', '{1}}', '{a=}', '__import__("os")()',
+                    '{1 2}', '"foo'):
+            with self.assertRaises(ValueError):
+                parse_value(raw)
+
+    def test_param(self):
+
+        p = guerilla_parser.GuerillaParser(
+            'oid[1]=create("GADocument","\\"\\"","LUIDocument")\n'
+            'oid[2]=create("Plug","$1","Mode",4,types.enum '
+            '{{"Distant","distant"},{"Directional","directional"}},'
+            '"distant")\n'
+            'oid[3]=create("Plug","$1","Size",4,types.float '
+            '{min=0,max=1},0.5)\n'
+            'oid[4]=create("Plug","$1","Field",4,types.combo,'
+            '{"color","density"},"density")\n'
+            'oid[6]=create("Plug","$1","Field2",4,types.combo '
+            '{"color","density"},"color")\n'
+            'oid[7]=create("Plug","$1","Field3",4,types.combo,'
+            '{"color","density"})\n'
+            'oid[5]=create("Plug","$1","Color",4,types.color,'
+            '{1,0.5,0.5})\n'
+            'set("$1.Empty",{})\n'
+            'set("$1.Names",{"foo","bar"})\n')
+
+        mode = p.path_to_plug('.Mode')
+        self.assertEqual(mode.value, 'distant')
+        self.assertEqual(mode.param, [['Distant', 'distant'],
+                                      ['Directional', 'directional']])
+
+        size = p.path_to_plug('.Size')
+        self.assertEqual(size.value, 0.5)
+        self.assertEqual(size.param, {'min': 0, 'max': 1})
+
+        field = p.path_to_plug('.Field')
+        self.assertEqual(field.value, 'density')
+        self.assertEqual(field.param, ['color', 'density'])
+
+        field = p.path_to_plug('.Field2')
+        self.assertEqual(field.value, 'color')
+        self.assertEqual(field.param, ['color', 'density'])
+
+        # table without choices after it is the value
+        field = p.path_to_plug('.Field3')
+        self.assertEqual(field.value, ['color', 'density'])
+        self.assertIsNone(field.param)
+
+        color = p.path_to_plug('.Color')
+        self.assertEqual(color.value, (1, 0.5, 0.5))
+        self.assertIsNone(color.param)
+
+        empty = p.path_to_plug('.Empty')
+        self.assertEqual(empty.value, {})
+
+        names = p.path_to_plug('.Names')
+        self.assertEqual(names.value, ['foo', 'bar'])
+
+        # written back the same
+        p.set_plug_value([(empty, empty.value), (names, names.value)])
+
+        self.assertFalse(p.has_changed)
+
+        p.set_plug_value([(empty, {'min': 1, 3: 'x'}), (names, [])])
+
+        p_mod = guerilla_parser.GuerillaParser(p.modified_content)
+
+        self.assertEqual(p_mod.path_to_plug('.Empty').value,
+                         {'min': 1, 3: 'x'})
+        self.assertEqual(p_mod.path_to_plug('.Names').value, {})
+
+
 ###############################################################################
 # Unique string test
 ###############################################################################